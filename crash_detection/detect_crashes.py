@@ -10,6 +10,9 @@ from dataclasses import dataclass, field
 CRASH_PATTERN = re.compile(
     r"Stack dump:|PLEASE submit a bug report to https|LLVM ERROR:|Assertion `"
 )
+# Written by ctit analyze when its per-TU watchdog kills clang-tidy.
+_LIMIT_EVENT = re.compile(r"^CTIT (TIMEOUT|OOM): (.+?) exceeded .*\(checks: ([^)]*)\)$")
+_LIMIT_EVENT_KINDS = {"TIMEOUT": "hang", "OOM": "OOM"}
 # Matches both stack dump items ("ASTMatcher: Processing '...' against:")
 # and any other "Processing '...' against" lines.
 _PROCESSING_PATTERN = re.compile(r"(?:Processing|Matching) '([^']+)' against")
@@ -54,19 +57,34 @@ def _check_from_context(context: list[str]) -> str:
     return "unknown"
 
 
-def _parse_log(path: str, project: str) -> dict[str, list[list[str]]]:
-    """Return {check_name: [context_lines_per_crash]} for one log file."""
+def _parse_log(
+    path: str, project: str
+) -> tuple[dict[str, list[list[str]]], dict[str, list[list[str]]]]:
+    """Return the crashes and watchdog kills of one log file.
+
+    Both are {check_name: [context_lines_per_occurrence]}. TUs killed by the
+    analyze watchdog are not crashes: they are listed under the check
+    pattern that was running, marked "(hang)" or "(OOM)", with the event
+    line as their context.
+    """
     try:
         with open(path) as f:
             lines = f.readlines()
     except OSError as e:
         print(f"Warning: could not read {path}: {e}", file=sys.stderr)
-        return {}
+        return {}, {}
 
     result: dict[str, list[list[str]]] = {}
+    kills: dict[str, list[list[str]]] = {}
     i = 0
     while i < len(lines):
-        if CRASH_PATTERN.search(lines[i]):
+        event = _LIMIT_EVENT.match(lines[i].rstrip("\n"))
+        if event:
+            kind, _path, checks = event.groups()
+            check = f"{checks} ({_LIMIT_EVENT_KINDS[kind]})"
+            kills.setdefault(check, []).append([lines[i]])
+            i += 1
+        elif CRASH_PATTERN.search(lines[i]):
             context = _capture_crash(lines, i)
             check = _check_from_context(context)
             result.setdefault(check, []).append(context)
@@ -74,11 +92,26 @@ def _parse_log(path: str, project: str) -> dict[str, list[list[str]]]:
         else:
             i += 1
 
-    return result
+    return result, kills
+
 
+def _add_occurrences(
+    found: dict[str, _CheckCrashes],
+    project: str,
+    per_check: dict[str, list[list[str]]],
+) -> None:
+    for check, occurrences in per_check.items():
+        info = found.setdefault(check, _CheckCrashes())
+        info.count += len(occurrences)
+        # Keep only one example per project to avoid huge memory use.
+        if all(ex.project != project for ex in info.examples):
+            info.examples.append(_CrashExample(project=project, lines=occurrences[0]))
 
-def find_crashes(log_dir: str) -> dict[str, _CheckCrashes]:
-    """Aggregate crashes across all log files, keyed by check name."""
+
+def find_crashes(
+    log_dir: str,
+) -> tuple[dict[str, _CheckCrashes], dict[str, _CheckCrashes]]:
+    """Aggregate crashes and watchdog kills across all log files by check."""
     try:
         names = sorted(f for f in os.listdir(log_dir) if f.endswith(".log"))
     except OSError as e:
@@ -86,22 +119,15 @@ def find_crashes(log_dir: str) -> dict[str, _CheckCrashes]:
         sys.exit(1)
 
     crashes: dict[str, _CheckCrashes] = {}
+    kills: dict[str, _CheckCrashes] = {}
 
     for name in names:
         project = name[:-4]  # strip .log
-        per_check = _parse_log(os.path.join(log_dir, name), project)
-        for check, occurrences in per_check.items():
-            info = crashes.setdefault(check, _CheckCrashes())
-            info.count += len(occurrences)
-            # Keep only one example per project to avoid huge memory use.
-            seen_projects = {ex.project for ex in info.examples}
-            for ctx in occurrences:
-                if project not in seen_projects:
-                    info.examples.append(_CrashExample(project=project, lines=ctx))
-                    seen_projects.add(project)
-                    break
+        per_check, killed = _parse_log(os.path.join(log_dir, name), project)
+        _add_occurrences(crashes, project, per_check)
+        _add_occurrences(kills, project, killed)
 
-    return crashes
+    return crashes, kills
 
 
 def _best_example(examples: list[_CrashExample]) -> _CrashExample:
@@ -111,23 +137,43 @@ def _best_example(examples: list[_CrashExample]) -> _CrashExample:
     return examples[0]
 
 
-def write_summary(crashes: dict[str, _CheckCrashes], output: str) -> None:
-    lines: list[str] = ["## Crash Summary\n\n"]
-
-    lines.append("| Check | Crashes |\n")
-    lines.append("|-------|---------|\n")
-    for check, info in sorted(crashes.items(), key=lambda x: -x[1].count):
+def _write_table(
+    lines: list[str], found: dict[str, _CheckCrashes], column: str
+) -> None:
+    lines.append(f"| Check | {column} |\n")
+    lines.append(f"|-------|{'-' * (len(column) + 2)}|\n")
+    for check, info in sorted(found.items(), key=lambda x: -x[1].count):
         lines.append(f"| `{check}` | {info.count} |\n")
     lines.append("\n")
 
     lines.append("<details>\n<summary>Examples (click to expand)</summary>\n\n")
-    for check, info in sorted(crashes.items()):
+    for check, info in sorted(found.items()):
         ex = _best_example(info.examples)
         lines.append(f"### `{check}` ({ex.project})\n```\n")
         lines.extend(ex.lines)
         lines.append("```\n\n")
     lines.append("</details>\n")
 
+
+def write_summary(
+    crashes: dict[str, _CheckCrashes],
+    output: str,
+    kills: dict[str, _CheckCrashes] | None = None,
+) -> None:
+    lines: list[str] = ["## Crash Summary\n\n"]
+    if crashes:
+        _write_table(lines, crashes, "Crashes")
+    else:
+        lines.append("No crashes.\n")
+
+    if kills:
+        lines.append("\n## Watchdog Kills\n\n")
+        lines.append(
+            "TUs stopped by the per-TU time or memory limit. They are not "
+            "crashes, but may point at a hang or runaway memory use.\n\n"
+        )
+        _write_table(lines, kills, "Kills")
+
     with open(output, "w") as f:
         f.writelines(lines)
 
@@ -149,15 +195,22 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    crashes = find_crashes(args.log_dir)
+    crashes, kills = find_crashes(args.log_dir)
 
+    if crashes or kills:
+        write_summary(crashes, args.summary_file, kills)
+    if kills:
+        total = sum(info.count for info in kills.values())
+        print(
+            f"Watchdog kills (hangs or OOMs, not counted as crashes): {total} "
+            f"total across {len(kills)} unique check(s)."
+        )
     if crashes:
-        write_summary(crashes, args.summary_file)
         _set_github_output("crashes_found", "true")
         total = sum(info.count for info in crashes.values())
         print(
-            f"Crashes found: {total} total across {len(crashes)} unique check(s). "
-            f"Summary written to {args.summary_file}"
+            f"Crashes found: {total} total across {len(crashes)} unique "
+            f"check(s). Summary written to {args.summary_file}"
         )
     else:
         _set_github_output("crashes_found", "false")
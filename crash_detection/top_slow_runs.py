@@ -2,12 +2,15 @@
 """Find the top N longest clang-tidy runs across log files."""
 
 import argparse
+import json
 import os
 import re
 import sys
 from dataclasses import dataclass
 
 _TIMING_PATTERN = re.compile(r"\[\s*\d+/\d+\]\[(\d+\.?\d*)s\](.*)")
+# Per-TU records written by ctit analyze's built-in engine.
+_RESULTS_FILE = "results.jsonl"
 
 
 @dataclass
@@ -17,7 +20,55 @@ class _RunEntry:
     detail: str
 
 
+def _record_detail(record: dict) -> str:
+    notes = [
+        f"CPU {record['cpu']:.1f}s",
+        f"peak RSS {record['peak_rss_kb'] / 1024:.0f} MB",
+    ]
+    if record.get("limit_exceeded"):
+        notes.append(record["limit_exceeded"])
+    elif record.get("signal"):
+        notes.append(f"killed by {record['signal']}")
+    if record.get("batch_size", 1) > 1:
+        notes.append(f"batch of {record['batch_size']}")
+    return f"{record['file']} ({', '.join(notes)})"
+
+
+def parse_results(path: str) -> list[_RunEntry]:
+    """Read the runs from the per-TU records of a ctit analyze log directory."""
+    entries: list[_RunEntry] = []
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # The last line may be torn if the run was killed.
+                    continue
+                entries.append(
+                    _RunEntry(
+                        seconds=record["wall"],
+                        project=record["project"],
+                        detail=_record_detail(record),
+                    )
+                )
+    except OSError as e:
+        print(f"Error reading {path}: {e}", file=sys.stderr)
+        sys.exit(1)
+    return entries
+
+
 def parse_timings(log_dir: str) -> list[_RunEntry]:
+    """Read the runs from the per-TU records, or else from the timing lines.
+
+    Timing lines only carry a project when they are in its log; those of
+    the built-in engine go to progress.log, which is why its per-TU records
+    are preferred.
+    """
+    results = os.path.join(log_dir, _RESULTS_FILE)
+    if os.path.isfile(results):
+        return parse_results(results)
+
     try:
         names = sorted(f for f in os.listdir(log_dir) if f.endswith(".log"))
     except OSError as e:
@@ -5,9 +5,38 @@ import argparse
 import argcomplete
 import sys
 
-from testers.analyze import DEFAULT_CLANG_TIDY_BIN, DEFAULT_LOG_DIR, analyze, configure
+from testers.analyze import (
+    DEFAULT_CLANG_TIDY_BIN,
+    DEFAULT_LOG_DIR,
+    DEFAULT_MAX_DIAGNOSTICS,
+    DEFAULT_TU_MEMORY_LIMIT_MB,
+    DEFAULT_TU_TIMEOUT,
+    SCHEDULING_ORDERS,
+    analyze,
+    configure,
+)
 from testers.clone_projects import clone_projects
+from testers.coordinator import (
+    DEFAULT_ADDRESS,
+    DEFAULT_CONNECT_TIMEOUT,
+    run_coordinator,
+    run_worker,
+)
+from testers.check_reuse import DEFAULT_FULL_RUN_EVERY
 from testers.config import CONFIG_FILE, PROJECTS_DIR
+from testers.history import DEFAULT_HISTORY_FILE
+from testers.merge_logs import merge_logs
+from testers.parse_failures import DEFAULT_PARSE_FAILURES_FILE
+from testers.perf_ab import DEFAULT_PERF_SAMPLE, DEFAULT_REPETITIONS, perf_ab
+from testers.result_cache import (
+    DEFAULT_RESULT_CACHE_DIR,
+    DEFAULT_RESULT_CACHE_MB,
+    cache_gc,
+    cache_stats,
+)
+from testers.rewrite import OPTIONAL_DROP_FLAGS
+from testers.shards import Shard
+from testers.tiered import tiered_analyze
 from testers.generate_report import (
     DEFAULT_OUTPUT_FILE,
     generate_report,
@@ -15,6 +44,13 @@ from testers.generate_report import (
 )
 
 
+def _shard(spec: str) -> Shard:
+    try:
+        return Shard.parse(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
 def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(
         prog="ctit",
@@ -51,6 +87,14 @@ def main(argv: list[str] | None = None) -> None:
         default=CONFIG_FILE,
         help="Path to config file (default: bundled projects.json)",
     )
+    configure_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of parallel ninja jobs "
+        "(default: sized from the container's CPU and memory limits)",
+    )
 
     analyze_parser = subparsers.add_parser(
         "analyze",
@@ -69,7 +113,220 @@ def main(argv: list[str] | None = None) -> None:
     analyze_parser.add_argument(
         "--run-tidy-script",
         default=None,
-        help="Path to run-clang-tidy script (default: auto-detect from PATH)",
+        help="Use the run-clang-tidy script backend instead of the built-in "
+        "scheduler; pass 'auto' to detect it from PATH",
+    )
+    analyze_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of parallel clang-tidy processes "
+        "(default: CPUs available to the container)",
+    )
+    analyze_parser.add_argument(
+        "--global-queue",
+        action="store_true",
+        help="Schedule the TUs of all projects from one shared queue "
+        "instead of one project at a time",
+    )
+    analyze_parser.add_argument(
+        "--history-file",
+        default=DEFAULT_HISTORY_FILE,
+        help="Per-TU duration history used to start the slowest TUs first "
+        f"(default: {DEFAULT_HISTORY_FILE})",
+    )
+    analyze_parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=None,
+        metavar="MB",
+        help="Only start a TU when the projected RSS of all running clang-tidy "
+        "processes stays within this budget; 0 disables "
+        "(default: 90%% of the cgroup memory limit, if any)",
+    )
+    analyze_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Pass up to N cheap TUs to a single clang-tidy process (default: 1)",
+    )
+    analyze_parser.add_argument(
+        "--tu-timeout",
+        type=float,
+        default=DEFAULT_TU_TIMEOUT,
+        metavar="SECONDS",
+        help="Kill clang-tidy on a TU after this long and log a CTIT TIMEOUT "
+        f"event; 0 disables (default: {DEFAULT_TU_TIMEOUT})",
+    )
+    analyze_parser.add_argument(
+        "--tu-memory-limit",
+        type=int,
+        default=DEFAULT_TU_MEMORY_LIMIT_MB,
+        metavar="MB",
+        help="Kill clang-tidy on a TU whose RSS exceeds this and log a CTIT OOM "
+        f"event; 0 disables (default: {DEFAULT_TU_MEMORY_LIMIT_MB})",
+    )
+    analyze_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from the journal in --log-dir, skipping "
+        "TUs already analyzed with the same clang-tidy binary, checks and config",
+    )
+    analyze_parser.add_argument(
+        "--shard",
+        type=_shard,
+        default=None,
+        metavar="I/N",
+        help="Only analyze shard I of N of the TUs of all projects; combine the "
+        "shards' log directories with 'ctit merge-logs'",
+    )
+    analyze_parser.add_argument(
+        "--order",
+        choices=SCHEDULING_ORDERS,
+        default="lpt",
+        help="TU scheduling order: 'lpt' runs the slowest TUs first, 'locality' "
+        "runs TUs sharing headers back-to-back on one worker and compares the "
+        "I/O wait with the last 'lpt' run (default: lpt)",
+    )
+    analyze_parser.add_argument(
+        "--max-diagnostics",
+        type=int,
+        default=DEFAULT_MAX_DIAGNOSTICS,
+        metavar="N",
+        help="Stop starting TUs of a project once a check emitted more than N "
+        "diagnostics in it, and note this in its log and the report; 0 disables "
+        f"(default: {DEFAULT_MAX_DIAGNOSTICS})",
+    )
+    analyze_parser.add_argument(
+        "--parse-failures-file",
+        default=DEFAULT_PARSE_FAILURES_FILE,
+        help="Cache of TUs that fail a syntax-only parse, which are skipped "
+        f"(default: {DEFAULT_PARSE_FAILURES_FILE})",
+    )
+    analyze_parser.add_argument(
+        "--analyze-parse-failures",
+        action="store_true",
+        help="Analyze the TUs known to fail to parse too, after all others",
+    )
+    analyze_parser.add_argument(
+        "--no-rewrite",
+        dest="rewrite",
+        action="store_false",
+        help="Use the compile DBs as built, without dropping debug and PCH " "flags",
+    )
+    analyze_parser.add_argument(
+        "--drop-flags",
+        dest="drop_flag_groups",
+        action="append",
+        choices=sorted(OPTIONAL_DROP_FLAGS),
+        metavar="GROUP",
+        help="Also drop these flags from the compile DBs, although they can "
+        "change diagnostics: " + ", ".join(sorted(OPTIONAL_DROP_FLAGS)),
+    )
+    analyze_parser.add_argument(
+        "--rewrite-sample",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Time N TUs per project with the original and the rewritten compile "
+        "DB and compare their diagnostics before analyzing (default: 0)",
+    )
+    analyze_parser.add_argument(
+        "--result-cache",
+        action="store_true",
+        help="Replay the cached output of TUs whose clang-tidy binary, settings, "
+        "compile command and headers are unchanged instead of analyzing them",
+    )
+    analyze_parser.add_argument(
+        "--result-cache-dir",
+        default=DEFAULT_RESULT_CACHE_DIR,
+        help="Cache of clang-tidy outputs replayed for unchanged TUs "
+        f"(default: {DEFAULT_RESULT_CACHE_DIR})",
+    )
+    analyze_parser.add_argument(
+        "--result-cache-size",
+        type=int,
+        default=DEFAULT_RESULT_CACHE_MB,
+        metavar="MB",
+        help="Evict the least recently used outputs once the result cache "
+        f"exceeds MB (default: {DEFAULT_RESULT_CACHE_MB})",
+    )
+    analyze_parser.add_argument(
+        "--reuse-by-check-source",
+        default=None,
+        metavar="LLVM_SRC",
+        help="Reuse each check's cached output on TUs unless its sources in the "
+        "LLVM git checkout LLVM_SRC, which clang-tidy was built from, changed",
+    )
+    analyze_parser.add_argument(
+        "--full-run-every",
+        type=int,
+        default=DEFAULT_FULL_RUN_EVERY,
+        metavar="N",
+        help="With --reuse-by-check-source, analyze every check on every N-th "
+        f"run and report reused outputs that differ (default: "
+        f"{DEFAULT_FULL_RUN_EVERY})",
+    )
+    analyze_parser.add_argument(
+        "--baseline-binary",
+        default=None,
+        metavar="PATH",
+        help="Also run every TU with this unpatched clang-tidy and record which "
+        "diagnostics the tested one adds and removes; 'ctit report' then "
+        "shows only those",
+    )
+    analyze_parser.add_argument(
+        "--files-including",
+        action="append",
+        default=None,
+        metavar="HEADER",
+        help="Only analyze TUs that include HEADER, an absolute path or the end "
+        "of one, according to an index of the projects' headers; repeatable",
+    )
+    analyze_parser.add_argument(
+        "--only-files-with-findings",
+        default=None,
+        metavar="LOG_DIR",
+        help="Only analyze TUs with check diagnostics in the results of the run "
+        "logged to LOG_DIR",
+    )
+    analyze_parser.add_argument(
+        "--paths",
+        action="append",
+        default=None,
+        metavar="GLOB",
+        help="Only analyze TUs whose path, relative to the project or prefixed "
+        "with its name, matches GLOB; repeatable",
+    )
+    analyze_parser.add_argument(
+        "--identifier-prefilter",
+        action="store_true",
+        help="Skip TUs whose preprocessed source names none of the trigger "
+        "symbols known for the enabled checks, indexed once per project commit",
+    )
+    analyze_parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Only analyze a few TUs per project that together contain every AST "
+        "node kind of its TUs, indexed once per project commit; rerun with "
+        "--resume and without --quick for the rest",
+    )
+    analyze_parser.add_argument(
+        "--sample-first",
+        type=float,
+        default=None,
+        metavar="FRACTION",
+        help="First analyze a reproducible sample of FRACTION of the TUs, "
+        "stratified by directory and recorded cost, and write a provisional "
+        "report, then analyze the rest and rewrite it",
+    )
+    analyze_parser.add_argument(
+        "--report",
+        default=DEFAULT_OUTPUT_FILE,
+        help="The report --sample-first writes and updates "
+        f"(default: {DEFAULT_OUTPUT_FILE})",
     )
     analyze_parser.add_argument(
         "--tidy-config",
@@ -103,6 +360,264 @@ def main(argv: list[str] | None = None) -> None:
         help="Enable per-check timing profiles (appended to logs)",
     )
 
+    coordinator_parser = subparsers.add_parser(
+        "coordinator",
+        help="Hand out the TUs of all projects to 'ctit worker' processes",
+    )
+    coordinator_parser.add_argument(
+        "--check-name",
+        required=True,
+        help="Clang-tidy check name pattern (e.g. bugprone-*)",
+    )
+    coordinator_parser.add_argument(
+        "--listen",
+        default=DEFAULT_ADDRESS,
+        metavar="ADDRESS",
+        help="HOST:PORT or unix:PATH to accept workers on "
+        f"(default: {DEFAULT_ADDRESS})",
+    )
+    coordinator_parser.add_argument(
+        "--clang-tidy-binary",
+        default=DEFAULT_CLANG_TIDY_BIN,
+        help="The clang-tidy binary every worker must run "
+        f"(default: {DEFAULT_CLANG_TIDY_BIN})",
+    )
+    coordinator_parser.add_argument(
+        "--tidy-config",
+        default=None,
+        help="Extra clang-tidy configuration string",
+    )
+    coordinator_parser.add_argument(
+        "--work-dir",
+        default=PROJECTS_DIR,
+        help=f"Directory containing configured projects (default: {PROJECTS_DIR})",
+    )
+    coordinator_parser.add_argument(
+        "--log-dir",
+        default=DEFAULT_LOG_DIR,
+        help=f"Directory for analysis logs (default: {DEFAULT_LOG_DIR})",
+    )
+    coordinator_parser.add_argument(
+        "--config",
+        default=CONFIG_FILE,
+        help="Path to config file (default: bundled projects.json)",
+    )
+    coordinator_parser.add_argument(
+        "--skip-headers",
+        action="store_true",
+        help="Pass -header-filter= to clang-tidy so no header diagnostics are emitted",
+    )
+    coordinator_parser.add_argument(
+        "--history-file",
+        default=DEFAULT_HISTORY_FILE,
+        help="Per-TU duration history used to hand out the slowest TUs first "
+        f"(default: {DEFAULT_HISTORY_FILE})",
+    )
+    coordinator_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from the journal in --log-dir",
+    )
+    coordinator_parser.add_argument(
+        "--tu-timeout",
+        type=float,
+        default=DEFAULT_TU_TIMEOUT,
+        metavar="SECONDS",
+        help="Per-TU time limit for the workers; 0 disables "
+        f"(default: {DEFAULT_TU_TIMEOUT})",
+    )
+    coordinator_parser.add_argument(
+        "--tu-memory-limit",
+        type=int,
+        default=DEFAULT_TU_MEMORY_LIMIT_MB,
+        metavar="MB",
+        help="Per-TU memory limit for the workers; 0 disables "
+        f"(default: {DEFAULT_TU_MEMORY_LIMIT_MB})",
+    )
+    coordinator_parser.add_argument(
+        "--max-diagnostics",
+        type=int,
+        default=DEFAULT_MAX_DIAGNOSTICS,
+        metavar="N",
+        help="Stop handing out TUs of a project once a check emitted more than N "
+        f"diagnostics in it; 0 disables (default: {DEFAULT_MAX_DIAGNOSTICS})",
+    )
+    coordinator_parser.add_argument(
+        "--no-rewrite",
+        dest="rewrite",
+        action="store_false",
+        help="Use the compile DBs as built on the coordinator and the workers",
+    )
+    coordinator_parser.add_argument(
+        "--drop-flags",
+        dest="drop_flag_groups",
+        action="append",
+        choices=sorted(OPTIONAL_DROP_FLAGS),
+        metavar="GROUP",
+        help="Also drop these flags from the compile DBs, although they can "
+        "change diagnostics: " + ", ".join(sorted(OPTIONAL_DROP_FLAGS)),
+    )
+
+    worker_parser = subparsers.add_parser(
+        "worker",
+        help="Analyze TUs handed out by a 'ctit coordinator'",
+    )
+    worker_parser.add_argument(
+        "--connect",
+        default=DEFAULT_ADDRESS,
+        metavar="ADDRESS",
+        help=f"HOST:PORT or unix:PATH of the coordinator (default: {DEFAULT_ADDRESS})",
+    )
+    worker_parser.add_argument(
+        "--clang-tidy-binary",
+        default=DEFAULT_CLANG_TIDY_BIN,
+        help=f"Path to clang-tidy binary (default: {DEFAULT_CLANG_TIDY_BIN})",
+    )
+    worker_parser.add_argument(
+        "--work-dir",
+        default=PROJECTS_DIR,
+        help=f"Directory containing configured projects (default: {PROJECTS_DIR})",
+    )
+    worker_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of parallel clang-tidy processes "
+        "(default: CPUs available to the container)",
+    )
+    worker_parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=DEFAULT_CONNECT_TIMEOUT,
+        metavar="SECONDS",
+        help="How long to wait for the coordinator to come up "
+        f"(default: {DEFAULT_CONNECT_TIMEOUT:g})",
+    )
+
+    perf_parser = subparsers.add_parser(
+        "perf-ab",
+        help="Compare the check timings of a patched clang-tidy with a baseline",
+    )
+    perf_parser.add_argument(
+        "--check-name",
+        required=True,
+        help="Clang-tidy check name pattern (e.g. bugprone-*)",
+    )
+    perf_parser.add_argument(
+        "--clang-tidy-binary",
+        default=DEFAULT_CLANG_TIDY_BIN,
+        help=f"Path to the patched clang-tidy (default: {DEFAULT_CLANG_TIDY_BIN})",
+    )
+    perf_parser.add_argument(
+        "--baseline-binary",
+        required=True,
+        metavar="PATH",
+        help="Path to the unpatched clang-tidy to compare with",
+    )
+    perf_parser.add_argument(
+        "--repetitions",
+        type=int,
+        default=DEFAULT_REPETITIONS,
+        metavar="N",
+        help=f"Profile every TU N times with each binary (default: {DEFAULT_REPETITIONS})",
+    )
+    perf_parser.add_argument(
+        "--sample",
+        type=int,
+        default=DEFAULT_PERF_SAMPLE,
+        metavar="N",
+        help="Profile N TUs per project, spread over its compile DB; 0 for all "
+        f"(default: {DEFAULT_PERF_SAMPLE})",
+    )
+    perf_parser.add_argument(
+        "--tu-timeout",
+        type=float,
+        default=DEFAULT_TU_TIMEOUT,
+        metavar="SECONDS",
+        help="Leave out runs that take longer; 0 disables "
+        f"(default: {DEFAULT_TU_TIMEOUT})",
+    )
+    perf_parser.add_argument(
+        "--tidy-config",
+        default=None,
+        help="Extra clang-tidy configuration string",
+    )
+    perf_parser.add_argument(
+        "--work-dir",
+        default=PROJECTS_DIR,
+        help=f"Directory containing configured projects (default: {PROJECTS_DIR})",
+    )
+    perf_parser.add_argument(
+        "--log-dir",
+        default=DEFAULT_LOG_DIR,
+        help=f"Directory for the timings, read by 'ctit report' (default: {DEFAULT_LOG_DIR})",
+    )
+    perf_parser.add_argument(
+        "--config",
+        default=CONFIG_FILE,
+        help="Path to config file (default: bundled projects.json)",
+    )
+    perf_parser.add_argument(
+        "--skip-headers",
+        action="store_true",
+        help="Pass -header-filter= to clang-tidy so no header diagnostics are emitted",
+    )
+    perf_parser.add_argument(
+        "--no-rewrite",
+        dest="rewrite",
+        action="store_false",
+        help="Use the compile DBs as built, without dropping debug and PCH " "flags",
+    )
+    perf_parser.add_argument(
+        "--drop-flags",
+        dest="drop_flag_groups",
+        action="append",
+        choices=sorted(OPTIONAL_DROP_FLAGS),
+        metavar="GROUP",
+        help="Also drop these flags from the compile DBs, although they can "
+        "change diagnostics: " + ", ".join(sorted(OPTIONAL_DROP_FLAGS)),
+    )
+
+    merge_parser = subparsers.add_parser(
+        "merge-logs",
+        help="Combine the log directories of 'analyze --shard' runs into one",
+    )
+    merge_parser.add_argument(
+        "shard_dirs",
+        nargs="+",
+        metavar="SHARD_DIR",
+        help="Log directories of the shards",
+    )
+    merge_parser.add_argument(
+        "--log-dir",
+        default=DEFAULT_LOG_DIR,
+        help=f"Directory for the merged logs (default: {DEFAULT_LOG_DIR})",
+    )
+
+    cache_parser = subparsers.add_parser(
+        "cache",
+        help="Inspect or shrink the result cache of 'ctit analyze'",
+    )
+    cache_parser.add_argument(
+        "action",
+        choices=("stats", "gc"),
+        help="'stats' prints the cache's size, 'gc' evicts the least recently "
+        "used outputs until it fits --max-size",
+    )
+    cache_parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_RESULT_CACHE_DIR,
+        help=f"Result cache directory (default: {DEFAULT_RESULT_CACHE_DIR})",
+    )
+    cache_parser.add_argument(
+        "--max-size",
+        type=int,
+        default=DEFAULT_RESULT_CACHE_MB,
+        metavar="MB",
+        help=f"Size to shrink the cache to (default: {DEFAULT_RESULT_CACHE_MB})",
+    )
+
     report_parser = subparsers.add_parser(
         "report",
         help="Generate markdown report from clang-tidy logs",
@@ -142,19 +657,99 @@ def main(argv: list[str] | None = None) -> None:
     elif args.command == "clone":
         clone_projects(work_dir=args.work_dir, config_path=args.config)
     elif args.command == "configure":
-        configure(work_dir=args.work_dir, config_path=args.config)
+        configure(work_dir=args.work_dir, config_path=args.config, jobs=args.jobs)
     elif args.command == "analyze":
-        analyze(
+        analyze_args = {
+            "check_name": args.check_name,
+            "tidy_config": args.tidy_config,
+            "clang_tidy_bin": args.clang_tidy_binary,
+            "run_tidy_script": args.run_tidy_script,
+            "work_dir": args.work_dir,
+            "log_dir": args.log_dir,
+            "config_path": args.config,
+            "skip_headers": args.skip_headers,
+            "profile": args.enable_check_profile,
+            "jobs": args.jobs,
+            "global_queue": args.global_queue,
+            "history_file": args.history_file,
+            "memory_budget_mb": args.memory_budget,
+            "batch_size": args.batch_size,
+            "tu_timeout": args.tu_timeout,
+            "tu_memory_limit_mb": args.tu_memory_limit,
+            "resume": args.resume,
+            "shard": args.shard,
+            "order": args.order,
+            "max_diagnostics": args.max_diagnostics,
+            "parse_failures_file": args.parse_failures_file,
+            "analyze_parse_failures": args.analyze_parse_failures,
+            "rewrite": args.rewrite,
+            "rewrite_sample": args.rewrite_sample,
+            "drop_flag_groups": args.drop_flag_groups,
+            "result_cache": args.result_cache,
+            "result_cache_dir": args.result_cache_dir,
+            "result_cache_mb": args.result_cache_size,
+            "reuse_check_sources": args.reuse_by_check_source,
+            "full_run_every": args.full_run_every,
+            "baseline_binary": args.baseline_binary,
+            "files_including": args.files_including,
+            "findings_dir": args.only_files_with_findings,
+            "paths": args.paths,
+            "identifier_prefilter": args.identifier_prefilter,
+            "quick": args.quick,
+        }
+        if args.sample_first is None:
+            analyze(**analyze_args)
+        else:
+            tiered_analyze(args.sample_first, args.report, **analyze_args)
+    elif args.command == "coordinator":
+        run_coordinator(
             check_name=args.check_name,
             tidy_config=args.tidy_config,
+            work_dir=args.work_dir,
+            clang_tidy_bin=args.clang_tidy_binary,
+            log_dir=args.log_dir,
+            config_path=args.config,
+            skip_headers=args.skip_headers,
+            address=args.listen,
+            history_file=args.history_file,
+            resume=args.resume,
+            tu_timeout=args.tu_timeout,
+            tu_memory_limit_mb=args.tu_memory_limit,
+            max_diagnostics=args.max_diagnostics,
+            rewrite=args.rewrite,
+            drop_flag_groups=args.drop_flag_groups,
+        )
+    elif args.command == "worker":
+        run_worker(
+            address=args.connect,
             clang_tidy_bin=args.clang_tidy_binary,
-            run_tidy_script=args.run_tidy_script,
+            work_dir=args.work_dir,
+            jobs=args.jobs,
+            connect_timeout=args.connect_timeout,
+        )
+    elif args.command == "perf-ab":
+        perf_ab(
+            check_name=args.check_name,
+            baseline_binary=args.baseline_binary,
+            clang_tidy_bin=args.clang_tidy_binary,
+            tidy_config=args.tidy_config,
             work_dir=args.work_dir,
             log_dir=args.log_dir,
             config_path=args.config,
             skip_headers=args.skip_headers,
-            profile=args.enable_check_profile,
+            repetitions=args.repetitions,
+            sample=args.sample,
+            tu_timeout=args.tu_timeout,
+            rewrite=args.rewrite,
+            drop_flag_groups=args.drop_flag_groups,
         )
+    elif args.command == "merge-logs":
+        merge_logs(shard_dirs=args.shard_dirs, output_dir=args.log_dir)
+    elif args.command == "cache":
+        if args.action == "stats":
+            cache_stats(args.cache_dir)
+        else:
+            cache_gc(args.cache_dir, args.max_size)
     elif args.command == "report":
         generate_report(log_dir=args.log_dir, output=args.output)
     elif args.command == "report-template":
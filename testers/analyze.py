@@ -1,26 +1,149 @@
 """Run clang-tidy analysis on test projects."""
 
+import fnmatch
+import glob
+import heapq
 import json
 import os
 import re
+import resource
 import shutil
+import signal
 import subprocess
 import sys
-from dataclasses import dataclass, field
+import tempfile
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from typing import Any, BinaryIO, TextIO
 
+from testers.ast_coverage import build_ast_index, cover_kinds
+from testers.baseline import DIFF_FILE, PERF_FILE, diff_diagnostics
+from testers.check_reuse import (
+    DEFAULT_FULL_RUN_EVERY,
+    FRONTEND,
+    CheckReuse,
+    check_keys,
+    diagnostics,
+    due_for_full_run,
+    enabled_checks,
+    join_checks,
+    record_run,
+    split_by_check,
+)
 from testers.config import CONFIG_FILE, PROJECTS_DIR, Project, load_projects
+from testers.history import (
+    DEFAULT_HISTORY_FILE,
+    TuHistory,
+    estimate_peak_rss,
+    estimate_walls,
+)
+from testers.identifier_index import (
+    CHECK_TRIGGERS,
+    build_identifier_index,
+    trigger_identifiers,
+    trigger_options,
+)
+from testers.include_index import build_include_index
+from testers.journal import JOURNAL_FILE, Journal, binary_digest, run_fingerprint
+from testers.locality import include_signatures, locality_chains
+from testers.parse_failures import (
+    DEFAULT_PARSE_FAILURES_FILE,
+    ParseFailures,
+    compiler_id,
+    entry_compiler,
+    parse_error,
+)
+from testers.rewrite import (
+    DEFAULT_DROP_FLAGS,
+    OPTIONAL_DROP_FLAGS,
+    REWRITTEN_DB_DIR,
+    RewriteRules,
+    compile_db_dir,
+    rewrite_entries,
+    write_compile_db,
+)
+from testers.shards import Shard, assign_shards
+from testers.result_cache import (
+    DEFAULT_RESULT_CACHE_DIR,
+    DEFAULT_RESULT_CACHE_MB,
+    ResultCache,
+)
+from testers.results import RESULTS_FILE, ResultLog, command_hash, read_results
+from testers.resources import (
+    MemoryBudget,
+    detect_limits,
+    read_iowait_seconds,
+    read_rss_kb,
+)
 
 DEFAULT_CLANG_TIDY_BIN = "clang-tidy"
 DEFAULT_LOG_DIR = "logs"
 
-# Matches "[  1/165]" lines
-_PROGRESS_RE = re.compile(r"^\[\s*\d+/\d+\]|^Running clang-tidy in ")
+# How often the scheduler re-checks memory admission while TUs run.
+_ADMISSION_POLL_SECONDS = 0.5
+
+# Cheap TUs are packed into batches of roughly this fraction of the average
+# per-worker load, which keeps enough batches around to balance the pool.
+_BATCHES_PER_JOB = 4
+
+# Same crash signatures as crash_detection/detect_crashes.py.
+_CRASH_RE = re.compile(
+    r"Stack dump:|PLEASE submit a bug report to https|LLVM ERROR:|Assertion `"
+)
+
+# Matches "path:line:col: severity: " at the start of a diagnostic.
+_DIAGNOSTIC_RE = re.compile(r"^(.+?):\d+:\d+: (warning|error|note|remark): ")
+
+# Matches the "[check-name]" that ends a warning or error.
+_CHECK_DIAGNOSTIC_RE = re.compile(
+    r": (?:warning|error): .* \[([^\]]+)\]$", re.MULTILINE
+)
+
+# Scheduling orders of the built-in engine; see run_work_queue().
+SCHEDULING_ORDERS = ("lpt", "locality")
+
+# ru_inblock counts 512-byte blocks.
+_BLOCK_BYTES = 512
+
+# The per-TU watchdog is off by default: slow or large TUs of big projects
+# are not hangs or OOMs. Set fixed limits, not ones derived from the runner,
+# so reruns on any runner stop the same TUs.
+DEFAULT_TU_TIMEOUT = 0
+DEFAULT_TU_MEMORY_LIMIT_MB = 0
+
+# A check with more diagnostics than this in one project stops its analysis.
+# Off by default: a stopped project's remaining TUs would go unchecked for
+# crashes.
+DEFAULT_MAX_DIAGNOSTICS = 0
+
+# The TU manifest plan_compile_db() writes next to the planned compile DB.
+_MANIFEST_FILE = "manifest.json"
+
+# Upper bound on how often a watchdog samples a running clang-tidy process.
+_WATCHDOG_POLL_SECONDS = 0.1
+
+# Matches "[  1/165]" lines, at the start of a line
+_PROGRESS_RE = re.compile(rb"\[\s*\d+/\d+\]|Running clang-tidy in ")
+
+# What a progress line starts with; other lines are never matched at all.
+_PROGRESS_PREFIXES = (b"[", b"Running clang-tidy in ")
+
+# How much run-clang-tidy output is read at once.
+_PUMP_CHUNK_BYTES = 1 << 20
 
 ANALYSIS_CONFIG_FIELDS = {
     "cmake_source_subdir",
     "cmake_flags",
     "build_targets",
     "file_regex",
+    "drop_flags",
+    "keep_flags",
 }
 
 
@@ -33,6 +156,117 @@ class AnalysisConfig:
     cmake_flags: list[str] = field(default_factory=list)
     build_targets: list[str] = field(default_factory=list)
     file_regex: str | None = None
+    drop_flags: list[str] = field(default_factory=list)
+    keep_flags: list[str] = field(default_factory=list)
+
+    def rewrite_rules(self, drop_groups: Sequence[str] = ()) -> RewriteRules:
+        """The built-in compile DB rewrite rules amended by the project's.
+
+        drop_groups name the OPTIONAL_DROP_FLAGS to drop as well.
+        """
+        optional = [rule for g in drop_groups for rule in OPTIONAL_DROP_FLAGS[g]]
+        return RewriteRules(
+            DEFAULT_DROP_FLAGS + optional + self.drop_flags, self.keep_flags
+        )
+
+
+@dataclass
+class TranslationUnit:
+    """A source file from a project's compilation database."""
+
+    project: str
+    file: str
+    build_dir: str
+    source_dir: str = ""
+    cost: float = 0.0
+    peak_rss: float = 0.0
+    checks: str | None = None
+
+    @property
+    def key(self) -> str:
+        """The file path relative to the project, used to key run history."""
+        if self.source_dir:
+            return os.path.relpath(self.file, self.source_dir)
+        return self.file
+
+
+@dataclass
+class TidyResult:
+    """Outcome of running clang-tidy on a single translation unit."""
+
+    unit: TranslationUnit
+    invocation: list[str]
+    returncode: int
+    output: str
+    elapsed: float
+    peak_rss_kb: int = 0
+    read_blocks: int = 0
+    batch_size: int = 1
+    limit_exceeded: str | None = None
+    started: float = 0.0
+    cpu: float = 0.0
+
+    @property
+    def crashed(self) -> bool:
+        return self.returncode < 0 or _CRASH_RE.search(self.output) is not None
+
+    def record(self, commit: str) -> dict[str, Any]:
+        """The TU's entry in the structured results of a run."""
+        signal_name = None
+        if self.returncode < 0:
+            try:
+                signal_name = signal.Signals(-self.returncode).name
+            except ValueError:
+                signal_name = str(-self.returncode)
+        return {
+            "project": self.unit.project,
+            "commit": commit,
+            "file": self.unit.key,
+            "command": command_hash(self.invocation),
+            "start": round(self.started, 3),
+            "end": round(self.started + self.elapsed, 3),
+            "wall": round(self.elapsed, 3),
+            "cpu": round(self.cpu, 3),
+            "peak_rss_kb": self.peak_rss_kb,
+            "exit_code": self.returncode if self.returncode >= 0 else None,
+            "signal": signal_name,
+            "crashed": self.crashed,
+            "limit_exceeded": self.limit_exceeded,
+            "batch_size": self.batch_size,
+            "diagnostics": dict(Counter(_CHECK_DIAGNOSTIC_RE.findall(self.output))),
+        }
+
+
+@dataclass
+class TuLimits:
+    """Per-TU limits; clang-tidy is killed when a TU exceeds one of them."""
+
+    timeout: float | None = None
+    memory_mb: int | None = None
+
+    def describe(self) -> str:
+        timeout = f"{self.timeout:g}s" if self.timeout else "no time limit"
+        memory = f"{self.memory_mb} MB" if self.memory_mb else "no memory limit"
+        return f"{timeout}, {memory}"
+
+    def event(self, kind: str, unit: TranslationUnit, command: list[str]) -> str:
+        """The log line reporting that a TU hit a limit.
+
+        crash_detection/detect_crashes.py reports these apart from crashes.
+        """
+        if kind == "TIMEOUT":
+            limit = f"the {self.timeout:g}s per-TU time limit"
+        else:
+            limit = f"the {self.memory_mb} MB per-TU memory limit"
+        checks = next(
+            (
+                a.removeprefix("-checks=-*,")
+                for a in command
+                if a.startswith("-checks=")
+            ),
+            "",
+        )
+        return f"CTIT {kind}: {unit.file} exceeded {limit} (checks: {checks})\n"
 
 
 def get_analysis_configs(
@@ -66,6 +300,19 @@ def remove_clang_tidy_configs(source_dir: str) -> None:
                 os.remove(os.path.join(root, name))
 
 
+def remove_stale_reports(log_dir: str, keep_diff: bool = False) -> None:
+    """Remove what earlier runs left in log_dir for generate_report.py.
+
+    The check timings of perf-ab and, unless keep_diff, the diff to a
+    baseline binary would otherwise go into the report of this run.
+    """
+    names = [PERF_FILE] if keep_diff else [PERF_FILE, DIFF_FILE]
+    for name in names:
+        path = os.path.join(log_dir, name)
+        if os.path.isfile(path):
+            os.remove(path)
+
+
 def _resolve_compiler(env_var: str, fallback: str) -> str:
     """Resolve which compiler CMake would use: env var, then PATH lookup."""
     return os.environ.get(env_var) or shutil.which(fallback) or fallback
@@ -119,11 +366,14 @@ def configure_cmake(source_dir: str, build_dir: str, extra_flags: list[str]) ->
     subprocess.run(cmd, check=True)
 
 
-def build_project(build_dir: str, targets: list[str]) -> None:
+def build_project(build_dir: str, targets: list[str], jobs: int | None = None) -> None:
     """Build specific project targets. Does nothing if targets is empty."""
     if not targets:
         return
-    subprocess.run(["ninja", "-C", build_dir] + targets, check=True)
+    cmd = ["ninja", "-C", build_dir]
+    if jobs:
+        cmd += ["-j", str(jobs)]
+    subprocess.run(cmd + targets, check=True)
 
 
 def run_clang_tidy(
@@ -138,6 +388,7 @@ def run_clang_tidy(
     tidy_config: str | None,
     skip_headers: bool = False,
     profile: bool = False,
+    jobs: int | None = None,
 ) -> None:
     """Run run-clang-tidy.py and save output to log file."""
     cmd = [
@@ -147,11 +398,14 @@ def run_clang_tidy(
         "-clang-tidy-binary",
         clang_tidy_bin,
         "-p",
-        build_dir,
+        compile_db_dir(build_dir),
         f"-checks=-*,{check_name}",
         "-quiet",
     ]
 
+    if jobs:
+        cmd += ["-j", str(jobs)]
+
     if skip_headers:
         cmd.append("-header-filter=")
 
@@ -162,150 +416,2286 @@ def run_clang_tidy(
         cmd.append(f"-config={tidy_config}")
 
     if file_regex:
-        full_regex = f"^{re.escape(source_dir)}/{file_regex}"
-        cmd.append(full_regex)
+        cmd.append(_file_pattern(source_dir, file_regex))
 
-    with open(log_file, "w") as log, open(progress_file, "a") as progress:
-        proc = subprocess.Popen(
-            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
-        )
+    with open(log_file, "wb") as log, open(progress_file, "ab") as progress:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
         assert proc.stdout is not None
-        for line in proc.stdout:
-            if _PROGRESS_RE.match(line):
-                print(line, end="")
-                progress.write(line)
-            else:
-                log.write(line)
+        _pump_output(proc.stdout.fileno(), log, progress)
         proc.wait()
 
 
-def configure_project(
-    project: Project,
-    config: AnalysisConfig,
-    source_dir: str,
-) -> None:
-    """Configure and build a single project."""
-    source_dir = os.path.abspath(source_dir)
-    build_dir = os.path.join(source_dir, "build")
+def _line_starts(data: bytes, prefix: bytes, end: int) -> Iterator[int]:
+    """The offsets of the lines in data[:end] that start with prefix."""
+    if data.startswith(prefix):
+        yield 0
+    pos = data.find(b"\n" + prefix, 0, end)
+    while pos >= 0:
+        yield pos + 1
+        pos = data.find(b"\n" + prefix, pos + 1, end)
 
-    cmake_source = source_dir
-    if config.cmake_source_subdir:
-        cmake_source = os.path.join(source_dir, config.cmake_source_subdir)
 
-    print(f"[{project.name}] Configuring...")
-    remove_clang_tidy_configs(source_dir)
-    configure_cmake(cmake_source, build_dir, config.cmake_flags)
-    build_project(build_dir, config.build_targets)
-    print(f"[{project.name}] Done.")
+def _split_progress(data: bytes, end: int, log: BinaryIO, progress: BinaryIO) -> None:
+    """Write the lines of data[:end] to log, and its progress lines to progress."""
+    view = memoryview(data)
+    written = 0
+    starts = heapq.merge(*(_line_starts(data, p, end) for p in _PROGRESS_PREFIXES))
+    for start in starts:
+        stop = data.find(b"\n", start, end) + 1 or end
+        if not _PROGRESS_RE.match(data, start, stop):
+            continue
+        log.write(view[written:start])
+        progress.write(view[start:stop])
+        print(data[start:stop].decode(errors="replace"), end="")
+        written = stop
+    log.write(view[written:end])
 
 
-def configure(
-    work_dir: str = PROJECTS_DIR,
-    config_path: str = CONFIG_FILE,
-) -> None:
-    """Configure all projects (cmake + build targets)."""
-    check_clang_compiler()
-    projects = load_projects(config_path)
-    configs = get_analysis_configs(config_path)
+def _pump_output(fd: int, log: BinaryIO, progress: BinaryIO) -> None:
+    """Copy run-clang-tidy output from fd to log, diverting progress lines.
 
-    for project in projects:
-        config = configs.get(project.name, AnalysisConfig(name=project.name))
-        source_dir = os.path.join(work_dir, project.name)
-        configure_project(project, config, source_dir)
+    The output can be hundreds of MB, so it is read in large chunks and
+    everything between two progress lines is written as one slice; only
+    lines that start like a progress line are matched against the regex.
+    """
+    pending = b""
+    while chunk := os.read(fd, _PUMP_CHUNK_BYTES):
+        data = pending + chunk if pending else chunk
+        end = data.rfind(b"\n") + 1
+        _split_progress(data, end, log, progress)
+        pending = data[end:]
+    if pending:
+        _split_progress(pending, len(pending), log, progress)
 
 
-def analyze_project(
-    project: Project,
-    config: AnalysisConfig,
+def _file_pattern(source_dir: str, file_regex: str) -> str:
+    """Anchor a project-relative file regex at the project's source directory."""
+    return f"^{re.escape(source_dir)}/{file_regex}"
+
+
+def load_compile_commands(build_dir: str) -> list[dict[str, Any]]:
+    """Load the compile_commands.json exported by configure_cmake()."""
+    with open(os.path.join(build_dir, "compile_commands.json")) as f:
+        entries: list[dict[str, Any]] = json.load(f)
+    return entries
+
+
+@dataclass
+class CompileDbPlan:
+    """How a project's compile DB is turned into the one analyze uses."""
+
+    file_regex: str | None = None
+    rules: RewriteRules = field(default_factory=RewriteRules)
+
+
+@dataclass
+class TuManifest:
+    """The TUs planned for a project, cached next to its build dir.
+
+    key identifies the compile DB and plan the manifest was made from;
+    duplicates counts the entries collapsed into another one of the same
+    file, and dropped the flags each rewrite rule removed.
+    """
+
+    key: dict[str, Any]
+    files: list[str]
+    entries: int
+    duplicates: int = 0
+    dropped: dict[str, int] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        summary = (
+            f"Planned {len(self.files)} TUs from {self.entries} compile DB entries"
+        )
+        if self.duplicates:
+            summary += f", collapsed {self.duplicates} duplicates"
+        if self.dropped:
+            rules = ", ".join(
+                f"{rule}: {n}" for rule, n in Counter(self.dropped).most_common()
+            )
+            summary += f", dropped {sum(self.dropped.values())} flags ({rules})"
+        return summary
+
+
+def _manifest_path(build_dir: str) -> str:
+    return os.path.join(build_dir, REWRITTEN_DB_DIR, _MANIFEST_FILE)
+
+
+def _manifest_key(build_dir: str, plan: CompileDbPlan) -> dict[str, Any]:
+    stat = os.stat(os.path.join(build_dir, "compile_commands.json"))
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, **asdict(plan)}
+
+
+def load_manifest(build_dir: str) -> TuManifest | None:
+    """Return build_dir's TU manifest, None if missing or out of date."""
+    try:
+        with open(_manifest_path(build_dir)) as f:
+            manifest = TuManifest(**json.load(f))
+        stat = os.stat(os.path.join(build_dir, "compile_commands.json"))
+    except (OSError, ValueError, TypeError):
+        return None
+    key = manifest.key
+    if (key.get("mtime_ns"), key.get("size")) != (stat.st_mtime_ns, stat.st_size):
+        return None
+    if compile_db_dir(build_dir) == build_dir:
+        return None
+    return manifest
+
+
+def plan_compile_db(
+    build_dir: str, source_dir: str, plan: CompileDbPlan
+) -> tuple[TuManifest, bool]:
+    """Write the compile DB analyze uses and the manifest of its TUs.
+
+    The compile DB keeps one entry per file selected by the plan's
+    file_regex, the first one, since clang-tidy analyzes a file once for
+    every entry it has, with its command rewritten by the plan's rules.
+    The result is reused as long as the compile DB and plan are unchanged;
+    returns the manifest and whether it was reused.
+    """
+    key = _manifest_key(build_dir, plan)
+    manifest = load_manifest(build_dir)
+    if manifest is not None and manifest.key == key:
+        return manifest, True
+
+    entries = load_compile_commands(build_dir)
+    pattern = (
+        re.compile(_file_pattern(source_dir, plan.file_regex))
+        if plan.file_regex
+        else None
+    )
+    selected: dict[str, dict[str, Any]] = {}
+    duplicates = 0
+    for entry in entries:
+        path = os.path.normpath(os.path.join(entry["directory"], entry["file"]))
+        if pattern is not None and not pattern.search(path):
+            continue
+        if path in selected:
+            duplicates += 1
+        else:
+            selected[path] = entry
+
+    files = sorted(selected)
+    rewritten, dropped = rewrite_entries([selected[f] for f in files], plan.rules)
+    write_compile_db(build_dir, rewritten)
+    manifest = TuManifest(key, files, len(entries), duplicates, dict(dropped))
+    path = _manifest_path(build_dir)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(asdict(manifest), f)
+    os.replace(tmp, path)
+    return manifest, False
+
+
+def collect_translation_units(
+    project_name: str,
+    build_dir: str,
     source_dir: str,
+    file_regex: str | None,
+) -> tuple[list[TranslationUnit], int]:
+    """Return the TUs selected by file_regex and the compile DB entry count.
+
+    The TUs come from the project's manifest when plan_compile_db() made
+    one for the same file_regex. Otherwise they are collected like
+    run-clang-tidy does: paths are made absolute, each file is analyzed
+    once and the regex is searched against the absolute path.
+    """
+    manifest = load_manifest(build_dir)
+    if manifest is not None and manifest.key["file_regex"] == file_regex:
+        files, total = manifest.files, manifest.entries
+    else:
+        entries = load_compile_commands(build_dir)
+        pattern = (
+            re.compile(_file_pattern(source_dir, file_regex)) if file_regex else None
+        )
+        paths = (
+            os.path.normpath(os.path.join(entry["directory"], entry["file"]))
+            for entry in entries
+        )
+        files = sorted({p for p in paths if pattern is None or pattern.search(p)})
+        total = len(entries)
+
+    units = [
+        TranslationUnit(project_name, path, build_dir, source_dir) for path in files
+    ]
+    return units, total
+
+
+def clang_tidy_command(
     clang_tidy_bin: str,
-    run_tidy_script: str,
+    build_dir: str,
     check_name: str,
-    log_dir: str,
-    progress_file: str,
-    tidy_config: str | None = None,
+    tidy_config: str | None,
     skip_headers: bool = False,
-    profile: bool = False,
-) -> None:
-    """Run clang-tidy analysis on a single project."""
-    source_dir = os.path.abspath(source_dir)
-    build_dir = os.path.join(source_dir, "build")
-    log_file = os.path.join(log_dir, f"{project.name}.log")
+    profile_dir: str | None = None,
+) -> list[str]:
+    """Build the clang-tidy invocation shared by every TU of a project."""
+    cmd = [
+        clang_tidy_bin,
+        f"-p={compile_db_dir(build_dir)}",
+        f"-checks=-*,{check_name}",
+        "-quiet",
+    ]
 
-    print(f"[{project.name}] Starting analysis for check: {check_name}")
+    if skip_headers:
+        cmd.append("-header-filter=")
 
-    run_clang_tidy(
-        clang_tidy_bin,
-        run_tidy_script,
-        build_dir,
-        check_name,
-        source_dir,
-        config.file_regex,
-        log_file,
-        progress_file,
-        tidy_config,
-        skip_headers,
-        profile,
+    if profile_dir:
+        cmd += ["-enable-check-profile", f"-store-check-profile={profile_dir}"]
+
+    if tidy_config:
+        cmd.append(f"-config={tidy_config}")
+
+    return cmd
+
+
+def _watch(pid: int, start: float, limits: TuLimits) -> str | None:
+    """Wait for pid to exit, killing it when it exceeds a limit.
+
+    Returns "TIMEOUT" or "OOM" for a killed process, None otherwise. The
+    process is left unreaped so the caller still gets its rusage.
+    """
+    delay = 0.01
+    while os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None:
+        exceeded = None
+        if limits.timeout and time.monotonic() - start > limits.timeout:
+            exceeded = "TIMEOUT"
+        elif limits.memory_mb and (read_rss_kb(pid) or 0) > limits.memory_mb * 1024:
+            exceeded = "OOM"
+        if exceeded is not None:
+            os.kill(pid, signal.SIGKILL)
+            return exceeded
+        time.sleep(delay)
+        delay = min(delay * 2, _WATCHDOG_POLL_SECONDS)
+    return None
+
+
+def _run_process(
+    invocation: list[str],
+    on_start: Callable[[int], None] | None,
+    limits: TuLimits | None = None,
+) -> tuple[int, str, float, resource.struct_rusage, str | None]:
+    """Run clang-tidy and return (returncode, output, elapsed, rusage, limit).
+
+    The process is reaped with wait4() to get its exact peak RSS, CPU time
+    and block reads. on_start receives the pid so the scheduler can sample
+    the process while it runs. With limits, a process that exceeds one is
+    killed and the name of the limit ("TIMEOUT" or "OOM") is returned. A
+    process that finished but went over a limit between two samples is
+    reported the same way, so whether a TU hits a limit does not depend on
+    sampling luck.
+    """
+    start = time.monotonic()
+    with subprocess.Popen(
+        invocation,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+    ) as proc:
+        if on_start is not None:
+            on_start(proc.pid)
+        stdout = proc.stdout
+        assert stdout is not None
+        exceeded = None
+        if limits is not None and (limits.timeout or limits.memory_mb):
+            chunks: list[str] = []
+            reader = threading.Thread(
+                target=lambda: chunks.append(stdout.read()), daemon=True
+            )
+            reader.start()
+            exceeded = _watch(proc.pid, start, limits)
+            _, status, usage = os.wait4(proc.pid, 0)
+            reader.join()
+            output = "".join(chunks)
+        else:
+            output = stdout.read()
+            _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+    elapsed = time.monotonic() - start
+    if limits is not None and exceeded is None:
+        if limits.timeout and elapsed > limits.timeout:
+            exceeded = "TIMEOUT"
+        elif limits.memory_mb and usage.ru_maxrss > limits.memory_mb * 1024:
+            exceeded = "OOM"
+    return proc.returncode, output, elapsed, usage, exceeded
+
+
+def run_translation_unit(
+    command: list[str],
+    unit: TranslationUnit,
+    on_start: Callable[[int], None] | None = None,
+    limits: TuLimits | None = None,
+) -> TidyResult:
+    """Run clang-tidy on one TU and capture its combined output.
+
+    When the TU exceeds one of the limits, its partial output is replaced
+    by a single CTIT TIMEOUT or CTIT OOM event line.
+    """
+    invocation = command + [unit.file]
+    started = time.time()
+    returncode, output, elapsed, usage, exceeded = _run_process(
+        invocation, on_start, limits
+    )
+    if exceeded is not None:
+        assert limits is not None
+        output = limits.event(exceeded, unit, command)
+    return TidyResult(
+        unit=unit,
+        invocation=invocation,
+        returncode=returncode,
+        output=output,
+        elapsed=elapsed,
+        peak_rss_kb=usage.ru_maxrss,
+        read_blocks=usage.ru_inblock,
+        limit_exceeded=exceeded,
+        started=started,
+        cpu=usage.ru_utime + usage.ru_stime,
     )
 
-    print(f"[{project.name}] Finished. Log saved to {log_file}")
 
+def split_batch_output(output: str, files: list[str]) -> dict[str, str]:
+    """Attribute the output of one clang-tidy run over several files to each file.
 
-def analyze(
-    check_name: str,
-    tidy_config: str | None = None,
-    work_dir: str = PROJECTS_DIR,
-    clang_tidy_bin: str = DEFAULT_CLANG_TIDY_BIN,
-    run_tidy_script: str | None = None,
-    log_dir: str = DEFAULT_LOG_DIR,
-    config_path: str = CONFIG_FILE,
-    skip_headers: bool = False,
-    profile: bool = False,
-) -> None:
-    """Run clang-tidy analysis on all configured projects."""
-    if not shutil.which(clang_tidy_bin) and not os.path.isfile(clang_tidy_bin):
-        print(
-            f"Error: clang-tidy binary not found: {clang_tidy_bin}",
-            file=sys.stderr,
+    A diagnostic and its notes and snippets belong to the file it points
+    at. Diagnostics in headers (which clang-tidy reports once per batch) and
+    any other output go to the file of the preceding diagnostic, or to the
+    first file of the batch.
+    """
+    chunks: dict[str, list[str]] = {f: [] for f in files}
+    current = files[0]
+    for line in output.splitlines(keepends=True):
+        m = _DIAGNOSTIC_RE.match(line)
+        if m and m.group(2) != "note":
+            path = os.path.normpath(m.group(1))
+            current = path if path in chunks else files[0]
+        chunks[current].append(line)
+    return {f: "".join(lines) for f, lines in chunks.items()}
+
+
+def run_batch(
+    command: list[str],
+    units: list[TranslationUnit],
+    on_start: Callable[[int], None] | None = None,
+    limits: TuLimits | None = None,
+) -> list[TidyResult]:
+    """Run one clang-tidy process over several TUs and split its results.
+
+    The batch's wall time, CPU time and block reads are apportioned to its
+    TUs by estimated cost; each TU reports the batch's peak RSS. The limits
+    apply to the whole batch.
+    """
+    if len(units) == 1:
+        return [run_translation_unit(command, units[0], on_start, limits)]
+
+    files = [u.file for u in units]
+    started = time.time()
+    returncode, output, elapsed, usage, exceeded = _run_process(
+        command + files, on_start, limits
+    )
+    outputs = split_batch_output(output, files)
+    total_cost = sum(u.cost for u in units)
+    shares = [u.cost / total_cost if total_cost else 1 / len(units) for u in units]
+    return [
+        TidyResult(
+            unit=unit,
+            invocation=command + [unit.file],
+            returncode=returncode,
+            output=outputs[unit.file],
+            elapsed=elapsed * share,
+            peak_rss_kb=usage.ru_maxrss,
+            read_blocks=round(usage.ru_inblock * share),
+            batch_size=len(units),
+            limit_exceeded=exceeded,
+            started=started,
+            cpu=(usage.ru_utime + usage.ru_stime) * share,
         )
-        sys.exit(1)
+        for unit, share in zip(units, shares, strict=True)
+    ]
 
-    if run_tidy_script is None:
-        run_tidy_script = find_run_tidy_script()
-        if run_tidy_script is None:
-            print(
-                "Error: run-clang-tidy script not found in PATH.\n"
-                "Install it or use '--run-tidy-script' flag.",
-                file=sys.stderr,
+
+def aggregate_profiles(profile_dir: str) -> dict[str, dict[str, float]]:
+    """Sum -store-check-profile JSON files into {check: {wall, user, sys}}.
+
+    A TU profiled twice, because a resumed run analyzed it again, counts
+    once.
+    """
+    profiles: dict[str, dict[str, float]] = {}
+    for path in sorted(glob.glob(os.path.join(profile_dir, "*.json"))):
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not read profile {path}: {e}", file=sys.stderr)
+            continue
+        profiles[data.get("file", path)] = data.get("profile", {})
+
+    checks: dict[str, dict[str, float]] = {}
+    for profile in profiles.values():
+        for key, value in profile.items():
+            parts = key.split(".")
+            if len(parts) < 4 or parts[:2] != ["time", "clang-tidy"]:
+                continue
+            check = ".".join(parts[2:-1])
+            timers = checks.setdefault(check, {"wall": 0.0, "user": 0.0, "sys": 0.0})
+            timers[parts[-1]] = timers.get(parts[-1], 0.0) + value
+    return checks
+
+
+def write_profile_table(f: TextIO, checks: dict[str, dict[str, float]]) -> None:
+    """Write the aggregated profile in run-clang-tidy's table format."""
+    if not checks:
+        return
+
+    total_user = sum(t["user"] for t in checks.values())
+    total_sys = sum(t["sys"] for t in checks.values())
+    total_wall = sum(t["wall"] for t in checks.values())
+
+    def cell(value: float, total: float) -> str:
+        pct = value / total * 100 if total > 0 else 0.0
+        return f"{value:10.4f} ({pct:5.1f}%)"
+
+    def row(user: float, sys_: float, wall: float, name: str) -> str:
+        return (
+            f"{cell(user, total_user)}   {cell(sys_, total_sys)}   "
+            f"{cell(user + sys_, total_user + total_sys)}   "
+            f"{cell(wall, total_wall)}   {name}\n"
+        )
+
+    f.write("===" + "-" * 73 + "===\n")
+    f.write("                          clang-tidy checks profiling\n")
+    f.write("===" + "-" * 73 + "===\n")
+    f.write(
+        f"  Total Execution Time: {total_user + total_sys:.4f} seconds "
+        f"({total_wall:.4f} wall clock)\n\n"
+    )
+    f.write(
+        "     ---User Time---        --System Time--        "
+        "--User+System--        ---Wall Time---     --- Name ---\n"
+    )
+    ordered = sorted(checks.items(), key=lambda x: -(x[1]["user"] + x[1]["sys"]))
+    f.writelines(row(t["user"], t["sys"], t["wall"], name) for name, t in ordered)
+    f.write(row(total_user, total_sys, total_wall, "Total"))
+
+
+@dataclass
+class ProjectWork:
+    """A project's TUs together with the clang-tidy command and log they use."""
+
+    name: str
+    units: list[TranslationUnit]
+    command: list[str]
+    log: TextIO
+    total_entries: int = 0
+    profile_dir: str | None = None
+    commit: str = ""
+    outputs: dict[str, str] = field(default_factory=dict)
+    stopped_early: str | None = None
+    compiler: str = ""
+    parse_failures: dict[str, str] = field(default_factory=dict)
+    untriggered: int = 0
+
+    def pending_units(self) -> list[TranslationUnit]:
+        return [u for u in self.units if u.file not in self.outputs]
+
+    def finish(self) -> None:
+        """Write the TU outputs in file order, then the check profile.
+
+        The order does not depend on scheduling, so a resumed run writes
+        the same log as an uninterrupted one. TUs known to fail to parse,
+        a run stopped early and TUs skipped by the identifier prefilter are
+        recorded in "CTIT PARSE-FAILURE:", "CTIT FLOOD:" and "CTIT
+        PREFILTER:" lines that generate_report.py picks up.
+        """
+        for unit in self.units:
+            self.log.write(self.outputs.get(unit.file, ""))
+        analyzed = {unit.file for unit in self.units}
+        for file, error in sorted(self.parse_failures.items()):
+            state = "analyzed anyway" if file in analyzed else "skipped"
+            self.log.write(f"CTIT PARSE-FAILURE: {file} ({state}): {error}\n")
+        if self.stopped_early:
+            skipped = len(self.pending_units())
+            self.log.write(
+                f"CTIT FLOOD: {self.stopped_early}; {skipped} of "
+                f"{len(self.units)} TUs were not analyzed\n"
             )
-            sys.exit(1)
-    elif not os.path.isfile(run_tidy_script) and not shutil.which(run_tidy_script):
+        if self.untriggered:
+            self.log.write(
+                f"CTIT PREFILTER: skipped {self.untriggered} of "
+                f"{len(self.units) + self.untriggered} TUs containing none of "
+                "the checks' trigger identifiers\n"
+            )
+        if self.profile_dir:
+            write_profile_table(self.log, aggregate_profiles(self.profile_dir))
+        self.log.flush()
+
+
+def file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+@dataclass
+class SchedulerOptions:
+    """How the built-in engine schedules TUs."""
+
+    jobs: int = field(default_factory=lambda: detect_limits().cpus)
+    history: TuHistory | None = None
+    memory_budget_mb: int | None = None
+    batch_size: int = 1
+    limits: TuLimits = field(default_factory=TuLimits)
+    journal: Journal | None = None
+    selected_files: set[tuple[str, str]] | None = None
+    untriggered: set[tuple[str, str]] | None = None
+    order: str = "lpt"
+    max_diagnostics: int | None = None
+    parse_failures: ParseFailures | None = None
+    analyze_parse_failures: bool = False
+    results: ResultLog | None = None
+    result_cache: ResultCache | None = None
+    check_reuse: CheckReuse | None = None
+    baseline: str | None = None
+    diffs: ResultLog | None = None
+
+
+def order_by_history(work: list[ProjectWork], history: TuHistory) -> None:
+    """Estimate each TU's cost and peak RSS from past runs.
+
+    The cost drives longest-first scheduling, the peak RSS drives memory
+    admission control.
+    """
+    units = [(w, u) for w in work for u in w.units]
+    items = [(u.project, w.commit, u.key, file_size(u.file)) for w, u in units]
+    estimates, known = estimate_walls(history, items)
+    peaks = estimate_peak_rss(history, items)
+    for (_w, unit), cost, peak in zip(units, estimates, peaks, strict=True):
+        unit.cost = cost
+        unit.peak_rss = peak
+    print(f"Ordering {len(units)} TUs longest-first ({known} with recorded durations)")
+
+
+def _format_rss(kb: float) -> str:
+    return f"{kb / 1024:.0f} MB"
+
+
+def form_batches(
+    units: list[TranslationUnit], batch_size: int, target_cost: float
+) -> list[list[TranslationUnit]]:
+    """Group cheap TUs so they share one clang-tidy process.
+
+    TUs costing at least target_cost or running their own checks run
+    alone; the others are packed, in order of decreasing cost, into batches
+    of at most batch_size files whose estimated cost stays within
+    target_cost.
+    """
+    batches: list[list[TranslationUnit]] = []
+    current: list[TranslationUnit] = []
+    current_cost = 0.0
+    for unit in sorted(units, key=lambda u: -u.cost):
+        if batch_size <= 1 or unit.cost >= target_cost or unit.checks is not None:
+            batches.append([unit])
+            continue
+        if current and (
+            len(current) >= batch_size or current_cost + unit.cost > target_cost
+        ):
+            batches.append(current)
+            current, current_cost = [], 0.0
+        current.append(unit)
+        current_cost += unit.cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def form_chains(
+    work: list[ProjectWork], options: SchedulerOptions, target_cost: float
+) -> list[tuple[ProjectWork, list[list[TranslationUnit]]]]:
+    """Split the pending TUs into chains of batches that run on one worker.
+
+    In LPT order every batch is a chain of its own. In locality order the
+    chains follow locality_chains() over the include sets from each
+    project's compilation database and its include index, which is built
+    first if it is missing or out of date.
+    """
+    chains: list[tuple[ProjectWork, list[list[TranslationUnit]]]] = []
+    for w in work:
+        units = w.pending_units()
+        if options.order != "locality":
+            batches = form_batches(units, options.batch_size, target_cost)
+            chains += [(w, [batch]) for batch in batches]
+            continue
+        if not units:
+            continue
+        build_dir = units[0].build_dir
+        entries = load_compile_commands(compile_db_dir(build_dir))
+        index, _reused = build_include_index(build_dir, w.commit, options.jobs)
+        signatures = include_signatures(entries, index.headers_by_file())
+        items = [(u.file, u.cost, signatures.get(u.file, frozenset())) for u in units]
+        groups = locality_chains(items, target_cost)
+        chains += [
+            (
+                w,
+                form_batches(
+                    [units[i] for i in group], options.batch_size, target_cost
+                ),
+            )
+            for group in groups
+        ]
+        print(f"[{w.name}] Grouped {len(units)} TUs into {len(groups)} locality chains")
+    return chains
+
+
+def _run_batch_or_singly(
+    w: ProjectWork,
+    command: list[str],
+    batch: list[TranslationUnit],
+    on_start: Callable[[int], None] | None,
+    limits: TuLimits,
+) -> list[TidyResult]:
+    """Run a batch, and its TUs one at a time if the batch crashed."""
+    results = run_batch(command, batch, on_start, limits)
+    if len(results) > 1 and any(r.crashed or r.limit_exceeded for r in results):
         print(
-            f"Error: run-clang-tidy script not found: {run_tidy_script}",
-            file=sys.stderr,
+            f"[{w.name}] {command[0]} crashed or hit a per-TU limit on a "
+            f"batch of {len(results)} files; retrying them one at a time"
         )
-        sys.exit(1)
+        results = [
+            result
+            for unit in batch
+            for result in run_batch(command, [unit], on_start, limits)
+        ]
+    return results
 
-    projects = load_projects(config_path)
-    configs = get_analysis_configs(config_path)
-    os.makedirs(log_dir, exist_ok=True)
 
-    progress_file = os.path.join(log_dir, "progress.log")
-    open(progress_file, "w").close()
+def _baseline_command(baseline: str, command: list[str]) -> list[str]:
+    """command run with the baseline binary, without storing check profiles.
 
-    for project in projects:
-        config = configs.get(project.name, AnalysisConfig(name=project.name))
-        source_dir = os.path.join(work_dir, project.name)
-        analyze_project(
-            project,
-            config,
-            source_dir,
-            clang_tidy_bin,
-            run_tidy_script,
-            check_name,
-            log_dir,
-            progress_file,
-            tidy_config,
-            skip_headers,
-            profile,
-        )
+    The profiles of both binaries would go to the same directory, and the
+    baseline's would replace those of the binary under test.
+    """
+    return [
+        baseline,
+        *(
+            a
+            for a in command[1:]
+            if a != "-enable-check-profile"
+            and not a.startswith("-store-check-profile=")
+        ),
+    ]
+
+
+def _run_chain(
+    tracker: "WorkTracker",
+    w: ProjectWork,
+    chain: list[list[TranslationUnit]],
+    on_start: Callable[[int], None] | None,
+    limits: TuLimits,
+    baseline: str | None = None,
+) -> None:
+    """Run a chain's batches back-to-back and record their results.
+
+    Batches of a project that stopped early are skipped, and TUs the result
+    cache holds are replayed. A TU with checks of its own runs only those. With a baseline clang-tidy binary, each
+    batch is run again with it right away, while its files are still in
+    the page cache, without profiling.
+    """
+    for batch in chain:
+        if tracker.flooded(w):
+            tracker.skip(w, batch)
+            continue
+        batch = tracker.take_cached(w, batch)
+        if not batch:
+            continue
+        command = w.command
+        if batch[0].checks is not None:
+            command = [
+                f"-checks=-*,{batch[0].checks}" if a.startswith("-checks=") else a
+                for a in command
+            ]
+        results = _run_batch_or_singly(w, command, batch, on_start, limits)
+        baselines: list[TidyResult | None] = [None] * len(results)
+        if baseline is not None:
+            baselines = list(
+                _run_batch_or_singly(
+                    w, _baseline_command(baseline, command), batch, on_start, limits
+                )
+            )
+        for result, base in zip(results, baselines, strict=True):
+            tracker.record(w, result, base)
+
+
+class WorkTracker:
+    """Bookkeeping of one run over the TUs of several projects.
+
+    Selects the TUs to analyze, estimates their cost, and for every finished
+    TU writes the progress line, its journal, history and result records
+    and, once a project's last TU is done, the project log. Shared by the
+    local worker pool and the coordinator; record() may be called from
+    several threads.
+    """
+
+    def __init__(
+        self,
+        work: list[ProjectWork],
+        progress: TextIO,
+        options: SchedulerOptions,
+        runners: str,
+    ) -> None:
+        self.work = work
+        self.progress = progress
+        self.journal = options.journal
+        self.history = options.history
+        self.max_diagnostics = options.max_diagnostics
+        self._lock = threading.Lock()
+        self._diagnostics: dict[str, Counter[str]] = {w.name: Counter() for w in work}
+        self.parse_failures = options.parse_failures
+        self.results = options.results
+        self.diffs = options.diffs
+        self.result_cache = options.result_cache
+        self._cache_keys: dict[str, str] = {}
+        self.check_reuse = options.check_reuse
+        self._closures: dict[str, str] = {}
+        self._reused: dict[str, dict[str, str]] = {}
+        self._expected: dict[str, str] = {}
+        self._replayed = 0
+        self.mismatches: list[tuple[str, str]] = []
+        self._entries: dict[str, dict[str, dict[str, Any]]] = {}
+        self._parse_suspects: list[tuple[ProjectWork, TranslationUnit]] = []
+
+        if options.selected_files is not None:
+            selected = options.selected_files
+            for w in work:
+                w.units = [u for u in w.units if (w.name, u.key) in selected]
+
+        if options.untriggered:
+            untriggered = options.untriggered
+            for w in work:
+                units = [u for u in w.units if (w.name, u.key) not in untriggered]
+                w.untriggered = len(w.units) - len(units)
+                w.units = units
+
+        if self.parse_failures is not None:
+            self._known_parse_failures(work, options.analyze_parse_failures)
+
+        if self.journal is not None:
+            for w in work:
+                for unit in w.units:
+                    entry = self.journal.completed(w.name, w.commit, unit.file)
+                    if entry is not None:
+                        w.outputs[unit.file] = entry["output"]
+                        self._count_diagnostics(w, entry["output"])
+
+        if self.check_reuse is not None:
+            self._reuse_checks(work)
+
+        order_by_history(work, self.history or TuHistory(""))
+        for w in work:
+            for unit in w.units:
+                if unit.file in w.parse_failures:
+                    unit.cost = 0.0
+
+        self.total = sum(len(w.pending_units()) for w in work)
+        self.done = 0
+        self.read_blocks = 0
+        self._iowait_start = read_iowait_seconds()
+        entries = sum(w.total_entries for w in work)
+        databases = (
+            "compilation database" if len(work) == 1 else "compilation databases"
+        )
+        header = (
+            f"Running clang-tidy {runners} for {self.total} files "
+            f"out of {entries} in {databases} ...\n"
+        )
+        print(header, end="")
+        progress.write(header)
+
+        self._pending = {w.name: len(w.pending_units()) for w in work}
+        for w in work:
+            if not self._pending[w.name]:
+                self._finish(w)
+
+    def _finish(self, w: ProjectWork) -> None:
+        w.finish()
+        if self.history is not None:
+            self.history.save()
+        if len(self.work) > 1:
+            print(f"[{w.name}] Finished. Log saved to {w.log.name}")
+
+    def _compile_entries(self, w: ProjectWork) -> dict[str, dict[str, Any]]:
+        """The compile DB entries of w's TUs, by absolute file path."""
+        if w.name not in self._entries:
+            self._entries[w.name] = {
+                os.path.normpath(os.path.join(e["directory"], e["file"])): e
+                for e in load_compile_commands(compile_db_dir(w.units[0].build_dir))
+            }
+        return self._entries[w.name]
+
+    def _replay(
+        self, w: ProjectWork, unit: TranslationUnit, output: str, elapsed: float
+    ) -> None:
+        """Take a TU's output from a store instead of analyzing it.
+
+        The TU is journaled with the duration it was stored with and gets a
+        result record like an analyzed one, taking no time in this run. The
+        history is left alone, since that duration says nothing about this
+        run.
+        """
+        w.outputs[unit.file] = output
+        self._count_diagnostics(w, output)
+        if self.journal is not None:
+            self.journal.record(
+                w.name, w.commit, unit.file, output=output, elapsed=elapsed
+            )
+        if self.results is not None:
+            result = TidyResult(
+                unit, [*w.command, unit.file], 0, output, 0.0, started=time.time()
+            )
+            self.results.record(**result.record(w.commit))
+
+    def take_cached(
+        self, w: ProjectWork, units: list[TranslationUnit]
+    ) -> list[TranslationUnit]:
+        """Replay the TUs of units whose output the result cache holds.
+
+        Called by the worker about to run units, so the compiler runs that
+        find the headers of a TU for its key are spread over the pool
+        instead of delaying the start of the run. Returns the TUs that still
+        need to run.
+        """
+        if self.result_cache is None:
+            return units
+        with self._lock:
+            entries = self._compile_entries(w)
+        remaining = []
+        for unit in units:
+            entry = entries.get(unit.file)
+            key = self.result_cache.key(entry) if entry else None
+            if key is None:
+                remaining.append(unit)
+                continue
+            with self._lock:
+                self._cache_keys[unit.file] = key
+                stored = self.result_cache.get(key)
+                if stored is None:
+                    remaining.append(unit)
+                    continue
+                self.done += 1
+                line = (
+                    f"[{self.done:>{len(str(self.total))}}/{self.total}]"
+                    f"[cached] {unit.file}\n"
+                )
+                print(line, end="")
+                self.progress.write(line)
+                self._replay(w, unit, stored["output"], stored["elapsed"])
+                self._pending[w.name] -= 1
+                if self._pending[w.name] == 0:
+                    self._finish(w)
+        return remaining
+
+    def _reuse_checks(self, work: list[ProjectWork]) -> None:
+        """Reuse the stored outputs of checks whose sources did not change.
+
+        A TU with every check's output stored is replayed like one from the
+        result cache; one with some of them runs only the other checks.
+        In a full run every TU runs every check, and the outputs it would
+        have reused are kept to compare with the fresh ones.
+        """
+        reuse = self.check_reuse
+        assert reuse is not None
+        partial = rerun = 0
+        for w in work:
+            if not w.units:
+                continue
+            entries = self._compile_entries(w)
+            for unit in w.pending_units():
+                entry = entries.get(unit.file)
+                closure = reuse.cache.closure_key(entry) if entry else None
+                if closure is None:
+                    continue
+                self._closures[unit.file] = closure
+                parts, missing = reuse.lookup(closure)
+                if reuse.full:
+                    if parts and not missing:
+                        self._expected[unit.file] = join_checks(parts)
+                elif parts and not missing:
+                    self._replay(w, unit, join_checks(parts), 0.0)
+                    self._replayed += 1
+                elif parts:
+                    unit.checks = ",".join(missing)
+                    self._reused[unit.file] = parts
+                    partial += 1
+                    rerun += len(missing)
+        if reuse.full:
+            print(
+                f"Full run: analyzing every check to verify the stored outputs "
+                f"of {len(self._expected)} TUs"
+            )
+            return
+        print(
+            f"Reusing the outputs of unchanged checks: replaying {self._replayed} "
+            f"TUs, re-running {rerun} checks on {partial} TUs"
+        )
+
+    def reuse_summary(self) -> None:
+        """Report how a full run's outputs compared with the reused ones."""
+        if self.check_reuse is None or not self.check_reuse.full:
+            return
+        if not self.mismatches:
+            print(f"Full run: the stored outputs of {len(self._expected)} TUs match")
+            return
+        print(
+            f"Warning: the stored outputs of {len(self.mismatches)} of "
+            f"{len(self._expected)} TUs differ from the full run, so their "
+            "keys miss a dependency:",
+            file=sys.stderr,
+        )
+        for project, key in self.mismatches:
+            print(f"  [{project}] {key}", file=sys.stderr)
+
+    def _known_parse_failures(self, work: list[ProjectWork], analyze: bool) -> None:
+        """Look up the TUs known to fail to parse and skip them unless analyze."""
+        assert self.parse_failures is not None
+        for w in work:
+            if not w.units:
+                continue
+            first = next(iter(self._compile_entries(w).values()), None)
+            w.compiler = compiler_id(entry_compiler(first)) if first else ""
+            known = self.parse_failures.failures(w.name, w.commit, w.compiler)
+            w.parse_failures = {u.file: known[u.key] for u in w.units if u.key in known}
+            if not analyze:
+                w.units = [u for u in w.units if u.file not in w.parse_failures]
+
+        count = sum(len(w.parse_failures) for w in work)
+        if count and analyze:
+            print(f"Analyzing {count} TUs known to fail to parse last")
+        elif count:
+            print(
+                f"Skipping {count} TUs known to fail to parse; pass "
+                "--analyze-parse-failures to analyze them anyway"
+            )
+
+    def check_parse_failures(self, jobs: int, timeout: float | None) -> None:
+        """Parse the new TUs with compiler errors syntax-only and cache failures.
+
+        Only TUs whose analysis output had a clang-diagnostic-error are
+        parsed, so building the cache costs next to nothing on top of the
+        first run at a commit.
+        """
+        if self.parse_failures is None or not self._parse_suspects:
+            return
+        suspects = [
+            (w, unit, self._entries.get(w.name, {}).get(unit.file))
+            for w, unit in self._parse_suspects
+        ]
+        print(f"Parsing {len(suspects)} TUs with compiler errors syntax-only")
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            errors = list(
+                pool.map(
+                    lambda s: parse_error(s[2], timeout) if s[2] else None, suspects
+                )
+            )
+        failed = 0
+        for (w, unit, _entry), error in zip(suspects, errors, strict=True):
+            if error is not None:
+                self.parse_failures.record(
+                    w.name, w.commit, w.compiler, unit.key, error
+                )
+                failed += 1
+        self.parse_failures.save()
+        print(
+            f"{failed} of them fail to parse with any check and are skipped "
+            f"from now on; see {self.parse_failures.path}"
+        )
+
+    def _count_diagnostics(self, w: ProjectWork, output: str) -> None:
+        """Count the output's diagnostics per check; stop w once one floods.
+
+        Compiler diagnostics (clang-diagnostic-*) do not count, since they
+        do not come from the check under test.
+        """
+        counts = self._diagnostics[w.name]
+        counts.update(
+            check
+            for check in _CHECK_DIAGNOSTIC_RE.findall(output)
+            if not check.startswith("clang-diagnostic-")
+        )
+        if not self.max_diagnostics or w.stopped_early or not counts:
+            return
+        check, count = counts.most_common(1)[0]
+        if count > self.max_diagnostics:
+            w.stopped_early = (
+                f"stopped after {count} diagnostics from {check}, over the "
+                f"limit of {self.max_diagnostics}"
+            )
+            print(f"[{w.name}] {w.stopped_early}; not starting its remaining TUs")
+
+    def flooded(self, w: ProjectWork) -> bool:
+        """Whether w stopped early, so its remaining TUs must not start."""
+        return w.stopped_early is not None
+
+    def skip(self, w: ProjectWork, units: list[TranslationUnit]) -> None:
+        """Account for TUs of project w that will not be analyzed."""
+        with self._lock:
+            self._pending[w.name] -= len(units)
+            if self._pending[w.name] == 0:
+                self._finish(w)
+
+    def record(
+        self, w: ProjectWork, result: TidyResult, baseline: TidyResult | None = None
+    ) -> None:
+        """Account for a finished TU of project w.
+
+        With the baseline clang-tidy's result for the TU, the diff of their
+        diagnostics is recorded as well.
+        """
+        with self._lock:
+            self.done += 1
+            notes = []
+            if result.limit_exceeded:
+                notes.append(result.limit_exceeded)
+            if result.batch_size > 1:
+                notes.append(f"batch of {result.batch_size}")
+            notes.append(f"peak RSS {_format_rss(result.peak_rss_kb)}")
+            line = (
+                f"[{self.done:>{len(str(self.total))}}/{self.total}]"
+                f"[{result.elapsed:.1f}s] "
+                f"{' '.join(result.invocation)} ({', '.join(notes)})\n"
+            )
+            print(line, end="")
+            self.progress.write(line)
+            if self.check_reuse is not None:
+                self._merge_reused(w, result)
+            w.outputs[result.unit.file] = result.output
+            self.read_blocks += result.read_blocks
+            self._count_diagnostics(w, result.output)
+            if (
+                self.parse_failures is not None
+                and "[clang-diagnostic-error]" in result.output
+                and result.unit.file not in w.parse_failures
+            ):
+                self._parse_suspects.append((w, result.unit))
+            if self.journal is not None:
+                self.journal.record(
+                    w.name,
+                    w.commit,
+                    result.unit.file,
+                    output=result.output,
+                    elapsed=round(result.elapsed, 3),
+                )
+            if self.results is not None:
+                self.results.record(**result.record(w.commit))
+            if self.diffs is not None and baseline is not None:
+                added, removed, unchanged = diff_diagnostics(
+                    baseline.output, result.output
+                )
+                self.diffs.record(
+                    project=w.name,
+                    commit=w.commit,
+                    file=result.unit.key,
+                    added=added,
+                    removed=removed,
+                    unchanged=unchanged,
+                    wall=round(result.elapsed, 3),
+                    baseline_wall=round(baseline.elapsed, 3),
+                    baseline_crashed=baseline.crashed,
+                    baseline_limit_exceeded=baseline.limit_exceeded,
+                )
+            key = self._cache_keys.get(result.unit.file)
+            if (
+                self.result_cache is not None
+                and key is not None
+                and result.batch_size == 1
+                and not result.crashed
+                and not result.limit_exceeded
+            ):
+                self.result_cache.put(key, result.output, round(result.elapsed, 3))
+            if self.history is not None:
+                # The peak RSS of a batch is that of its largest TU, so only
+                # TUs run on their own update theirs.
+                values = {"wall": round(result.elapsed, 3)}
+                if result.batch_size == 1:
+                    values["rss"] = result.peak_rss_kb
+                self.history.record(w.name, w.commit, result.unit.key, **values)
+
+            self._pending[w.name] -= 1
+            if self._pending[w.name] == 0:
+                self._finish(w)
+
+    def _merge_reused(self, w: ProjectWork, result: TidyResult) -> None:
+        """Store the fresh per-check outputs of a TU and add the reused ones.
+
+        Called with the lock held. The fresh outputs are stored under the
+        same conditions as in the result cache.
+        """
+        reuse = self.check_reuse
+        assert reuse is not None
+        unit = result.unit
+        closure = self._closures.get(unit.file)
+        if (
+            closure is not None
+            and result.batch_size == 1
+            and not result.crashed
+            and not result.limit_exceeded
+        ):
+            checks = unit.checks.split(",") if unit.checks else reuse.checks
+            reuse.store(closure, checks, result.output)
+        reused = self._reused.get(unit.file)
+        if reused is not None:
+            fresh = split_by_check(result.output)
+            result.output = join_checks(
+                {**{c: o for c, o in reused.items() if c != FRONTEND}, **fresh}
+            )
+        expected = self._expected.get(unit.file)
+        if expected is not None and diagnostics(expected) != diagnostics(result.output):
+            self.mismatches.append((w.name, unit.key))
+
+    def summary(self, order: str) -> None:
+        """Print the run's disk reads and I/O wait next to the other order's.
+
+        The block reads are clang-tidy's own; the I/O wait is that of the
+        whole machine, so it is only comparable between runs on an
+        otherwise idle runner. The totals are kept in the history to compare
+        the next run of another order with.
+        """
+        if not self.done:
+            return
+        end = read_iowait_seconds()
+        totals = {
+            "tus": self.done,
+            "read_mb": round(self.read_blocks * _BLOCK_BYTES / (1 << 20), 1),
+        }
+        if end is not None and self._iowait_start is not None:
+            totals["iowait"] = round(end - self._iowait_start, 2)
+
+        def describe(run: dict[str, float]) -> str:
+            text = f"{run['read_mb']:.0f} MB read"
+            if "iowait" in run:
+                per_tu = run["iowait"] / run["tus"] * 1000
+                text += f", {run['iowait']:.1f}s I/O wait ({per_tu:.1f} ms per TU)"
+            return text
+
+        line = f"I/O in {order} order: {describe(totals)}"
+        if self.history is not None:
+            for other in SCHEDULING_ORDERS:
+                last = self.history.last_run(other)
+                if other != order and last is not None:
+                    line += f"; last {other} run: {describe(last)}"
+            self.history.record_run(order, **totals)
+            self.history.save()
+        print(line)
+
+
+def run_work_queue(
+    work: list[ProjectWork],
+    progress: TextIO,
+    options: SchedulerOptions,
+) -> None:
+    """Run the TUs of all given projects from one shared worker pool.
+
+    TUs start in order of decreasing estimated cost (LPT), so the slowest
+    files do not start last and stretch the makespan. With the "locality"
+    order, TUs sharing a directory and headers are instead grouped into
+    chains that each run back-to-back on one worker, longest chain first,
+    so the headers stay in the page cache between them. With batch_size > 1,
+    cheap TUs of a project share one clang-tidy process; a batch that
+    crashes is retried one file at a time. With a memory budget, the next
+    TU only starts once its expected peak RSS fits next to the projected RSS
+    of the running ones. With selected_files, only those (project, file) TUs
+    are analyzed, and never the untriggered ones. With a journal, TUs it
+    already holds are not run again and every finished TU is added to it. A
+    project's log is written as soon as its last TU is done. Once a check
+    emits more than max_diagnostics diagnostics in a project, that
+    project's TUs that have not started yet are skipped and its log records
+    why.
+
+    With a parse failure cache, TUs known to fail to parse are skipped (or
+    run last with analyze_parse_failures), and new TUs with compiler errors
+    are parsed syntax-only at the end to extend the cache. With a result
+    cache, TUs whose output it holds are replayed instead of analyzed, and
+    the outputs of the others are added to it. With a baseline binary,
+    every batch runs with it as well and each TU's diagnostics diff goes
+    to diffs. Finally, the run's disk reads and I/O wait are compared with
+    the last run of the other order.
+    """
+    tracker = WorkTracker(work, progress, options, f"in {options.jobs} threads")
+
+    target_cost = sum(u.cost for w in work for u in w.pending_units()) / (
+        options.jobs * _BATCHES_PER_JOB
+    )
+    queue = sorted(
+        form_chains(work, options, target_cost),
+        key=lambda x: -sum(u.cost for batch in x[1] for u in batch),
+    )
+    if options.batch_size > 1:
+        invocations = sum(len(chain) for _w, chain in queue)
+        print(f"Packed TUs into {invocations} clang-tidy invocations")
+
+    budget = None
+    if options.memory_budget_mb:
+        budget = MemoryBudget(options.memory_budget_mb * 1024)
+        print(f"Admitting TUs within a memory budget of {options.memory_budget_mb} MB")
+
+    position = 0
+    running: dict[Future[None], int] = {}
+    with ThreadPoolExecutor(max_workers=options.jobs) as pool:
+        while position < len(queue) or running:
+            while position < len(queue) and len(running) < options.jobs:
+                w, chain = queue[position]
+                on_start = None
+                if budget is not None:
+                    expected = max(u.peak_rss for batch in chain for u in batch)
+                    if not budget.admits(expected):
+                        break
+                    budget.start(id(chain), expected)
+                    on_start = partial(budget.set_pid, id(chain))
+                future = pool.submit(
+                    _run_chain,
+                    tracker,
+                    w,
+                    chain,
+                    on_start,
+                    options.limits,
+                    options.baseline,
+                )
+                running[future] = id(chain)
+                position += 1
+
+            finished, _ = wait(
+                running, timeout=_ADMISSION_POLL_SECONDS, return_when=FIRST_COMPLETED
+            )
+            for future in finished:
+                token = running.pop(future)
+                future.result()
+                if budget is not None:
+                    budget.finish(token)
+
+    tracker.check_parse_failures(options.jobs, options.limits.timeout)
+    tracker.summary(options.order)
+    tracker.reuse_summary()
+    if options.result_cache is not None:
+        print(options.result_cache.describe())
+        options.result_cache.gc()
+    if options.check_reuse is not None:
+        options.check_reuse.cache.gc()
+
+
+def _profile_dir(stack: ExitStack, project: str, options: SchedulerOptions) -> str:
+    """Where clang-tidy stores a project's per-TU check profiles.
+
+    With a journal the profiles live next to it, so a resumed run still
+    has those of the TUs it does not analyze again.
+    """
+    journal = options.journal
+    if journal is None:
+        return stack.enter_context(tempfile.TemporaryDirectory(prefix="ctit-profile-"))
+    path = os.path.join(os.path.dirname(journal.path), "profiles", project)
+    if not journal.resumed:
+        shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def run_clang_tidy_native(
+    clang_tidy_bin: str,
+    build_dir: str,
+    check_name: str,
+    source_dir: str,
+    file_regex: str | None,
+    log_file: str,
+    progress_file: str,
+    tidy_config: str | None,
+    skip_headers: bool = False,
+    profile: bool = False,
+    options: SchedulerOptions | None = None,
+    commit: str = "",
+) -> None:
+    """Run clang-tidy on every selected TU from a worker pool.
+
+    Produces the same log and progress layout as run_clang_tidy(): progress
+    lines go to progress_file, clang-tidy output goes to log_file.
+    """
+    project_name = os.path.basename(log_file).removesuffix(".log")
+    units, total_entries = collect_translation_units(
+        project_name, build_dir, source_dir, file_regex
+    )
+    options = options or SchedulerOptions()
+
+    with ExitStack() as stack:
+        profile_dir = _profile_dir(stack, project_name, options) if profile else None
+        log = stack.enter_context(open(log_file, "w"))
+        progress = stack.enter_context(open(progress_file, "a"))
+        command = clang_tidy_command(
+            clang_tidy_bin,
+            build_dir,
+            check_name,
+            tidy_config,
+            skip_headers,
+            profile_dir,
+        )
+        work = ProjectWork(
+            project_name,
+            units,
+            command,
+            log,
+            total_entries,
+            profile_dir,
+            commit,
+        )
+        run_work_queue([work], progress, options)
+
+
+def configure_project(
+    project: Project,
+    config: AnalysisConfig,
+    source_dir: str,
+    jobs: int | None = None,
+) -> None:
+    """Configure and build a single project."""
+    source_dir = os.path.abspath(source_dir)
+    build_dir = os.path.join(source_dir, "build")
+
+    cmake_source = source_dir
+    if config.cmake_source_subdir:
+        cmake_source = os.path.join(source_dir, config.cmake_source_subdir)
+
+    print(f"[{project.name}] Configuring...")
+    remove_clang_tidy_configs(source_dir)
+    configure_cmake(cmake_source, build_dir, config.cmake_flags)
+    build_project(build_dir, config.build_targets, jobs)
+    print(f"[{project.name}] Done.")
+
+
+def configure(
+    work_dir: str = PROJECTS_DIR,
+    config_path: str = CONFIG_FILE,
+    jobs: int | None = None,
+) -> None:
+    """Configure all projects (cmake + build targets).
+
+    Without an explicit jobs count, ninja parallelism is sized from the
+    container's CPU and memory limits.
+    """
+    check_clang_compiler()
+    projects = load_projects(config_path)
+    configs = get_analysis_configs(config_path)
+
+    limits = detect_limits()
+    jobs = jobs or limits.build_jobs()
+    print(f"Resources: {limits.describe()}; building with {jobs} jobs")
+
+    for project in projects:
+        config = configs.get(project.name, AnalysisConfig(name=project.name))
+        source_dir = os.path.join(work_dir, project.name)
+        configure_project(project, config, source_dir, jobs)
+
+
+def analyze_project(
+    project: Project,
+    config: AnalysisConfig,
+    source_dir: str,
+    clang_tidy_bin: str,
+    run_tidy_script: str | None,
+    check_name: str,
+    log_dir: str,
+    progress_file: str,
+    tidy_config: str | None = None,
+    skip_headers: bool = False,
+    profile: bool = False,
+    options: SchedulerOptions | None = None,
+) -> None:
+    """Run clang-tidy analysis on a single project.
+
+    Uses the built-in scheduler unless a run-clang-tidy script is given.
+    """
+    source_dir = os.path.abspath(source_dir)
+    build_dir = os.path.join(source_dir, "build")
+    log_file = os.path.join(log_dir, f"{project.name}.log")
+
+    print(f"[{project.name}] Starting analysis for check: {check_name}")
+
+    if run_tidy_script is None:
+        run_clang_tidy_native(
+            clang_tidy_bin,
+            build_dir,
+            check_name,
+            source_dir,
+            config.file_regex,
+            log_file,
+            progress_file,
+            tidy_config,
+            skip_headers,
+            profile,
+            options,
+            project.commit,
+        )
+    else:
+        run_clang_tidy(
+            clang_tidy_bin,
+            run_tidy_script,
+            build_dir,
+            check_name,
+            source_dir,
+            config.file_regex,
+            log_file,
+            progress_file,
+            tidy_config,
+            skip_headers,
+            profile,
+            options.jobs if options else None,
+        )
+
+    print(f"[{project.name}] Finished. Log saved to {log_file}")
+
+
+@contextmanager
+def project_work(
+    projects: list[Project],
+    configs: dict[str, AnalysisConfig],
+    work_dir: str,
+    clang_tidy_bin: str,
+    check_name: str,
+    log_dir: str,
+    tidy_config: str | None = None,
+    skip_headers: bool = False,
+    profile: bool = False,
+    options: SchedulerOptions | None = None,
+) -> Iterator[list[ProjectWork]]:
+    """Collect the TUs of all projects and keep their logs open."""
+    options = options or SchedulerOptions()
+    with ExitStack() as stack:
+        work: list[ProjectWork] = []
+        for project in projects:
+            config = configs.get(project.name, AnalysisConfig(name=project.name))
+            source_dir = os.path.abspath(os.path.join(work_dir, project.name))
+            build_dir = os.path.join(source_dir, "build")
+            units, total_entries = collect_translation_units(
+                project.name, build_dir, source_dir, config.file_regex
+            )
+
+            profile_dir = (
+                _profile_dir(stack, project.name, options) if profile else None
+            )
+            log_file = os.path.join(log_dir, f"{project.name}.log")
+            log = stack.enter_context(open(log_file, "w"))
+            command = clang_tidy_command(
+                clang_tidy_bin,
+                build_dir,
+                check_name,
+                tidy_config,
+                skip_headers,
+                profile_dir,
+            )
+
+            print(f"[{project.name}] Queued {len(units)} TUs for check: {check_name}")
+            work.append(
+                ProjectWork(
+                    project.name,
+                    units,
+                    command,
+                    log,
+                    total_entries,
+                    profile_dir,
+                    project.commit,
+                )
+            )
+        yield work
+
+
+def analyze_global(
+    projects: list[Project],
+    configs: dict[str, AnalysisConfig],
+    work_dir: str,
+    clang_tidy_bin: str,
+    check_name: str,
+    log_dir: str,
+    progress_file: str,
+    tidy_config: str | None = None,
+    skip_headers: bool = False,
+    profile: bool = False,
+    options: SchedulerOptions | None = None,
+) -> None:
+    """Analyze all projects from one shared TU queue and worker budget.
+
+    Results are still split into one log per project, so nothing downstream
+    can tell this apart from analyzing the projects one after another.
+    """
+    options = options or SchedulerOptions()
+    with (
+        open(progress_file, "a") as progress,
+        project_work(
+            projects,
+            configs,
+            work_dir,
+            clang_tidy_bin,
+            check_name,
+            log_dir,
+            tidy_config,
+            skip_headers,
+            profile,
+            options,
+        ) as work,
+    ):
+        run_work_queue(work, progress, options)
+
+
+def run_settings(
+    check_name: str,
+    tidy_config: str | None,
+    skip_headers: bool,
+    profile: bool,
+    limits: TuLimits,
+    plans: dict[str, CompileDbPlan] | None = None,
+    batch_size: int = 1,
+) -> dict[str, Any]:
+    """The settings besides the binary that determine clang-tidy's output.
+
+    batch_size is among them, as a header's diagnostics are reported once
+    per batch rather than once per TU.
+    """
+    return {
+        "check": check_name,
+        "config": tidy_config,
+        "skip_headers": skip_headers,
+        "profile": profile,
+        "timeout": limits.timeout,
+        "memory_mb": limits.memory_mb,
+        "plans": {name: asdict(plan) for name, plan in (plans or {}).items()},
+        "batch_size": batch_size,
+    }
+
+
+def open_check_reuse(
+    llvm_src: str,
+    clang_tidy_bin: str,
+    check_name: str,
+    tidy_config: str | None,
+    settings: dict[str, Any],
+    cache: ResultCache,
+    full_run_every: int,
+) -> CheckReuse:
+    """Key the enabled checks by their sources in llvm_src for reuse in cache.
+
+    The run is a full one if full_run_every - 1 runs reused outputs since
+    the last; check_reuse.record_run() counts it once it is done.
+    """
+    try:
+        checks = enabled_checks(clang_tidy_bin, check_name, tidy_config)
+        keys = check_keys(
+            llvm_src, checks, {k: v for k, v in settings.items() if k != "check"}
+        )
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Error: cannot key checks by their sources: {e}", file=sys.stderr)
+        sys.exit(1)
+    unkeyed = [c for c in checks if c not in keys]
+    if unkeyed:
+        print(
+            f"Warning: no sources found for {len(unkeyed)} checks, which "
+            f"always run: {', '.join(unkeyed)}",
+            file=sys.stderr,
+        )
+    full = due_for_full_run(cache.directory, full_run_every)
+    return CheckReuse(cache, keys, checks, full)
+
+
+def compile_db_plans(
+    projects: list[Project],
+    configs: dict[str, AnalysisConfig],
+    rewrite: bool,
+    drop_groups: Sequence[str] = (),
+) -> dict[str, CompileDbPlan]:
+    """The compile DB plan of every project.
+
+    Without rewrite the plans drop no flags, so the planned compile DB is
+    only filtered and de-duplicated and the same code path runs either way.
+    """
+    plans = {}
+    for project in projects:
+        config = configs.get(project.name, AnalysisConfig(name=project.name))
+        rules = config.rewrite_rules(drop_groups) if rewrite else RewriteRules()
+        plans[project.name] = CompileDbPlan(config.file_regex, rules)
+    return plans
+
+
+def plan_projects(
+    projects: list[Project], work_dir: str, plans: dict[str, CompileDbPlan]
+) -> None:
+    """Plan the TUs of every configured project and print their counts."""
+    for project in projects:
+        source_dir = os.path.abspath(os.path.join(work_dir, project.name))
+        build_dir = os.path.join(source_dir, "build")
+        if not os.path.isfile(os.path.join(build_dir, "compile_commands.json")):
+            continue
+        manifest, cached = plan_compile_db(build_dir, source_dir, plans[project.name])
+        print(
+            f"[{project.name}] {manifest.describe()}" + (" (cached)" if cached else "")
+        )
+
+
+def _diagnostic_lines(output: str) -> list[str]:
+    """The diagnostics of clang-tidy output, without its warning counts."""
+    return [line for line in output.splitlines() if _DIAGNOSTIC_RE.match(line)]
+
+
+def measure_rewrite(
+    project: Project,
+    config: AnalysisConfig,
+    source_dir: str,
+    clang_tidy_bin: str,
+    check_name: str,
+    tidy_config: str | None,
+    skip_headers: bool,
+    sample: int,
+    limits: TuLimits | None = None,
+) -> None:
+    """Time sample TUs against the original and the rewritten compile DB.
+
+    The TUs run one at a time with the same checks, so the difference in
+    elapsed time is the frontend time the rewrite saves. The original
+    commands come from a compile DB with the first entry of each file only,
+    as the rewritten one has, so the saving of dropping duplicate entries
+    is not counted. The diagnostics must not change; the "N warnings
+    generated" counts may, if warning options are dropped on request.
+    """
+    source_dir = os.path.abspath(source_dir)
+    build_dir = os.path.join(source_dir, "build")
+    units, _total = collect_translation_units(
+        project.name, build_dir, source_dir, config.file_regex
+    )
+    if not units or compile_db_dir(build_dir) == build_dir:
+        return
+    step = max(1, len(units) // sample)
+    units = units[::step][:sample]
+
+    first: dict[str, dict[str, Any]] = {}
+    for entry in load_compile_commands(build_dir):
+        path = os.path.normpath(os.path.join(entry["directory"], entry["file"]))
+        first.setdefault(path, entry)
+    rewritten = clang_tidy_command(
+        clang_tidy_bin, build_dir, check_name, tidy_config, skip_headers
+    )
+    before = after = 0.0
+    changed = []
+    with tempfile.TemporaryDirectory(prefix="ctit-original-db-") as original_dir:
+        with open(os.path.join(original_dir, "compile_commands.json"), "w") as f:
+            json.dump([first[u.file] for u in units], f)
+        original = [
+            f"-p={original_dir}" if a.startswith("-p=") else a for a in rewritten
+        ]
+        for unit in units:
+            old = run_translation_unit(original, unit, limits=limits)
+            new = run_translation_unit(rewritten, unit, limits=limits)
+            before += old.elapsed
+            after += new.elapsed
+            old_lines = set(_diagnostic_lines(old.output))
+            if old_lines != set(_diagnostic_lines(new.output)):
+                changed.append(unit.key)
+
+    change = (after - before) / before * 100 if before else 0.0
+    verdict = (
+        "diagnostics identical"
+        if not changed
+        else f"diagnostics differ in {', '.join(changed)}"
+    )
+    print(
+        f"[{project.name}] Rewrite on {len(units)} sampled TUs: "
+        f"{before:.1f}s -> {after:.1f}s ({change:+.0f}%), {verdict}"
+    )
+
+
+def select_shard(
+    projects: list[Project],
+    configs: dict[str, AnalysisConfig],
+    work_dir: str,
+    shard: Shard,
+    among: set[tuple[str, str]] | None = None,
+) -> set[tuple[str, str]]:
+    """Return the (project, file) TUs of all projects that belong to shard.
+
+    Shards are balanced by file size rather than recorded durations, since
+    every runner must compute the same split from its own checkout. With
+    among, only those TUs are split.
+    """
+    items = []
+    for project in projects:
+        config = configs.get(project.name, AnalysisConfig(name=project.name))
+        source_dir = os.path.abspath(os.path.join(work_dir, project.name))
+        units, _ = collect_translation_units(
+            project.name,
+            os.path.join(source_dir, "build"),
+            source_dir,
+            config.file_regex,
+        )
+        items += [
+            (u.project, u.key, file_size(u.file))
+            for u in units
+            if among is None or (u.project, u.key) in among
+        ]
+
+    assignment = assign_shards(items, shard.count)
+    selected = {tu for tu, index in assignment.items() if index == shard.index - 1}
+    print(f"Shard {shard}: analyzing {len(selected)} of {len(items)} TUs")
+    return selected
+
+
+def files_with_findings(log_dir: str) -> set[tuple[str, str]]:
+    """Return the (project, file) TUs with check diagnostics in log_dir's run.
+
+    Compiler diagnostics (clang-diagnostic-*) do not count as findings.
+    """
+    path = os.path.join(log_dir, RESULTS_FILE)
+    if not os.path.isfile(path):
+        print(f"Error: no {RESULTS_FILE} in {log_dir}", file=sys.stderr)
+        sys.exit(1)
+    return {
+        (record["project"], record["file"])
+        for record in read_results(path)
+        if any(
+            not check.startswith("clang-diagnostic-")
+            for check in record.get("diagnostics") or {}
+        )
+    }
+
+
+def quick_files(
+    projects: list[Project],
+    configs: dict[str, AnalysisConfig],
+    work_dir: str,
+    jobs: int = 1,
+    among: set[tuple[str, str]] | None = None,
+) -> set[tuple[str, str]]:
+    """Return a small set of (project, file) TUs covering every AST node kind.
+
+    Per project, the TUs are picked from its AST index by cover_kinds(),
+    smaller files first on ties, until together they contain every node
+    kind any of its TUs contains. With among, only those TUs are considered.
+    TUs that could not be parsed for the index are never picked.
+    """
+    selected = set()
+    for project in projects:
+        config = configs.get(project.name, AnalysisConfig(name=project.name))
+        source_dir = os.path.abspath(os.path.join(work_dir, project.name))
+        build_dir = os.path.join(source_dir, "build")
+        if not os.path.isfile(os.path.join(build_dir, "compile_commands.json")):
+            continue
+        units, _ = collect_translation_units(
+            project.name, build_dir, source_dir, config.file_regex
+        )
+        units = [u for u in units if among is None or (u.project, u.key) in among]
+        index, reused = build_ast_index(build_dir, project.commit, jobs)
+        kinds = {
+            u.file: set(index.kinds[u.file]) for u in units if u.file in index.kinds
+        }
+        chosen = cover_kinds(kinds, {f: file_size(f) for f in kinds})
+        keys = {u.file: u.key for u in units}
+        selected |= {(project.name, keys[f]) for f in chosen}
+        covered = set().union(*kinds.values())
+        summary = (
+            f"[{project.name}] Quick: {len(chosen)} of {len(units)} TUs cover all "
+            f"{len(covered)} AST node kinds"
+        )
+        unparsed = len(units) - len(kinds)
+        if unparsed:
+            summary += f"; {unparsed} TUs failed to parse and are left out"
+        print(summary)
+        if not reused:
+            print(f"[{project.name}] Indexed the AST node kinds of {len(kinds)} TUs")
+    return selected
+
+
+def untriggered_files(
+    projects: list[Project],
+    configs: dict[str, AnalysisConfig],
+    work_dir: str,
+    clang_tidy_bin: str,
+    check_name: str,
+    tidy_config: str | None,
+    jobs: int = 1,
+) -> set[tuple[str, str]] | None:
+    """Return the (project, file) TUs no enabled check can emit diagnostics in.
+
+    Those are the TUs whose preprocessed source contains none of the trigger
+    identifiers CHECK_TRIGGERS lists for the checks, according to the
+    project's identifier index. None if a check has no triggers listed, or
+    if tidy_config sets an option that changes what a check matches.
+    """
+    try:
+        checks = enabled_checks(clang_tidy_bin, check_name, tidy_config)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Error: cannot list the enabled checks: {e}", file=sys.stderr)
+        sys.exit(1)
+    identifiers = trigger_identifiers(checks)
+    if identifiers is None:
+        unlisted = [c for c in checks if c not in CHECK_TRIGGERS]
+        print(
+            "Identifier prefilter disabled: no trigger identifiers known for "
+            + (", ".join(unlisted) or "an empty check list")
+        )
+        return None
+    options = trigger_options(checks, tidy_config)
+    if options:
+        print("Identifier prefilter disabled: the config sets " + ", ".join(options))
+        return None
+
+    untriggered = set()
+    for project in projects:
+        config = configs.get(project.name, AnalysisConfig(name=project.name))
+        source_dir = os.path.abspath(os.path.join(work_dir, project.name))
+        build_dir = os.path.join(source_dir, "build")
+        if not os.path.isfile(os.path.join(build_dir, "compile_commands.json")):
+            continue
+        units, _ = collect_translation_units(
+            project.name, build_dir, source_dir, config.file_regex
+        )
+        index, reused = build_identifier_index(
+            build_dir, project.commit, identifiers, jobs
+        )
+        without = index.without(identifiers)
+        skipped = {(project.name, u.key) for u in units if u.file in without}
+        summary = (
+            f"[{project.name}] {len(skipped)} of {len(units)} TUs contain none of "
+            f"{', '.join(sorted(identifiers))}"
+        )
+        if not reused and index.unindexed:
+            summary += f"; {len(index.unindexed)} TUs failed to preprocess"
+        print(summary)
+        untriggered |= skipped
+    return untriggered
+
+
+def select_files(
+    projects: list[Project],
+    configs: dict[str, AnalysisConfig],
+    work_dir: str,
+    files_including: list[str] | None = None,
+    findings_dir: str | None = None,
+    paths: list[str] | None = None,
+    jobs: int = 1,
+) -> set[tuple[str, str]]:
+    """Return the (project, file) TUs of all projects the selectors match.
+
+    files_including keeps the TUs that include one of those headers,
+    according to the project's include index; findings_dir keeps those
+    with findings in that earlier run's log dir; paths keeps those whose
+    path relative to the project, or prefixed with the project name,
+    matches one of those globs. A TU must match every kind of selector
+    given, and any one selector of each kind.
+    """
+    findings = files_with_findings(findings_dir) if findings_dir else None
+    selected = set()
+    total = 0
+    for project in projects:
+        config = configs.get(project.name, AnalysisConfig(name=project.name))
+        source_dir = os.path.abspath(os.path.join(work_dir, project.name))
+        build_dir = os.path.join(source_dir, "build")
+        if not os.path.isfile(os.path.join(build_dir, "compile_commands.json")):
+            continue
+        units, _ = collect_translation_units(
+            project.name, build_dir, source_dir, config.file_regex
+        )
+        total += len(units)
+
+        including = None
+        if files_including:
+            index, reused = build_include_index(build_dir, project.commit, jobs)
+            including = set().union(*(index.including(p) for p in files_including))
+            if not reused:
+                summary = (
+                    f"[{project.name}] Indexed the headers of {len(index.files)} TUs"
+                )
+                if index.unindexed:
+                    summary += f", {len(index.unindexed)} without known headers"
+                print(summary)
+
+        for unit in units:
+            if paths and not any(
+                fnmatch.fnmatch(unit.key, glob_)
+                or fnmatch.fnmatch(f"{project.name}/{unit.key}", glob_)
+                for glob_ in paths
+            ):
+                continue
+            if findings is not None and (project.name, unit.key) not in findings:
+                continue
+            if including is not None and unit.file not in including:
+                continue
+            selected.add((project.name, unit.key))
+
+    print(f"Selected {len(selected)} of {total} TUs")
+    return selected
+
+
+def analyze(
+    check_name: str,
+    tidy_config: str | None = None,
+    work_dir: str = PROJECTS_DIR,
+    clang_tidy_bin: str = DEFAULT_CLANG_TIDY_BIN,
+    run_tidy_script: str | None = None,
+    log_dir: str = DEFAULT_LOG_DIR,
+    config_path: str = CONFIG_FILE,
+    skip_headers: bool = False,
+    profile: bool = False,
+    jobs: int | None = None,
+    global_queue: bool = False,
+    history_file: str = DEFAULT_HISTORY_FILE,
+    memory_budget_mb: int | None = None,
+    batch_size: int = 1,
+    tu_timeout: float = DEFAULT_TU_TIMEOUT,
+    tu_memory_limit_mb: int = DEFAULT_TU_MEMORY_LIMIT_MB,
+    resume: bool = False,
+    shard: Shard | None = None,
+    order: str = "lpt",
+    max_diagnostics: int = DEFAULT_MAX_DIAGNOSTICS,
+    parse_failures_file: str = DEFAULT_PARSE_FAILURES_FILE,
+    analyze_parse_failures: bool = False,
+    rewrite: bool = True,
+    rewrite_sample: int = 0,
+    drop_flag_groups: list[str] | None = None,
+    result_cache: bool = False,
+    result_cache_dir: str = DEFAULT_RESULT_CACHE_DIR,
+    result_cache_mb: int = DEFAULT_RESULT_CACHE_MB,
+    reuse_check_sources: str | None = None,
+    full_run_every: int = DEFAULT_FULL_RUN_EVERY,
+    baseline_binary: str | None = None,
+    files_including: list[str] | None = None,
+    findings_dir: str | None = None,
+    paths: list[str] | None = None,
+    identifier_prefilter: bool = False,
+    quick: bool = False,
+    only_files: set[tuple[str, str]] | None = None,
+) -> None:
+    """Run clang-tidy analysis on all configured projects.
+
+    run_tidy_script selects the run-clang-tidy backend; "auto" looks it up
+    in PATH. Without it, TUs are scheduled by the built-in engine, either
+    project by project or, with global_queue, from one shared queue, slowest
+    first according to the durations recorded in history_file.
+
+    jobs and memory_budget_mb default to the container's cgroup CPU and
+    memory limits; a memory budget of 0 disables admission control.
+    tu_timeout and tu_memory_limit_mb stop a single TU that runs too long or
+    grows too large; they are fixed rather than derived from the runner so
+    that reruns stop the same TUs. 0, the default, disables a limit.
+
+    The built-in engine records every finished TU in a journal in log_dir.
+    With resume, TUs the journal already holds for the same clang-tidy
+    binary, checks and config are not analyzed again.
+
+    With shard, only that share of the TUs of all projects is analyzed; see
+    merge_logs() for combining the log directories of all shards.
+
+    files_including, findings_dir and paths restrict the built-in engine to
+    the TUs that include one of those headers, had findings in the run
+    logged to findings_dir and whose paths match one of those globs, as far
+    as given; see select_files(). only_files restricts it to those
+    (project, file) TUs, such as a sample picked by tiered.py.
+
+    With quick, the built-in engine analyzes only as few of those TUs per
+    project as together contain every AST node kind its TUs do; see
+    quick_files(). Rerunning with resume but without quick analyzes the
+    rest. A shard is then a share of the TUs left.
+
+    With identifier_prefilter, the built-in engine skips the TUs whose
+    preprocessed source contains none of the trigger identifiers of the
+    enabled checks, provided CHECK_TRIGGERS lists them for every check; see
+    untriggered_files(). The report counts the TUs skipped.
+
+    order selects how the built-in engine schedules TUs: "lpt" runs the
+    slowest first, "locality" runs TUs that share headers back-to-back on
+    the same worker; see run_work_queue().
+
+    Once a check emits more than max_diagnostics diagnostics in a project,
+    the built-in engine starts no further TUs of that project; 0, the
+    default, disables the limit.
+
+    The built-in engine skips TUs that are known from parse_failures_file to
+    fail a syntax-only parse at the project's commit with its compiler, or
+    runs them last with analyze_parse_failures.
+
+    Every project's compile DB is first rewritten to drop flags that cost
+    frontend time without affecting any diagnostic, by the built-in rules
+    and the project's drop_flags and keep_flags; without rewrite it is
+    copied unchanged. drop_flag_groups name OPTIONAL_DROP_FLAGS, such as
+    sanitizer or warning flags, to drop as well, although they can change
+    diagnostics. With rewrite_sample, that many TUs per project are timed
+    against both compile DBs first.
+
+    With result_cache, the built-in engine replays the output of TUs whose
+    clang-tidy binary, settings, compile command and include closure,
+    system headers included, are unchanged from result_cache_dir instead
+    of analyzing them, and keeps that cache within result_cache_mb. The
+    keys are computed as TUs are dispatched. Check profiles cannot be
+    replayed, so profiling runs do not use the cache.
+
+    With reuse_check_sources, the LLVM checkout clang-tidy was built from,
+    the built-in engine instead keeps each check's output per TU in
+    result_cache_dir, keyed by the sources of the check, the clang-tidy
+    framework and the Clang frontend rather than by the binary. Only the
+    checks whose sources changed since a TU was last analyzed run again.
+    Every full_run_every-th run analyzes everything and reports the TUs
+    whose reused outputs would have differed.
+
+    With baseline_binary, the built-in engine runs every TU with that
+    clang-tidy too, right after the one under test, and writes the diff of
+    their diagnostics to DIFF_FILE in log_dir for generate_report.py.
+    Replaying outputs would leave TUs without a diff, so such runs do not
+    use the result cache. Runs without it remove the DIFF_FILE an earlier
+    run left, as they do any PERF_FILE, which generate_report.py would
+    otherwise add to their report.
+    """
+    for binary in (clang_tidy_bin, baseline_binary):
+        if binary and not shutil.which(binary) and not os.path.isfile(binary):
+            print(f"Error: clang-tidy binary not found: {binary}", file=sys.stderr)
+            sys.exit(1)
+
+    if run_tidy_script == "auto":
+        run_tidy_script = find_run_tidy_script()
+        if run_tidy_script is None:
+            print(
+                "Error: run-clang-tidy script not found in PATH.\n"
+                "Install it or use '--run-tidy-script' flag.",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+    elif (
+        run_tidy_script is not None
+        and not os.path.isfile(run_tidy_script)
+        and not shutil.which(run_tidy_script)
+    ):
+        print(
+            f"Error: run-clang-tidy script not found: {run_tidy_script}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if global_queue and run_tidy_script is not None:
+        print(
+            "Error: '--global-queue' requires the built-in scheduler; "
+            "drop '--run-tidy-script'.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if resume and run_tidy_script is not None:
+        print(
+            "Error: '--resume' requires the built-in scheduler; "
+            "drop '--run-tidy-script'.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if shard is not None and run_tidy_script is not None:
+        print(
+            "Error: '--shard' requires the built-in scheduler; "
+            "drop '--run-tidy-script'.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    selecting = bool(files_including or findings_dir or paths)
+    if (selecting or only_files is not None) and run_tidy_script is not None:
+        print(
+            "Error: '--files-including', '--only-files-with-findings', '--paths' "
+            "and '--sample-first' require the built-in scheduler; drop "
+            "'--run-tidy-script'.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if quick and run_tidy_script is not None:
+        print(
+            "Error: '--quick' requires the built-in scheduler; "
+            "drop '--run-tidy-script'.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if identifier_prefilter and run_tidy_script is not None:
+        print(
+            "Error: '--identifier-prefilter' requires the built-in scheduler; "
+            "drop '--run-tidy-script'.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if order != "lpt" and run_tidy_script is not None:
+        print(
+            "Error: '--order' requires the built-in scheduler; "
+            "drop '--run-tidy-script'.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if baseline_binary is not None and (
+        run_tidy_script is not None or reuse_check_sources is not None
+    ):
+        print(
+            "Error: '--baseline-binary' requires the built-in scheduler and "
+            "cannot be combined with '--reuse-by-check-source'.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    if reuse_check_sources is not None and (run_tidy_script is not None or profile):
+        print(
+            "Error: '--reuse-by-check-source' requires the built-in scheduler "
+            "and cannot be combined with '--enable-check-profile'.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    projects = load_projects(config_path)
+    configs = get_analysis_configs(config_path)
+    os.makedirs(log_dir, exist_ok=True)
+
+    progress_file = os.path.join(log_dir, "progress.log")
+    open(progress_file, "w").close()
+    remove_stale_reports(log_dir, keep_diff=baseline_binary is not None)
+
+    limits = detect_limits()
+    if memory_budget_mb is None:
+        memory_budget_mb = limits.memory_budget_mb()
+    options = SchedulerOptions(
+        jobs=jobs or limits.cpus,
+        memory_budget_mb=memory_budget_mb or None,
+        batch_size=batch_size,
+        limits=TuLimits(tu_timeout or None, tu_memory_limit_mb or None),
+        order=order,
+        max_diagnostics=max_diagnostics or None,
+        analyze_parse_failures=analyze_parse_failures,
+    )
+    summary = f"Resources: {limits.describe()}; analyzing with {options.jobs} jobs"
+    if options.memory_budget_mb and run_tidy_script is None:
+        summary += f" within a {options.memory_budget_mb} MB memory budget"
+    print(summary)
+    if run_tidy_script is None:
+        print(f"Per-TU limits: {options.limits.describe()}")
+
+    plans = compile_db_plans(projects, configs, rewrite, drop_flag_groups or [])
+    plan_projects(projects, work_dir, plans)
+    if rewrite_sample:
+        for project in projects:
+            measure_rewrite(
+                project,
+                configs.get(project.name, AnalysisConfig(name=project.name)),
+                os.path.join(work_dir, project.name),
+                clang_tidy_bin,
+                check_name,
+                tidy_config,
+                skip_headers,
+                rewrite_sample,
+                options.limits,
+            )
+
+    if run_tidy_script is None:
+        options.history = TuHistory.load(history_file)
+        options.parse_failures = ParseFailures.load(parse_failures_file)
+        settings = run_settings(
+            check_name,
+            tidy_config,
+            skip_headers,
+            profile,
+            options.limits,
+            plans,
+            options.batch_size,
+        )
+        if baseline_binary is not None:
+            settings["baseline"] = binary_digest(baseline_binary)
+        fingerprint = run_fingerprint(clang_tidy_bin, settings)
+        options.journal = Journal.open(
+            os.path.join(log_dir, JOURNAL_FILE), fingerprint, resume
+        )
+        options.results = ResultLog(
+            os.path.join(log_dir, RESULTS_FILE), options.journal.resumed
+        )
+        if reuse_check_sources is not None:
+            options.check_reuse = open_check_reuse(
+                reuse_check_sources,
+                clang_tidy_bin,
+                check_name,
+                tidy_config,
+                settings,
+                ResultCache(result_cache_dir, max_bytes=result_cache_mb << 20),
+                full_run_every,
+            )
+        elif baseline_binary is not None:
+            options.baseline = baseline_binary
+            options.diffs = ResultLog(
+                os.path.join(log_dir, DIFF_FILE), options.journal.resumed
+            )
+        elif result_cache and not profile:
+            options.result_cache = ResultCache(
+                result_cache_dir, fingerprint, result_cache_mb << 20
+            )
+        options.selected_files = only_files
+        if selecting:
+            selected = select_files(
+                projects,
+                configs,
+                work_dir,
+                files_including,
+                findings_dir,
+                paths,
+                options.jobs,
+            )
+            if only_files is not None:
+                selected &= only_files
+            options.selected_files = selected
+        if quick:
+            options.selected_files = quick_files(
+                projects, configs, work_dir, options.jobs, options.selected_files
+            )
+            print(
+                "Quick run: rerun with '--resume' and without '--quick' to "
+                "analyze the remaining TUs"
+            )
+        if shard is not None:
+            options.selected_files = select_shard(
+                projects, configs, work_dir, shard, options.selected_files
+            )
+        if identifier_prefilter:
+            options.untriggered = untriggered_files(
+                projects,
+                configs,
+                work_dir,
+                clang_tidy_bin,
+                check_name,
+                tidy_config,
+                options.jobs,
+            )
+
+    if global_queue:
+        analyze_global(
+            projects,
+            configs,
+            work_dir,
+            clang_tidy_bin,
+            check_name,
+            log_dir,
+            progress_file,
+            tidy_config,
+            skip_headers,
+            profile,
+            options,
+        )
+    else:
+        for project in projects:
+            config = configs.get(project.name, AnalysisConfig(name=project.name))
+            source_dir = os.path.join(work_dir, project.name)
+            analyze_project(
+                project,
+                config,
+                source_dir,
+                clang_tidy_bin,
+                run_tidy_script,
+                check_name,
+                log_dir,
+                progress_file,
+                tidy_config,
+                skip_headers,
+                profile,
+                options,
+            )
+
+    if options.check_reuse is not None:
+        record_run(options.check_reuse.cache.directory, options.check_reuse.full)
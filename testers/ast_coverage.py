@@ -0,0 +1,195 @@
+"""AST node kinds of a project's TUs and small TU sets that cover them all."""
+
+import json
+import os
+import re
+import subprocess
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from testers.include_index import strip_output_flags
+from testers.locality import entry_arguments
+from testers.rewrite import REWRITTEN_DB_DIR, compile_db_dir
+
+INDEX_FILE = "ast-kinds.json"
+DEFAULT_AST_TIMEOUT = 300.0
+
+# A node of clang's -ast-dump: the tree drawn in front of it, then its kind,
+# as in "| `-CallExpr 0x55d0 <line:4:3, col:7> 'void'".
+_NODE_RE = re.compile(r"^([| `-]*)([A-Z]\w*)(?: |$)")
+# A source location in a node. Its file is only written when it differs
+# from that of the location written before; "line" stands in for it else.
+_LOCATION_RE = re.compile(r"(<[^<>]+>|[^\s<>,]+):\d+:\d+")
+
+
+def main_file_kinds(
+    lines: Iterable[str], source: str, directory: str
+) -> dict[str, int]:
+    """The number of AST nodes of each kind -ast-dump lines show in source.
+
+    Only the top-level declarations located in source count, with all the
+    nodes below them, so the headers a file includes do not drown out its
+    own code. File names in the dump are relative to directory.
+    """
+    counts: dict[str, int] = {}
+    last_file = ""
+    in_main = False
+    for line in lines:
+        first_file = last_file
+        for i, file in enumerate(_LOCATION_RE.findall(line)):
+            if file != "line":
+                last_file = file
+            if i == 0:
+                first_file = last_file
+        node = _NODE_RE.match(line)
+        if node is not None and len(node.group(1)) == 2:
+            in_main = "<<invalid sloc>>" not in line and (
+                os.path.normpath(os.path.join(directory, first_file)) == source
+            )
+        if in_main and node is not None:
+            kind = node.group(2)
+            counts[kind] = counts.get(kind, 0) + 1
+    return counts
+
+
+@dataclass
+class AstIndex:
+    """The AST node kinds of every TU of a project.
+
+    key identifies the project commit and compile DB the index was made
+    from. kinds maps the absolute path of every TU to how many nodes of
+    each kind the AST of its main file has, and unindexed lists the files
+    that could not be parsed.
+    """
+
+    key: dict[str, Any]
+    kinds: dict[str, dict[str, int]] = field(default_factory=dict)
+    unindexed: list[str] = field(default_factory=list)
+
+
+def _index_path(build_dir: str) -> str:
+    return os.path.join(build_dir, REWRITTEN_DB_DIR, INDEX_FILE)
+
+
+def _index_key(build_dir: str, commit: str) -> dict[str, Any]:
+    stat = os.stat(os.path.join(compile_db_dir(build_dir), "compile_commands.json"))
+    return {"commit": commit, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def entry_kinds(entry: dict[str, Any], timeout: float) -> dict[str, int] | None:
+    """The AST node kind histogram of a compile DB entry's main file.
+
+    The entry's compiler, which analyze requires to be Clang, parses the
+    file syntax-only and dumps its AST, which is counted as it streams in,
+    since the dump of a TU including much of the standard library is huge.
+    Returns None if parsing fails or takes longer than timeout.
+    """
+    directory = entry["directory"]
+    source = os.path.normpath(os.path.join(directory, entry["file"]))
+    command = [
+        *strip_output_flags(entry_arguments(entry)),
+        "-fsyntax-only",
+        "-fno-color-diagnostics",
+        "-Xclang",
+        "-ast-dump",
+    ]
+    try:
+        proc = subprocess.Popen(
+            command,
+            cwd=directory,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            errors="replace",
+        )
+    except OSError:
+        return None
+    timer = threading.Timer(timeout, proc.kill)
+    timer.start()
+    try:
+        with proc:
+            assert proc.stdout is not None
+            counts = main_file_kinds(proc.stdout, source, directory)
+    finally:
+        timer.cancel()
+    if proc.returncode != 0:
+        return None
+    return counts
+
+
+def load_ast_index(build_dir: str, commit: str) -> AstIndex | None:
+    """Return build_dir's AST index, None if missing or out of date."""
+    try:
+        with open(_index_path(build_dir)) as f:
+            index = AstIndex(**json.load(f))
+        key = _index_key(build_dir, commit)
+    except (OSError, ValueError, TypeError):
+        return None
+    return index if index.key == key else None
+
+
+def build_ast_index(
+    build_dir: str,
+    commit: str,
+    jobs: int = 1,
+    timeout: float = DEFAULT_AST_TIMEOUT,
+) -> tuple[AstIndex, bool]:
+    """Index the AST node kinds of the TUs in build_dir's compile DB.
+
+    That is the rewritten compile DB once analyze planned it, which holds
+    the TUs it analyzes, one entry each. Parsing every TU takes a while, so
+    the index is kept next to it and reused as long as the project commit
+    and compile DB are unchanged; returns it and whether it was reused. A
+    file with several entries is indexed by the first that parses.
+    """
+    index = load_ast_index(build_dir, commit)
+    if index is not None:
+        return index, True
+
+    key = _index_key(build_dir, commit)
+    with open(os.path.join(compile_db_dir(build_dir), "compile_commands.json")) as f:
+        entries: list[dict[str, Any]] = json.load(f)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        found = list(pool.map(lambda e: entry_kinds(e, timeout), entries))
+
+    kinds: dict[str, dict[str, int]] = {}
+    files = set()
+    for entry, histogram in zip(entries, found, strict=True):
+        path = os.path.normpath(os.path.join(entry["directory"], entry["file"]))
+        files.add(path)
+        if histogram is not None and path not in kinds:
+            kinds[path] = histogram
+
+    index = AstIndex(key, dict(sorted(kinds.items())), sorted(files - set(kinds)))
+    path = _index_path(build_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(asdict(index), f)
+    os.replace(tmp, path)
+    return index, False
+
+
+def cover_kinds(kinds: dict[str, set[str]], costs: dict[str, float]) -> list[str]:
+    """Pick files whose kinds together cover the kinds of all files.
+
+    Greedy set cover: the next file is the one adding the most kinds not
+    covered yet, the cheapest among those, then the first by path, so the
+    same index always gives the same files. The result is within a
+    logarithmic factor of the smallest cover.
+    """
+    uncovered = set().union(*kinds.values())
+    chosen = []
+    candidates = sorted(kinds)
+    while uncovered:
+        best = min(
+            candidates,
+            key=lambda f: (-len(kinds[f] & uncovered), costs.get(f, 0.0), f),
+        )
+        chosen.append(best)
+        uncovered -= kinds[best]
+        candidates.remove(best)
+    return chosen
@@ -0,0 +1,35 @@
+"""Diagnostics diff of a patched clang-tidy against a baseline binary."""
+
+import re
+from collections import Counter
+
+DIFF_FILE = "diff.jsonl"
+# The check timings of both binaries, written by perf_ab.py.
+PERF_FILE = "perf-ab.json"
+
+# A warning or error with the check that emitted it, as generate_report.py
+# reports them.
+_DIAGNOSTIC_RE = re.compile(r"^.+:\d+:\d+: (?:warning|error): .+ \[.+\]$")
+
+
+def _diagnostics(output: str) -> Counter[str]:
+    return Counter(
+        line for line in output.splitlines() if _DIAGNOSTIC_RE.match(line) is not None
+    )
+
+
+def diff_diagnostics(baseline: str, patched: str) -> tuple[list[str], list[str], int]:
+    """Compare the diagnostics of the baseline and the patched output of a TU.
+
+    Returns the diagnostics only the patched output has, those only the
+    baseline output has, and the number of diagnostics both have. Notes
+    and snippets are left out, so a diagnostic that only moved its notes
+    counts as unchanged.
+    """
+    base = _diagnostics(baseline)
+    new = _diagnostics(patched)
+    return (
+        sorted((new - base).elements()),
+        sorted((base - new).elements()),
+        (base & new).total(),
+    )
@@ -0,0 +1,234 @@
+"""Reuse of per-check results across LLVM revisions that left the checks alone.
+
+A result cache keyed by the clang-tidy binary misses on every nightly,
+since each one builds a new LLVM revision. Instead, each check's output for
+a TU is keyed by the git blobs of the check's implementation files, the
+clang-tidy framework and the Clang frontend, so it stays valid as long as
+none of them changed between the revisions.
+"""
+
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+from typing import Any
+
+from testers.result_cache import ResultCache
+
+_CLANG_TIDY_DIR = "clang-tools-extra/clang-tidy"
+
+# The clang-tidy framework every check builds on, besides the top-level
+# files of _CLANG_TIDY_DIR.
+_FRAMEWORK_DIRS = (f"{_CLANG_TIDY_DIR}/utils/",)
+
+# The Clang frontend that parses every TU and runs the AST matchers.
+FRONTEND_PATHS = tuple(
+    f"clang/{kind}/{lib}"
+    for kind in ("include/clang", "lib")
+    for lib in ("AST", "ASTMatchers", "Basic", "Frontend", "Lex", "Parse", "Sema")
+)
+
+# CheckFactories.registerCheck<misc::SomeCheck>("check-name") in the modules.
+_REGISTER_RE = re.compile(r'registerCheck<\s*([\w:]+)\s*>\(\s*"([^"]+)"')
+
+# A warning, error or remark, with the checks that emitted it.
+_HEADER_RE = re.compile(
+    r"^(.+?):(\d+):(\d+): (?:warning|error|remark): .*?(?: \[([^\]\s]+)\])?$"
+)
+
+# Compiler diagnostics and other output no check emitted are kept here.
+FRONTEND = ""
+
+DEFAULT_FULL_RUN_EVERY = 7
+
+_STATE_FILE = "check-reuse.json"
+
+
+def _git(llvm_src: str, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", llvm_src, *args], capture_output=True, text=True, check=True
+    ).stdout
+
+
+def _sha(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+def enabled_checks(
+    clang_tidy_bin: str, check_name: str, tidy_config: str | None
+) -> list[str]:
+    """The checks a check pattern and config enable, as clang-tidy lists them."""
+    cmd = [clang_tidy_bin, f"-checks=-*,{check_name}", "-list-checks"]
+    if tidy_config:
+        cmd.append(f"-config={tidy_config}")
+    output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    _header, _sep, listing = output.partition("Enabled checks:")
+    return [line.strip() for line in listing.splitlines() if line.strip()]
+
+
+def check_keys(
+    llvm_src: str, checks: list[str], settings: dict[str, Any]
+) -> dict[str, str]:
+    """Key every check by its sources at the LLVM checkout's HEAD.
+
+    A check's implementation files are the .cpp and .h files named after
+    the class its module registers it with. A check whose files cannot be
+    found gets no key, so its results are never reused. FRONTEND's key
+    covers only the framework, the frontend and settings, which every
+    other key includes as well.
+    """
+    blobs = {}
+    for line in _git(
+        llvm_src, "ls-tree", "-r", "HEAD", "--", _CLANG_TIDY_DIR
+    ).splitlines():
+        meta, _tab, path = line.partition("\t")
+        blobs[path] = meta.split()[2]
+    frontend = _git(llvm_src, "ls-tree", "HEAD", "--", *FRONTEND_PATHS)
+    framework = sorted(
+        (path, blob)
+        for path, blob in blobs.items()
+        if "/" not in path.removeprefix(f"{_CLANG_TIDY_DIR}/")
+        or path.startswith(_FRAMEWORK_DIRS)
+    )
+    base = _sha(settings, frontend.splitlines(), framework)
+
+    classes: dict[str, str] = {}
+    files: dict[str, list[str]] = {}
+    for path in blobs:
+        stem, ext = os.path.splitext(os.path.basename(path))
+        if ext in (".cpp", ".h"):
+            files.setdefault(stem, []).append(path)
+        if path.endswith("Module.cpp"):
+            with open(os.path.join(llvm_src, path)) as f:
+                for cls, name in _REGISTER_RE.findall(f.read()):
+                    classes[name] = cls.rsplit("::", 1)[-1]
+
+    keys = {FRONTEND: base}
+    for check in checks:
+        sources = files.get(classes.get(check, ""))
+        if sources:
+            keys[check] = _sha(base, sorted((p, blobs[p]) for p in sources))
+    return keys
+
+
+def split_by_check(output: str) -> dict[str, str]:
+    """Split clang-tidy output into the part of each check and FRONTEND's.
+
+    A diagnostic takes its notes and snippets along. A diagnostic several
+    aliased checks emitted goes to the first of them.
+    """
+    parts: dict[str, list[str]] = {}
+    current = FRONTEND
+    for line in output.splitlines(keepends=True):
+        m = _HEADER_RE.match(line.rstrip("\n"))
+        if m:
+            check = (m.group(4) or "").split(",")[0]
+            current = FRONTEND if check.startswith("clang-diagnostic-") else check
+        parts.setdefault(current, []).append(line)
+    return {check: "".join(lines) for check, lines in parts.items()}
+
+
+def diagnostics(output: str) -> set[str]:
+    """The warnings, errors and remarks of clang-tidy output, to compare runs."""
+    return {line for line in output.splitlines() if _HEADER_RE.match(line) is not None}
+
+
+def join_checks(parts: dict[str, str]) -> str:
+    """Merge the parts of split_by_check() back into clang-tidy's order.
+
+    clang-tidy sorts its diagnostics by file and position; output outside
+    any diagnostic comes first.
+    """
+    leading: list[str] = []
+    blocks: list[tuple[tuple[str, int, int, str], list[str]]] = []
+    for check in sorted(parts):
+        for line in parts[check].splitlines(keepends=True):
+            m = _HEADER_RE.match(line.rstrip("\n"))
+            if m:
+                position = (m.group(1), int(m.group(2)), int(m.group(3)), check)
+                blocks.append((position, [line]))
+            elif blocks and blocks[-1][0][3] == check:
+                blocks[-1][1].append(line)
+            else:
+                leading.append(line)
+    blocks.sort(key=lambda block: block[0])
+    return "".join(leading) + "".join("".join(lines) for _pos, lines in blocks)
+
+
+class CheckReuse:
+    """Per-check outputs of TUs, stored in a result cache.
+
+    With full set, nothing is reused; the outputs that would have been are
+    kept to verify the keys against what the full run produces.
+    """
+
+    def __init__(
+        self,
+        cache: ResultCache,
+        keys: dict[str, str],
+        checks: list[str],
+        full: bool = False,
+    ) -> None:
+        self.cache = cache
+        self.keys = keys
+        self.checks = checks
+        self.full = full
+
+    def _key(self, check: str, closure: str) -> str | None:
+        key = self.keys.get(check)
+        return _sha(key, closure) if key is not None else None
+
+    def lookup(self, closure: str) -> tuple[dict[str, str], list[str]]:
+        """Return the stored parts of a TU and the checks it lacks.
+
+        Without FRONTEND's part, nothing is known about the TU.
+        """
+        parts: dict[str, str] = {}
+        missing = []
+        for check in [FRONTEND, *self.checks]:
+            key = self._key(check, closure)
+            stored = self.cache.get(key) if key is not None else None
+            if stored is not None:
+                parts[check] = stored["output"]
+            elif check == FRONTEND:
+                return {}, list(self.checks)
+            else:
+                missing.append(check)
+        return parts, missing
+
+    def store(self, closure: str, checks: list[str], output: str) -> None:
+        """Store the parts of a TU's output that the given checks produced."""
+        parts = split_by_check(output)
+        for check in [FRONTEND, *checks]:
+            key = self._key(check, closure)
+            if key is not None:
+                self.cache.put(key, parts.get(check, ""), 0.0)
+
+
+def due_for_full_run(directory: str, every: int) -> bool:
+    """Whether the last every - 1 runs reused results, so this one must not."""
+    try:
+        with open(os.path.join(directory, _STATE_FILE)) as f:
+            since_full = json.load(f)["runs_since_full"]
+    except (OSError, ValueError, KeyError) as e:
+        if not isinstance(e, FileNotFoundError):
+            print(f"Warning: ignoring {_STATE_FILE}: {e}", file=sys.stderr)
+        return True
+    return bool(since_full + 1 >= every)
+
+
+def record_run(directory: str, full: bool) -> None:
+    """Count a run towards the next full run."""
+    path = os.path.join(directory, _STATE_FILE)
+    since_full = 0
+    if not full:
+        try:
+            with open(path) as f:
+                since_full = json.load(f)["runs_since_full"] + 1
+        except (OSError, ValueError, KeyError):
+            since_full = 1
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"runs_since_full": since_full}, f)
@@ -6,6 +6,9 @@ from dataclasses import dataclass
 
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "projects.json")
 PROJECTS_DIR = "test_projects"
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "ctit"
+)
 
 
 @dataclass
@@ -0,0 +1,521 @@
+"""Hand out the TUs of an analysis run to worker processes over a socket.
+
+The protocol is one JSON object per line. A worker opens one connection
+per parallel job and sends "hello"; the coordinator answers with "setup",
+holding the run settings, and the worker replies "ready" with the
+fingerprint of its clang-tidy binary and those settings. From then on the
+coordinator sends one "task" at a time and the worker answers each with a
+"result", until the coordinator sends "done". While clang-tidy runs, the
+worker sends a "heartbeat" every few seconds. A worker with a different
+fingerprint gets "reject". The TU of a connection that is closed or misses
+its heartbeats goes back to the queue, up to a few times; a TU that loses
+that many workers counts as a crash.
+"""
+
+import json
+import os
+import shutil
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import cache
+from io import BufferedIOBase
+from typing import Any
+
+from testers.analyze import (
+    DEFAULT_CLANG_TIDY_BIN,
+    DEFAULT_LOG_DIR,
+    DEFAULT_MAX_DIAGNOSTICS,
+    DEFAULT_TU_MEMORY_LIMIT_MB,
+    DEFAULT_TU_TIMEOUT,
+    CompileDbPlan,
+    ProjectWork,
+    SchedulerOptions,
+    TidyResult,
+    TranslationUnit,
+    TuLimits,
+    WorkTracker,
+    clang_tidy_command,
+    get_analysis_configs,
+    compile_db_plans,
+    plan_compile_db,
+    plan_projects,
+    project_work,
+    remove_stale_reports,
+    run_settings,
+    run_translation_unit,
+)
+from testers.config import CONFIG_FILE, PROJECTS_DIR, load_projects
+from testers.history import DEFAULT_HISTORY_FILE, TuHistory
+from testers.journal import JOURNAL_FILE, Journal, run_fingerprint
+from testers.resources import detect_limits
+from testers.results import RESULTS_FILE, ResultLog
+from testers.rewrite import RewriteRules
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+_PROTOCOL_VERSION = 5
+
+# How long a worker keeps retrying to reach a coordinator that is not up yet.
+DEFAULT_CONNECT_TIMEOUT = 60.0
+
+# How often a worker reports that it is still analyzing a TU, and how long
+# the coordinator waits for a message before it counts the worker as lost.
+_HEARTBEAT_SECONDS = 10.0
+_HEARTBEAT_TIMEOUT = 60.0
+
+# How many workers a TU may lose before it is recorded as a crash.
+_MAX_ATTEMPTS = 3
+
+
+def parse_address(spec: str) -> tuple[socket.AddressFamily, Any]:
+    """Parse "HOST:PORT" for TCP or "unix:PATH" for a Unix socket."""
+    if spec.startswith("unix:"):
+        return socket.AF_UNIX, spec.removeprefix("unix:")
+    host, sep, port = spec.rpartition(":")
+    if not sep or not port.isdigit():
+        raise ValueError(f"expected HOST:PORT or unix:PATH, got '{spec}'")
+    return socket.AF_INET, (host, int(port))
+
+
+def _send(wfile: BufferedIOBase, message: dict[str, Any]) -> None:
+    wfile.write(json.dumps(message).encode() + b"\n")
+    wfile.flush()
+
+
+def _receive(rfile: BufferedIOBase) -> dict[str, Any] | None:
+    """Read the next message; None once the peer closed the connection."""
+    line = rfile.readline()
+    if not line:
+        return None
+    message: dict[str, Any] = json.loads(line)
+    return message
+
+
+@dataclass
+class _Task:
+    id: int
+    work: ProjectWork
+    unit: TranslationUnit
+    attempts: int = 0
+
+
+class TaskQueue:
+    """TUs waiting for a worker, longest first, and those being analyzed."""
+
+    def __init__(self, work: list[ProjectWork]) -> None:
+        pending = [(w, u) for w in work for u in w.pending_units()]
+        pending.sort(key=lambda x: -x[1].cost)
+        self._queue = deque(_Task(i, w, u) for i, (w, u) in enumerate(pending))
+        self._remaining = len(self._queue)
+        self._cond = threading.Condition()
+
+    def take(self) -> _Task | None:
+        """Wait for the next TU; None once every TU is done.
+
+        While the queue is empty but TUs are still being analyzed, this
+        waits, since a lost worker may put its TU back.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._queue or not self._remaining)
+            return self._queue.popleft() if self._queue else None
+
+    def requeue(self, task: _Task) -> None:
+        with self._cond:
+            self._queue.appendleft(task)
+            self._cond.notify()
+
+    def complete(self) -> None:
+        with self._cond:
+            self._remaining -= 1
+            self._cond.notify_all()
+
+    def wait_done(self) -> None:
+        with self._cond:
+            self._cond.wait_for(lambda: not self._remaining)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: "_CoordinatorServer"
+
+    def handle(self) -> None:
+        server = self.server
+        try:
+            hello = _receive(self.rfile)
+            if hello is None or hello.get("version") != _PROTOCOL_VERSION:
+                _send(self.wfile, {"type": "reject", "reason": "protocol mismatch"})
+                return
+            _send(self.wfile, {"type": "setup", "settings": server.settings})
+            ready = _receive(self.rfile)
+            if ready is None or ready.get("fingerprint") != server.fingerprint:
+                _send(
+                    self.wfile,
+                    {
+                        "type": "reject",
+                        "reason": "different clang-tidy binary or settings",
+                    },
+                )
+                print(f"Rejected worker {hello.get('worker')}: fingerprint mismatch")
+                return
+        except (OSError, ValueError):
+            return
+
+        self.request.settimeout(_HEARTBEAT_TIMEOUT)
+        worker = hello.get("worker", "?")
+        while (task := server.tasks.take()) is not None:
+            if server.tracker.flooded(task.work):
+                server.tracker.skip(task.work, [task.unit])
+                server.tasks.complete()
+                continue
+            try:
+                _send(
+                    self.wfile,
+                    {
+                        "type": "task",
+                        "id": task.id,
+                        "project": task.work.name,
+                        "file": task.unit.key,
+                    },
+                )
+                result = _receive(self.rfile)
+                while result is not None and result.get("type") == "heartbeat":
+                    result = _receive(self.rfile)
+            except (OSError, ValueError):
+                result = None
+            if result is None or result.get("id") != task.id:
+                self._lost(worker, task)
+                return
+
+            server.tracker.record(
+                task.work,
+                TidyResult(
+                    unit=task.unit,
+                    invocation=result["invocation"],
+                    returncode=result["returncode"],
+                    output=result["output"],
+                    elapsed=result["elapsed"],
+                    peak_rss_kb=result["peak_rss_kb"],
+                    read_blocks=result["read_blocks"],
+                    limit_exceeded=result["limit_exceeded"],
+                    started=result["started"],
+                    cpu=result["cpu"],
+                ),
+            )
+            server.tasks.complete()
+        try:
+            _send(self.wfile, {"type": "done"})
+        except OSError:
+            pass
+
+    def _lost(self, worker: str, task: _Task) -> None:
+        """Requeue the TU of a lost worker, or record it as a crash."""
+        server = self.server
+        task.attempts += 1
+        if task.attempts < _MAX_ATTEMPTS:
+            print(f"Lost worker {worker}; requeueing {task.unit.file}")
+            server.tasks.requeue(task)
+            return
+        print(
+            f"Lost worker {worker}; {task.unit.file} lost {task.attempts} "
+            "workers, recording it as a crash"
+        )
+        # Without a result, the likeliest end of the workers is the OOM killer.
+        server.tracker.record(
+            task.work,
+            TidyResult(
+                unit=task.unit,
+                invocation=[*task.work.command, task.unit.file],
+                returncode=-signal.SIGKILL,
+                output=f"Lost {task.attempts} workers analyzing {task.unit.file}\n",
+                elapsed=0.0,
+                started=time.time(),
+            ),
+        )
+        server.tasks.complete()
+
+
+class _CoordinatorServer(socketserver.ThreadingMixIn, socketserver.BaseServer):
+    daemon_threads = True
+
+    settings: dict[str, Any]
+    fingerprint: str
+    tasks: TaskQueue
+    tracker: WorkTracker
+
+
+class _TCPServer(_CoordinatorServer, socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+class _UnixServer(_CoordinatorServer, socketserver.UnixStreamServer):
+    pass
+
+
+def _make_server(address: str) -> _CoordinatorServer:
+    family, addr = parse_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(addr):
+            os.unlink(addr)
+        return _UnixServer(addr, _Handler)
+    return _TCPServer(addr, _Handler)
+
+
+def run_coordinator(
+    check_name: str,
+    tidy_config: str | None = None,
+    work_dir: str = PROJECTS_DIR,
+    clang_tidy_bin: str = DEFAULT_CLANG_TIDY_BIN,
+    log_dir: str = DEFAULT_LOG_DIR,
+    config_path: str = CONFIG_FILE,
+    skip_headers: bool = False,
+    address: str = DEFAULT_ADDRESS,
+    history_file: str = DEFAULT_HISTORY_FILE,
+    resume: bool = False,
+    tu_timeout: float = DEFAULT_TU_TIMEOUT,
+    tu_memory_limit_mb: int = DEFAULT_TU_MEMORY_LIMIT_MB,
+    max_diagnostics: int = DEFAULT_MAX_DIAGNOSTICS,
+    rewrite: bool = True,
+    drop_flag_groups: list[str] | None = None,
+) -> None:
+    """Analyze all projects with the TUs handed out to connecting workers.
+
+    Writes the same logs, journal and history as analyze --global-queue;
+    the compilation databases must be present on the coordinator as well.
+    clang_tidy_bin only identifies the binary every worker must run. The
+    compile DB plans are part of the settings, so the workers plan their
+    compile DBs the same way.
+    """
+    if not shutil.which(clang_tidy_bin) and not os.path.isfile(clang_tidy_bin):
+        print(
+            f"Error: clang-tidy binary not found: {clang_tidy_bin}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    projects = load_projects(config_path)
+    configs = get_analysis_configs(config_path)
+    os.makedirs(log_dir, exist_ok=True)
+    progress_file = os.path.join(log_dir, "progress.log")
+    remove_stale_reports(log_dir)
+
+    limits = TuLimits(tu_timeout or None, tu_memory_limit_mb or None)
+    plans = compile_db_plans(projects, configs, rewrite, drop_flag_groups or [])
+    plan_projects(projects, work_dir, plans)
+    settings = run_settings(check_name, tidy_config, skip_headers, False, limits, plans)
+    fingerprint = run_fingerprint(clang_tidy_bin, settings)
+    journal = Journal.open(os.path.join(log_dir, JOURNAL_FILE), fingerprint, resume)
+    options = SchedulerOptions(
+        jobs=1,
+        history=TuHistory.load(history_file),
+        limits=limits,
+        max_diagnostics=max_diagnostics or None,
+        journal=journal,
+        results=ResultLog(os.path.join(log_dir, RESULTS_FILE), journal.resumed),
+    )
+
+    with (
+        open(progress_file, "w") as progress,
+        project_work(
+            projects,
+            configs,
+            work_dir,
+            clang_tidy_bin,
+            check_name,
+            log_dir,
+            tidy_config,
+            skip_headers,
+            options=options,
+        ) as work,
+    ):
+        tracker = WorkTracker(work, progress, options, f"on workers of {address}")
+        tasks = TaskQueue(work)
+        server = _make_server(address)
+        server.settings = settings
+        server.fingerprint = fingerprint
+        server.tasks = tasks
+        server.tracker = tracker
+        serving = threading.Thread(target=server.serve_forever, daemon=True)
+        serving.start()
+        print(f"Coordinator listening on {address}")
+        try:
+            tasks.wait_done()
+        finally:
+            server.shutdown()
+            server.server_close()
+            if isinstance(server, _UnixServer):
+                os.unlink(str(server.server_address))
+
+    print(f"Analyzed {tracker.done} TUs. Logs saved to {log_dir}")
+
+
+_plan_lock = threading.Lock()
+_planned: set[tuple[str, str]] = set()
+
+
+def _plan_once(source_dir: str, plan: dict[str, Any]) -> None:
+    """Plan the project's compile DB unless this process already did."""
+    key = (source_dir, json.dumps(plan, sort_keys=True))
+    with _plan_lock:
+        if key not in _planned:
+            build_dir = os.path.join(source_dir, "build")
+            rules = RewriteRules(**plan["rules"])
+            plan_compile_db(
+                build_dir, source_dir, CompileDbPlan(plan["file_regex"], rules)
+            )
+            _planned.add(key)
+
+
+@cache
+def _fingerprint(clang_tidy_bin: str, settings: str) -> str:
+    return run_fingerprint(clang_tidy_bin, json.loads(settings))
+
+
+def _connect(address: str, timeout: float) -> socket.socket:
+    family, addr = parse_address(address)
+    deadline = time.monotonic() + timeout
+    while True:
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.connect(addr)
+            return sock
+        except OSError:
+            sock.close()
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.5)
+
+
+def _worker_connection(
+    address: str,
+    clang_tidy_bin: str,
+    work_dir: str,
+    name: str,
+    connect_timeout: float,
+) -> int:
+    """Analyze TUs over one connection until the coordinator is done.
+
+    Returns the number of analyzed TUs, or -1 if the coordinator rejected
+    this worker.
+    """
+    analyzed = 0
+    with (
+        _connect(address, connect_timeout) as sock,
+        sock.makefile("rb") as rfile,
+        sock.makefile("wb") as wfile,
+        ThreadPoolExecutor(max_workers=1) as runner,
+    ):
+        _send(wfile, {"type": "hello", "version": _PROTOCOL_VERSION, "worker": name})
+        setup = _receive(rfile)
+        if setup is None or setup["type"] != "setup":
+            print(f"Error: coordinator refused {name}: {setup}", file=sys.stderr)
+            return -1
+        settings = setup["settings"]
+        fingerprint = _fingerprint(clang_tidy_bin, json.dumps(settings, sort_keys=True))
+        _send(wfile, {"type": "ready", "fingerprint": fingerprint})
+        limits = TuLimits(settings["timeout"], settings["memory_mb"])
+
+        while (message := _receive(rfile)) is not None:
+            if message["type"] == "reject":
+                print(
+                    f"Error: coordinator rejected {name}: {message['reason']}",
+                    file=sys.stderr,
+                )
+                return -1
+            if message["type"] != "task":
+                break
+
+            source_dir = os.path.abspath(os.path.join(work_dir, message["project"]))
+            build_dir = os.path.join(source_dir, "build")
+            _plan_once(source_dir, settings["plans"][message["project"]])
+            unit = TranslationUnit(
+                message["project"],
+                os.path.join(source_dir, message["file"]),
+                build_dir,
+                source_dir,
+            )
+            command = clang_tidy_command(
+                clang_tidy_bin,
+                build_dir,
+                settings["check"],
+                settings["config"],
+                settings["skip_headers"],
+            )
+            running = runner.submit(run_translation_unit, command, unit, limits=limits)
+            while not wait([running], timeout=_HEARTBEAT_SECONDS).done:
+                _send(wfile, {"type": "heartbeat", "id": message["id"]})
+            result = running.result()
+            _send(
+                wfile,
+                {
+                    "type": "result",
+                    "id": message["id"],
+                    "invocation": result.invocation,
+                    "returncode": result.returncode,
+                    "output": result.output,
+                    "elapsed": result.elapsed,
+                    "peak_rss_kb": result.peak_rss_kb,
+                    "read_blocks": result.read_blocks,
+                    "limit_exceeded": result.limit_exceeded,
+                    "started": result.started,
+                    "cpu": result.cpu,
+                },
+            )
+            analyzed += 1
+    return analyzed
+
+
+def run_worker(
+    address: str = DEFAULT_ADDRESS,
+    clang_tidy_bin: str = DEFAULT_CLANG_TIDY_BIN,
+    work_dir: str = PROJECTS_DIR,
+    jobs: int | None = None,
+    connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+) -> None:
+    """Analyze TUs handed out by a coordinator with jobs parallel clang-tidy runs.
+
+    The projects must be checked out and configured in work_dir at the same
+    commits as on the coordinator.
+    """
+    if not shutil.which(clang_tidy_bin) and not os.path.isfile(clang_tidy_bin):
+        print(
+            f"Error: clang-tidy binary not found: {clang_tidy_bin}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    jobs = jobs or detect_limits().cpus
+    host = socket.gethostname()
+    counts: list[int | None] = []
+
+    def connection(index: int) -> None:
+        name = f"{host}:{os.getpid()}/{index}"
+        try:
+            counts.append(
+                _worker_connection(
+                    address, clang_tidy_bin, work_dir, name, connect_timeout
+                )
+            )
+        except OSError as e:
+            print(f"Warning: {name} lost the coordinator: {e}", file=sys.stderr)
+            counts.append(None)
+
+    print(f"Worker analyzing with {jobs} jobs for coordinator {address}")
+    threads = [threading.Thread(target=connection, args=(i,)) for i in range(jobs)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    finished = [c for c in counts if c is not None]
+    print(f"Worker finished: analyzed {sum(c for c in finished if c > 0)} TUs")
+    # A connection that comes up while the coordinator shuts down is lost
+    # without harm, as long as another one saw the run through.
+    if any(c < 0 for c in finished) or not finished:
+        print("Error: the worker did not complete the run", file=sys.stderr)
+        sys.exit(1)
@@ -6,11 +6,18 @@ import sys
 from dataclasses import dataclass, field
 from typing import TextIO
 
+from testers.baseline import DIFF_FILE
 from testers.config import load_projects
+from testers.perf_ab import PERF_FILE, Comparison, PerfSummary, load_perf
+from testers.results import read_results
 
 DEFAULT_LOG_DIR = "logs"
 DEFAULT_OUTPUT_FILE = "issue.md"
 
+# Regex to capture standard clang-tidy output format:
+# Example: /path/to/file.cpp:10:5: warning: message [check-name]
+ISSUE_PATTERN = re.compile(r"^(.+):(\d+):(\d+): (warning|error): (.+) \[(.+)\]$")
+
 
 @dataclass
 class Issue:
@@ -33,7 +40,13 @@ class ProjectResult:
     warnings_count: int = 0
     errors_count: int = 0
     has_crash: bool = False
+    stopped_early: str | None = None
     issues: list[Issue] = field(default_factory=list)
+    # (file, first error) of TUs that fail to parse with any check
+    parse_failures: list[tuple[str, str]] = field(default_factory=list)
+    # TUs the identifier prefilter skipped, of how many
+    prefiltered: int = 0
+    prefilter_total: int = 0
 
     @property
     def status_emoji(self) -> str:
@@ -58,6 +71,18 @@ class ProjectResult:
         return "Pass"
 
 
+@dataclass
+class ProjectDiff:
+    """Diagnostics a patched clang-tidy adds and removes in a project."""
+
+    name: str
+    added: list[Issue] = field(default_factory=list)
+    removed: list[Issue] = field(default_factory=list)
+    unchanged: int = 0
+    # TUs on which the baseline crashed or hit a limit
+    baseline_failures: list[str] = field(default_factory=list)
+
+
 def get_relative_path(full_path: str, project_name: str) -> str:
     """
     Extracts the relative path of a file within the project.
@@ -93,9 +118,8 @@ def parse_log_file(log_path: str) -> ProjectResult:
     project_name = os.path.basename(log_path).replace(".log", "")
     result = ProjectResult(name=project_name)
 
-    # Regex to capture standard clang-tidy output format:
-    # Example: /path/to/file.cpp:10:5: warning: message [check-name]
-    issue_pattern = re.compile(r"^(.+):(\d+):(\d+): (warning|error): (.+) \[(.+)\]$")
+    parse_failure_pattern = re.compile(r"^CTIT PARSE-FAILURE: (.+?) \([^)]*\): (.*)$")
+    prefilter_pattern = re.compile(r"^CTIT PREFILTER: skipped (\d+) of (\d+) TUs")
 
     # Deduplicate by (file_path, line, col, check_name)
     seen: set[tuple[str, int, int, str]] = set()
@@ -112,7 +136,31 @@ def parse_log_file(log_path: str) -> ProjectResult:
                 result.has_crash = True
                 continue
 
-            match = issue_pattern.match(line)
+            # Analysis stopped because the check flooded diagnostics
+            if line.startswith("CTIT FLOOD: "):
+                result.stopped_early = line.removeprefix("CTIT FLOOD: ")
+                continue
+
+            # TUs containing none of the checks' trigger identifiers; a
+            # log merged by merge_logs.py has one line per shard
+            prefilter = prefilter_pattern.match(line)
+            if prefilter:
+                result.prefiltered += int(prefilter.group(1))
+                result.prefilter_total += int(prefilter.group(2))
+                continue
+
+            # TU that fails to parse no matter which check runs
+            failure = parse_failure_pattern.match(line)
+            if failure:
+                result.parse_failures.append(
+                    (
+                        get_relative_path(failure.group(1), project_name),
+                        failure.group(2),
+                    )
+                )
+                continue
+
+            match = ISSUE_PATTERN.match(line)
             if match:
                 raw_path, line_num, col_num, severity, message, check_name = (
                     match.groups()
@@ -153,9 +201,67 @@ def parse_log_file(log_path: str) -> ProjectResult:
     except OSError as e:
         print(f"Error reading {log_path}: {e}", file=sys.stderr)
 
+    # Compiler errors in files that fail to parse anyway are no check errors.
+    failing = {path for path, _error in result.parse_failures}
+    parse_errors = [
+        issue
+        for issue in result.issues
+        if issue.check_name == "clang-diagnostic-error" and issue.file_path in failing
+    ]
+    for issue in parse_errors:
+        result.issues.remove(issue)
+        result.errors_count -= 1
+
     return result
 
 
+def parse_diff_file(diff_path: str) -> dict[str, ProjectDiff]:
+    """Read the baseline diffs of an analyze run, by project.
+
+    A diagnostic in a header is diffed once per TU including it, but
+    listed once.
+    """
+    diffs: dict[str, ProjectDiff] = {}
+    seen: set[tuple[str, str, int, int, str, str]] = set()
+    for record in read_results(diff_path):
+        project = record["project"]
+        diff = diffs.setdefault(project, ProjectDiff(name=project))
+        diff.unchanged += record["unchanged"]
+        if record["baseline_crashed"] or record["baseline_limit_exceeded"]:
+            diff.baseline_failures.append(record["file"])
+        for kind, issues in (("added", diff.added), ("removed", diff.removed)):
+            for line in record[kind]:
+                match = ISSUE_PATTERN.match(line)
+                if not match:
+                    continue
+                raw_path, line_num, col_num, severity, message, check_name = (
+                    match.groups()
+                )
+                rel_path = get_relative_path(raw_path, project)
+                key = (kind, rel_path, int(line_num), int(col_num), check_name, message)
+                if key in seen:
+                    continue
+                seen.add(key)
+                issues.append(
+                    Issue(
+                        file_path=rel_path,
+                        line=int(line_num),
+                        col=int(col_num),
+                        severity=severity,
+                        message=message,
+                        check_name=check_name,
+                    )
+                )
+    return diffs
+
+
+def _location(issue: Issue, base_url: str | None) -> str:
+    if base_url:
+        link = f"{base_url}/{issue.file_path}#L{issue.line}"
+        return f"[{issue.file_path}:{issue.line}]({link})"
+    return f"{issue.file_path}:{issue.line}"
+
+
 def write_summary_table(f: TextIO, results: list[ProjectResult]) -> None:
     """Writes the high-level summary table to the markdown file."""
     f.write("### Clang-Tidy Integration Test Results\n\n")
@@ -164,6 +270,8 @@ def write_summary_table(f: TextIO, results: list[ProjectResult]) -> None:
 
     for res in results:
         status_display = f"{res.status_emoji} {res.status_text}"
+        if res.stopped_early:
+            status_display += " (stopped early)"
         crash_mark = "YES" if res.has_crash else "-"
         f.write(
             f"| **{res.name}** | {status_display} "
@@ -171,6 +279,29 @@ def write_summary_table(f: TextIO, results: list[ProjectResult]) -> None:
             f"| {crash_mark} |\n"
         )
 
+    notes = (
+        [
+            f"⏹️ **{res.name}**: analysis {res.stopped_early}."
+            for res in results
+            if res.stopped_early
+        ]
+        + [
+            f"🧱 **{res.name}**: {len(res.parse_failures)} TUs fail to parse with any "
+            "check; they are listed in the details, not counted as errors."
+            for res in results
+            if res.parse_failures
+        ]
+        + [
+            f"🔎 **{res.name}**: skipped {res.prefiltered} of {res.prefilter_total} TUs "
+            "containing none of the checks' trigger identifiers."
+            for res in results
+            if res.prefiltered
+        ]
+    )
+    if notes:
+        f.write("\n")
+        f.writelines(f"{note}\n" for note in notes)
+
     f.write("\n---\n")
 
 
@@ -178,7 +309,7 @@ def write_project_details(
     f: TextIO, result: ProjectResult, project_urls: dict[str, str]
 ) -> None:
     """Writes the detailed breakdown of issues for a single project."""
-    if not result.issues and not result.has_crash:
+    if not result.issues and not result.has_crash and not result.parse_failures:
         return
 
     summary_text = f"{result.name} Details ({result.warnings_count} warnings, {result.errors_count} errors)"
@@ -190,12 +321,7 @@ def write_project_details(
     base_url = project_urls.get(result.name)
 
     for issue in result.issues:
-        if base_url:
-            link = f"{base_url}/{issue.file_path}#L{issue.line}"
-            loc_text = f"[{issue.file_path}:{issue.line}]({link})"
-        else:
-            loc_text = f"{issue.file_path}:{issue.line}"
-
+        loc_text = _location(issue, base_url)
         icon = "🛑" if issue.severity == "error" else "⚠️"
 
         f.write(f"#### {icon} {loc_text}\n")
@@ -204,9 +330,108 @@ def write_project_details(
         if issue.context:
             f.write(f"  ```cpp\n  {issue.context}\n  ```\n")
 
+    if result.parse_failures:
+        f.write("\n#### 🧱 TUs that fail to parse with any check\n")
+        f.writelines(f"- `{path}`: {error}\n" for path, error in result.parse_failures)
+
     f.write("\n</details>\n")
 
 
+def write_diff_report(
+    f: TextIO,
+    results: list[ProjectResult],
+    diffs: dict[str, ProjectDiff],
+    project_urls: dict[str, str],
+) -> None:
+    """Writes the diagnostics added and removed compared with the baseline."""
+    f.write("### Clang-Tidy Differential Results\n\n")
+    f.write("Warnings the patched clang-tidy adds or removes compared with the ")
+    f.write("baseline binary; unchanged warnings are only counted.\n\n")
+    f.write("| Project | Added | Removed | Unchanged | Crash |\n")
+    f.write("| :--- | :--- | :--- | :--- | :--- |\n")
+    for res in results:
+        diff = diffs.get(res.name, ProjectDiff(name=res.name))
+        crash_mark = "YES" if res.has_crash else "-"
+        f.write(
+            f"| **{res.name}** | {len(diff.added)} | {len(diff.removed)} "
+            f"| {diff.unchanged} | {crash_mark} |\n"
+        )
+
+    notes = [
+        f"⚠️ **{diff.name}**: the baseline crashed or hit a limit on "
+        f"{len(diff.baseline_failures)} TUs, so warnings look added there."
+        for diff in diffs.values()
+        if diff.baseline_failures
+    ]
+    if notes:
+        f.write("\n")
+        f.writelines(f"{note}\n" for note in notes)
+    f.write("\n---\n")
+
+    for res in results:
+        changes = diffs.get(res.name)
+        if changes is None or not (changes.added or changes.removed):
+            continue
+        base_url = project_urls.get(res.name)
+        f.write(
+            f"\n<details>\n<summary><strong>{res.name} Diff "
+            f"(+{len(changes.added)}, -{len(changes.removed)})</strong>"
+            "</summary>\n\n"
+        )
+        for icon, issues in (("➕", changes.added), ("➖", changes.removed)):
+            for issue in issues:
+                f.write(f"#### {icon} {_location(issue, base_url)}\n")
+                f.write(f"{issue.message} `[{issue.check_name}]`\n")
+        f.write("\n</details>\n")
+
+
+def _perf_row(c: Comparison) -> str:
+    icon = "🐢 " if c.slower else "🚀 " if c.faster else ""
+    return (
+        f"| {icon}`{c.name}` | {c.baseline:.3f} | {c.patched:.3f} "
+        f"| {c.ratio:.2f}× | {c.low:.2f}×–{c.high:.2f}× |\n"
+    )
+
+
+def write_perf_section(f: TextIO, perf: PerfSummary, top: int = 10) -> None:
+    """Writes the timing comparison with the baseline, checks under test first.
+
+    Of the other checks and of the TUs, only the top ones by ratio are listed.
+    """
+    f.write("\n### Check Performance (patched vs. baseline)\n\n")
+    f.write(
+        f"{perf.repetitions} interleaved repetitions on {perf.tus} TUs; wall "
+        "time per repetition and the ratio of patched to baseline time, with "
+        "its 95% confidence interval.\n\n"
+    )
+    slower = [c for c in perf.tested if c.slower]
+    if slower:
+        f.writelines(
+            f"🐢 **`{c.name}` is significantly slower**: {c.ratio:.2f}× "
+            f"({c.low:.2f}×–{c.high:.2f}×).\n"
+            for c in slower
+        )
+    elif perf.tested:
+        f.write("✅ No significant slowdown of the checks under test.\n")
+    else:
+        f.write(f"_No profile of a check matching `{perf.checks_pattern}`._\n")
+        return
+
+    header = "| {} | Baseline (s) | Patched (s) | Ratio | 95% CI |\n"
+    f.write("\n" + header.format("Check") + "| :--- | ---: | ---: | ---: | :--- |\n")
+    f.writelines(_perf_row(c) for c in perf.tested)
+    f.writelines(_perf_row(c) for c in perf.others[:top])
+
+    if perf.units:
+        f.write(
+            f"\n<details>\n<summary>Slowest {min(top, len(perf.units))} TUs "
+            "relative to the baseline</summary>\n\n"
+        )
+        f.write(header.format("TU") + "| :--- | ---: | ---: | ---: | :--- |\n")
+        f.writelines(_perf_row(c) for c in perf.units[:top])
+        f.write("\n</details>\n")
+
+
 def write_ai_report_template(
     f: TextIO,
     results: list[ProjectResult],
@@ -226,11 +451,7 @@ def write_ai_report_template(
         base_url = project_urls.get(res.name)
         for issue in res.issues:
             n += 1
-            if base_url:
-                link = f"{base_url}/{issue.file_path}#L{issue.line}"
-                loc_text = f"[{issue.file_path}:{issue.line}]({link})"
-            else:
-                loc_text = f"{issue.file_path}:{issue.line}"
+            loc_text = _location(issue, base_url)
             f.write(f"| {n} | {res.name} | TBD | TBD | {loc_text} |\n")
 
     if n == 0:
@@ -247,6 +468,8 @@ def generate_markdown(
     results: list[ProjectResult],
     output_path: str,
     project_urls: dict[str, str] | None = None,
+    perf: PerfSummary | None = None,
+    preamble: str | None = None,
 ) -> None:
     """Writes the human-facing warnings report (issue.md)."""
     if project_urls is None:
@@ -254,9 +477,13 @@ def generate_markdown(
 
     try:
         with open(output_path, "w") as f:
+            if preamble:
+                f.write(f"{preamble}\n\n")
             write_summary_table(f, results)
             for res in results:
                 write_project_details(f, res, project_urls)
+            if perf is not None:
+                write_perf_section(f, perf)
         print(f"Report generated: {output_path}")
     except OSError as e:
         print(f"Error writing report to {output_path}: {e}", file=sys.stderr)
@@ -287,9 +514,39 @@ def _load_results(log_dir: str) -> tuple[list[ProjectResult], dict[str, str]]:
     return results, project_urls
 
 
-def generate_report(log_dir: str, output: str) -> None:
+def _load_perf(log_dir: str) -> PerfSummary | None:
+    path = os.path.join(log_dir, PERF_FILE)
+    if not os.path.isfile(path):
+        return None
+    try:
+        return load_perf(path)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Warning: could not read {path}: {e}", file=sys.stderr)
+        return None
+
+
+def generate_report(log_dir: str, output: str, preamble: str | None = None) -> None:
+    """Writes issue.md, only the diff to the baseline if the run had one.
+
+    Check timings of a 'ctit perf-ab' run in log_dir are added as a section;
+    preamble, if given, goes above everything else.
+    """
     results, project_urls = _load_results(log_dir)
-    generate_markdown(results, output, project_urls)
+    perf = _load_perf(log_dir)
+    diff_path = os.path.join(log_dir, DIFF_FILE)
+    if not os.path.isfile(diff_path):
+        generate_markdown(results, output, project_urls, perf, preamble)
+        return
+    try:
+        with open(output, "w") as f:
+            if preamble:
+                f.write(f"{preamble}\n\n")
+            write_diff_report(f, results, parse_diff_file(diff_path), project_urls)
+            if perf is not None:
+                write_perf_section(f, perf)
+        print(f"Differential report generated: {output}")
+    except OSError as e:
+        print(f"Error writing report to {output}: {e}", file=sys.stderr)
 
 
 def generate_template(log_dir: str, output: str) -> None:
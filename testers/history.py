@@ -0,0 +1,156 @@
+"""Per-TU run history used to schedule the slowest TUs first."""
+
+import json
+import os
+import statistics
+import sys
+from typing import Any
+
+from testers.config import CACHE_DIR
+
+DEFAULT_HISTORY_FILE = os.path.join(CACHE_DIR, "tu-history.json")
+
+# Older commits are kept as estimates for files the current commit lacks.
+_KEEP_COMMITS = 3
+
+
+class TuHistory:
+    """Measurements of past clang-tidy runs keyed by project, commit and file.
+
+    The store is a JSON file of {project: {commit: {file: {metric: value}}}}
+    with file paths relative to the project's source directory, next to the
+    totals of the last run of each scheduling order.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._data: dict[str, dict[str, dict[str, dict[str, float]]]] = {}
+        self._runs: dict[str, dict[str, float]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "TuHistory":
+        history = cls(path)
+        try:
+            with open(path) as f:
+                data: Any = json.load(f)
+        except FileNotFoundError:
+            return history
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring TU history {path}: {e}", file=sys.stderr)
+            return history
+
+        if isinstance(data, dict):
+            history._data = data.get("projects", {})
+            history._runs = data.get("runs", {})
+        return history
+
+    def save(self) -> None:
+        """Atomically write the store so an interrupted run cannot corrupt it."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": 1, "projects": self._data, "runs": self._runs}, f)
+        os.replace(tmp, self.path)
+
+    def lookup(self, project: str, commit: str, file: str) -> dict[str, float] | None:
+        """Return the record for a file, preferring the given commit.
+
+        Falls back to the most recent other commit of the same project, which
+        is still a good estimate after a projects.json bump.
+        """
+        commits = self._data.get(project, {})
+        if file in commits.get(commit, {}):
+            return commits[commit][file]
+        for other in reversed(list(commits)):
+            if file in commits[other]:
+                return commits[other][file]
+        return None
+
+    def record(self, project: str, commit: str, file: str, **values: float) -> None:
+        commits = self._data.setdefault(project, {})
+        if commit not in commits:
+            commits[commit] = {}
+            for stale in list(commits)[:-_KEEP_COMMITS]:
+                del commits[stale]
+        commits[commit].setdefault(file, {}).update(values)
+
+    def last_run(self, order: str) -> dict[str, float] | None:
+        """Return the totals of the last run that used the given order."""
+        return self._runs.get(order)
+
+    def record_run(self, order: str, **values: float) -> None:
+        self._runs[order] = dict(values)
+
+
+def estimate_walls(
+    history: TuHistory, items: list[tuple[str, str, str, int]]
+) -> tuple[list[float], int]:
+    """Estimate the wall time of (project, commit, file, size) items.
+
+    Files with history use their last recorded wall time. Others are scaled
+    from their size by the median seconds-per-byte of their project (or of
+    all projects), or get the project median when sizes are unknown. With
+    no history at all the file size itself orders the work.
+
+    Returns the estimates and how many of them came from recorded runs.
+    """
+    walls: list[float | None] = []
+    rates: dict[str, list[float]] = {}
+    known: dict[str, list[float]] = {}
+    for project, commit, file, size in items:
+        record = history.lookup(project, commit, file)
+        wall = record.get("wall") if record else None
+        walls.append(wall)
+        if wall is not None:
+            known.setdefault(project, []).append(wall)
+            if size > 0:
+                rates.setdefault(project, []).append(wall / size)
+
+    all_rates = [r for project_rates in rates.values() for r in project_rates]
+    global_rate = statistics.median(all_rates) if all_rates else None
+
+    estimates: list[float] = []
+    for (project, _commit, _file, size), wall in zip(items, walls, strict=True):
+        if wall is not None:
+            estimates.append(wall)
+            continue
+        rate = statistics.median(rates[project]) if project in rates else global_rate
+        if rate is not None and size > 0:
+            estimates.append(size * rate)
+        elif project in known:
+            estimates.append(statistics.median(known[project]))
+        else:
+            estimates.append(float(size))
+
+    return estimates, sum(wall is not None for wall in walls)
+
+
+def estimate_peak_rss(
+    history: TuHistory, items: list[tuple[str, str, str, int]]
+) -> list[float]:
+    """Estimate the peak RSS in KiB of (project, commit, file, size) items.
+
+    Uses the recorded peak where known, otherwise the project median, then
+    the median over all projects, and 0 when nothing was ever recorded.
+    """
+    peaks: list[float | None] = []
+    known: dict[str, list[float]] = {}
+    for project, commit, file, _size in items:
+        record = history.lookup(project, commit, file)
+        rss = record.get("rss") if record else None
+        peaks.append(rss)
+        if rss is not None:
+            known.setdefault(project, []).append(rss)
+
+    all_known = [rss for values in known.values() for rss in values]
+    fallback = statistics.median(all_known) if all_known else 0.0
+
+    estimates: list[float] = []
+    for (project, _commit, _file, _size), rss in zip(items, peaks, strict=True):
+        if rss is not None:
+            estimates.append(rss)
+        elif project in known:
+            estimates.append(statistics.median(known[project]))
+        else:
+            estimates.append(fallback)
+    return estimates
@@ -0,0 +1,208 @@
+"""Index of the TUs whose preprocessed source names a check's trigger symbols."""
+
+import json
+import os
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from testers.include_index import strip_output_flags
+from testers.locality import entry_arguments
+from testers.rewrite import REWRITTEN_DB_DIR, compile_db_dir
+
+INDEX_FILE = "identifier-index.json"
+DEFAULT_PREPROCESS_TIMEOUT = 300.0
+
+# Checks that can only emit diagnostics in a TU naming one of these symbols,
+# after preprocessing. A qualified name stands for its last component, so
+# the prefilter errs on the side of analyzing a TU.
+CHECK_TRIGGERS: dict[str, list[str]] = {
+    "abseil-unchecked-statusor-access": ["absl::StatusOr"],
+    "bugprone-unchecked-optional-access": [
+        "std::optional",
+        "absl::optional",
+        "base::Optional",
+        "folly::Optional",
+        "bsl::optional",
+    ],
+    "bugprone-undefined-memory-manipulation": ["memset", "memcpy", "memmove"],
+    "bugprone-suspicious-memset-usage": ["memset"],
+    "bugprone-use-after-move": ["std::move", "std::forward"],
+    "modernize-make-shared": ["std::shared_ptr"],
+    "modernize-make-unique": ["std::unique_ptr"],
+    "modernize-use-std-print": ["printf", "fprintf", "absl::PrintF", "absl::FPrintF"],
+}
+
+# Options of the checks above that make them match functions or types of
+# the user's choosing; a config setting one of them disables the prefilter.
+CHECK_TRIGGER_OPTIONS: dict[str, list[str]] = {
+    "modernize-use-std-print": ["PrintfLikeFunctions", "FprintfLikeFunctions"],
+}
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_]\w*")
+
+
+def trigger_identifiers(checks: list[str]) -> set[str] | None:
+    """The identifiers one of which a TU must contain for any check to fire.
+
+    None if a check has no entry in CHECK_TRIGGERS and may fire anywhere.
+    """
+    if not checks or any(c not in CHECK_TRIGGERS for c in checks):
+        return None
+    return {s.rpartition("::")[2] for c in checks for s in CHECK_TRIGGERS[c]}
+
+
+def trigger_options(checks: list[str], tidy_config: str | None) -> list[str]:
+    """The options in CHECK_TRIGGER_OPTIONS of checks that tidy_config sets.
+
+    An option counts as set when the config names it at all, with or
+    without the check's prefix, so the prefilter errs on the side of
+    analyzing a TU.
+    """
+    if not tidy_config:
+        return []
+    return [
+        f"{c}.{option}"
+        for c in checks
+        for option in CHECK_TRIGGER_OPTIONS.get(c, [])
+        if re.search(rf"\b{option}\b", tidy_config)
+    ]
+
+
+@dataclass
+class IdentifierIndex:
+    """The TUs of a project that contain each trigger identifier.
+
+    key identifies the project commit, compile DB and set of identifiers the
+    index was made from. files are the absolute paths of the TUs,
+    identifiers maps every identifier to the indices of the files whose
+    preprocessed source contains it, and unindexed lists the files that
+    could not be preprocessed.
+    """
+
+    key: dict[str, Any]
+    files: list[str] = field(default_factory=list)
+    identifiers: dict[str, list[int]] = field(default_factory=dict)
+    unindexed: list[str] = field(default_factory=list)
+
+    def without(self, identifiers: set[str]) -> set[str]:
+        """The indexed files that contain none of identifiers."""
+        containing = {
+            i
+            for identifier in identifiers
+            for i in self.identifiers.get(identifier, [])
+        }
+        unindexed = set(self.unindexed)
+        return {
+            file
+            for i, file in enumerate(self.files)
+            if i not in containing and file not in unindexed
+        }
+
+
+def _index_path(build_dir: str) -> str:
+    return os.path.join(build_dir, REWRITTEN_DB_DIR, INDEX_FILE)
+
+
+def _index_key(build_dir: str, commit: str, identifiers: set[str]) -> dict[str, Any]:
+    stat = os.stat(os.path.join(compile_db_dir(build_dir), "compile_commands.json"))
+    return {
+        "commit": commit,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "identifiers": sorted(identifiers),
+    }
+
+
+def entry_identifiers(
+    entry: dict[str, Any], identifiers: set[str], timeout: float
+) -> set[str] | None:
+    """Which of identifiers the preprocessed source of an entry contains.
+
+    Returns None if the entry's compiler fails to preprocess it.
+    """
+    command = [*strip_output_flags(entry_arguments(entry)), "-E", "-P"]
+    try:
+        result = subprocess.run(
+            command,
+            cwd=entry["directory"],
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=timeout,
+            check=False,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return identifiers.intersection(_IDENTIFIER_RE.findall(result.stdout))
+
+
+def load_identifier_index(
+    build_dir: str, commit: str, identifiers: set[str]
+) -> IdentifierIndex | None:
+    """Return build_dir's identifier index, None if missing or out of date."""
+    try:
+        with open(_index_path(build_dir)) as f:
+            index = IdentifierIndex(**json.load(f))
+        key = _index_key(build_dir, commit, identifiers)
+    except (OSError, ValueError, TypeError):
+        return None
+    return index if index.key == key else None
+
+
+def build_identifier_index(
+    build_dir: str,
+    commit: str,
+    identifiers: set[str],
+    jobs: int = 1,
+    timeout: float = DEFAULT_PREPROCESS_TIMEOUT,
+) -> tuple[IdentifierIndex, bool]:
+    """Index which of identifiers the TUs in build_dir's compile DB contain.
+
+    That is the rewritten compile DB once analyze planned it, which holds
+    the TUs it analyzes, one entry each. Every entry is preprocessed with
+    its own compiler, so the index is kept next to it and reused as long as
+    the project commit, compile DB and identifiers are unchanged; returns
+    it and whether it was reused.
+    """
+    index = load_identifier_index(build_dir, commit, identifiers)
+    if index is not None:
+        return index, True
+
+    key = _index_key(build_dir, commit, identifiers)
+    with open(os.path.join(compile_db_dir(build_dir), "compile_commands.json")) as f:
+        entries: list[dict[str, Any]] = json.load(f)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        found = list(
+            pool.map(lambda e: entry_identifiers(e, identifiers, timeout), entries)
+        )
+
+    files: dict[str, int] = {}
+    postings: dict[str, set[int]] = {}
+    indexed: set[str] = set()
+    for entry, contained in zip(entries, found, strict=True):
+        path = os.path.normpath(os.path.join(entry["directory"], entry["file"]))
+        number = files.setdefault(path, len(files))
+        if contained is None:
+            continue
+        indexed.add(path)
+        for identifier in contained:
+            postings.setdefault(identifier, set()).add(number)
+
+    index = IdentifierIndex(
+        key,
+        list(files),
+        {i: sorted(numbers) for i, numbers in sorted(postings.items())},
+        sorted(set(files) - indexed),
+    )
+    path = _index_path(build_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(asdict(index), f)
+    os.replace(tmp, path)
+    return index, False
@@ -0,0 +1,190 @@
+"""Index of the TUs that include each header of a project."""
+
+import json
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+from testers.locality import entry_arguments, flag_values, parse_depfile, read_depfile
+from testers.rewrite import REWRITTEN_DB_DIR, compile_db_dir
+
+INDEX_FILE = "include-index.json"
+DEFAULT_DEPS_TIMEOUT = 120.0
+
+# Flags that make the compiler write an object or a depfile; dropped, with
+# their values, when asking it for the headers with -MM or for the
+# preprocessed source instead.
+_OUTPUT_FLAGS = ("-c", "-MD", "-MMD", "-MP")
+_OUTPUT_FLAGS_WITH_VALUE = ("-o", "-MF", "-MT", "-MQ")
+
+
+@dataclass
+class IncludeIndex:
+    """The headers each TU of a project reads, inverted.
+
+    key identifies the project commit and compile DB the index was made
+    from. files are the absolute paths of the TUs, headers maps the
+    absolute path of every header to the indices of the files including it,
+    directly or not, and unindexed lists the files whose headers could not
+    be determined.
+    """
+
+    key: dict[str, Any]
+    files: list[str] = field(default_factory=list)
+    headers: dict[str, list[int]] = field(default_factory=dict)
+    unindexed: list[str] = field(default_factory=list)
+
+    def including(self, path: str) -> set[str]:
+        """The files including path, absolute or a suffix of header paths."""
+        path = os.path.normpath(path)
+        if os.path.isabs(path):
+            matches = [path] if path in self.headers else []
+        else:
+            matches = [h for h in self.headers if h.endswith(os.sep + path)]
+        return {self.files[i] for h in matches for i in self.headers[h]}
+
+    def headers_by_file(self) -> dict[str, list[str]]:
+        """The headers each indexed file reads, by the file's absolute path."""
+        unindexed = set(self.unindexed)
+        by_file: dict[str, list[str]] = {
+            f: [] for f in self.files if f not in unindexed
+        }
+        for header, numbers in self.headers.items():
+            for number in numbers:
+                by_file[self.files[number]].append(header)
+        return by_file
+
+
+def _index_path(build_dir: str) -> str:
+    return os.path.join(build_dir, REWRITTEN_DB_DIR, INDEX_FILE)
+
+
+def _index_key(build_dir: str, commit: str) -> dict[str, Any]:
+    stat = os.stat(os.path.join(compile_db_dir(build_dir), "compile_commands.json"))
+    return {"commit": commit, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def strip_output_flags(args: list[str]) -> list[str]:
+    """The compile command args without the flags naming its outputs."""
+    command = []
+    skip = False
+    for arg in args:
+        if skip:
+            skip = False
+        elif arg in _OUTPUT_FLAGS_WITH_VALUE:
+            skip = True
+        elif arg not in _OUTPUT_FLAGS and not arg.startswith(("-MF", "-MT", "-MQ")):
+            command.append(arg)
+    return command
+
+
+def dependency_command(args: list[str], system_headers: bool = False) -> list[str]:
+    """The compile command args rewritten to print the headers it reads.
+
+    System headers are left out unless system_headers is set.
+    """
+    return [*strip_output_flags(args), "-M" if system_headers else "-MM"]
+
+
+def entry_headers(
+    entry: dict[str, Any], timeout: float, system_headers: bool = False
+) -> list[str] | None:
+    """The absolute paths of the headers a compile DB entry reads.
+
+    They come from the entry's depfile (-MF) once the object was built,
+    otherwise from running its compiler with -MM, which leaves out system
+    headers, or with -M if system_headers is set. A depfile written with
+    -MMD lacks the system headers too and is then not used. Returns None if
+    no way works.
+    """
+    directory = entry["directory"]
+    source = os.path.normpath(os.path.join(directory, entry["file"]))
+    args = entry_arguments(entry)
+    depfiles = flag_values(args, ("-MF",))
+    if system_headers and "-MMD" in args:
+        depfiles = []
+    prerequisites = [
+        p for d in depfiles for p in read_depfile(os.path.join(directory, d))
+    ]
+    if not prerequisites:
+        try:
+            result = subprocess.run(
+                dependency_command(args, system_headers),
+                cwd=directory,
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+                check=False,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        if result.returncode != 0:
+            return None
+        prerequisites = parse_depfile(result.stdout)
+    headers = {os.path.normpath(os.path.join(directory, p)) for p in prerequisites}
+    headers.discard(source)
+    return sorted(headers)
+
+
+def load_include_index(build_dir: str, commit: str) -> IncludeIndex | None:
+    """Return build_dir's include index, None if missing or out of date."""
+    try:
+        with open(_index_path(build_dir)) as f:
+            index = IncludeIndex(**json.load(f))
+        key = _index_key(build_dir, commit)
+    except (OSError, ValueError, TypeError):
+        return None
+    return index if index.key == key else None
+
+
+def build_include_index(
+    build_dir: str,
+    commit: str,
+    jobs: int = 1,
+    timeout: float = DEFAULT_DEPS_TIMEOUT,
+) -> tuple[IncludeIndex, bool]:
+    """Index the headers of the TUs in build_dir's compile DB.
+
+    That is the rewritten compile DB once analyze planned it, which holds
+    the TUs it analyzes, one entry each. The index is kept next to it and
+    reused as long as the project commit and compile DB are unchanged;
+    returns it and whether it was reused. A file with several entries is
+    indexed by the headers of all of them.
+    """
+    index = load_include_index(build_dir, commit)
+    if index is not None:
+        return index, True
+
+    key = _index_key(build_dir, commit)
+    with open(os.path.join(compile_db_dir(build_dir), "compile_commands.json")) as f:
+        entries: list[dict[str, Any]] = json.load(f)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        found = list(pool.map(lambda e: entry_headers(e, timeout), entries))
+
+    files: dict[str, int] = {}
+    headers: dict[str, set[int]] = {}
+    indexed: set[str] = set()
+    for entry, tu_headers in zip(entries, found, strict=True):
+        path = os.path.normpath(os.path.join(entry["directory"], entry["file"]))
+        number = files.setdefault(path, len(files))
+        if tu_headers is None:
+            continue
+        indexed.add(path)
+        for header in tu_headers:
+            headers.setdefault(header, set()).add(number)
+
+    index = IncludeIndex(
+        key,
+        list(files),
+        {h: sorted(numbers) for h, numbers in sorted(headers.items())},
+        sorted(set(files) - indexed),
+    )
+    path = _index_path(build_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(asdict(index), f)
+    os.replace(tmp, path)
+    return index, False
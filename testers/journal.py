@@ -0,0 +1,128 @@
+"""Checkpoint journal of completed TUs, used to resume interrupted analyze runs."""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+from typing import Any
+
+JOURNAL_FILE = "journal.jsonl"
+
+
+def binary_digest(clang_tidy_bin: str) -> str:
+    """Hash the clang-tidy binary by content.
+
+    A rebuilt clang-tidy at the same path thus never reuses results of the
+    old one.
+    """
+    sha = hashlib.sha256()
+    path = shutil.which(clang_tidy_bin) or clang_tidy_bin
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def run_fingerprint(clang_tidy_bin: str, settings: dict[str, Any]) -> str:
+    """Identify the clang-tidy binary and the settings that shape its output."""
+    sha = hashlib.sha256(binary_digest(clang_tidy_bin).encode())
+    sha.update(json.dumps(settings, sort_keys=True).encode())
+    return sha.hexdigest()
+
+
+class Journal:
+    """Append-only record of every TU analyzed in one log directory.
+
+    The first line holds the run fingerprint, every further line one TU:
+    {"project", "commit", "file", "output", ...}. Each line is flushed to
+    disk before the TU counts as done, so a killed run loses at most the
+    TUs that were still running.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fingerprint: str,
+        entries: list[dict[str, Any]] | None = None,
+    ) -> None:
+        self.path = path
+        self.fingerprint = fingerprint
+        self.resumed = False
+        self._entries: dict[tuple[str, str, str], dict[str, Any]] = {}
+        for entry in entries or []:
+            self._entries[(entry["project"], entry["commit"], entry["file"])] = entry
+
+    @classmethod
+    def open(cls, path: str, fingerprint: str, resume: bool = False) -> "Journal":
+        """Start a journal, keeping the entries of a matching one if resuming.
+
+        The entries of a journal written with another fingerprint are
+        dropped, since their output may differ from what this run produces.
+        """
+        journal = cls(path, fingerprint)
+        if resume:
+            journal._resume()
+        journal.save()
+        return journal
+
+    def save(self) -> None:
+        """Atomically rewrite the journal from the entries in memory."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(json.dumps({"version": 1, "fingerprint": self.fingerprint}) + "\n")
+            f.writelines(json.dumps(e) + "\n" for e in self.entries())
+        os.replace(tmp, self.path)
+
+    @classmethod
+    def read(cls, path: str) -> "Journal":
+        """Load a journal as it is on disk, without starting a run."""
+        with open(path) as f:
+            lines = f.readlines()
+        header = json.loads(lines[0]) if lines else {}
+        entries = []
+        for line in lines[1:]:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # The last line may be torn if the run was killed mid-write.
+                continue
+        return cls(path, header.get("fingerprint", ""), entries)
+
+    def _resume(self) -> None:
+        try:
+            previous = self.read(self.path)
+        except FileNotFoundError:
+            print(f"No journal at {self.path}; starting from scratch")
+            return
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring journal {self.path}: {e}", file=sys.stderr)
+            return
+
+        if previous.fingerprint != self.fingerprint:
+            print(
+                f"Journal {self.path} was written with a different clang-tidy "
+                "binary, checks or config; starting from scratch"
+            )
+            return
+
+        self._entries = previous._entries
+        self.resumed = True
+        print(f"Resuming from {self.path}: {len(self._entries)} TUs already analyzed")
+
+    def entries(self) -> list[dict[str, Any]]:
+        """All TU entries, in the order they were first recorded."""
+        return list(self._entries.values())
+
+    def completed(self, project: str, commit: str, file: str) -> dict[str, Any] | None:
+        """Return the entry of a TU finished at this commit, if any."""
+        return self._entries.get((project, commit, file))
+
+    def record(self, project: str, commit: str, file: str, **values: Any) -> None:
+        entry = {"project": project, "commit": commit, "file": file, **values}
+        self._entries[(project, commit, file)] = entry
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,150 @@
+"""Ordering of TUs that keeps files sharing headers close together."""
+
+import os
+import shlex
+from collections.abc import Iterable
+from typing import Any
+
+# Flags whose value names an include search directory.
+_INCLUDE_FLAGS = ("-I", "-isystem", "-iquote", "-idirafter")
+
+
+def entry_arguments(entry: dict[str, Any]) -> list[str]:
+    """The compiler invocation of a compile DB entry as an argument list."""
+    if "arguments" in entry:
+        return list(entry["arguments"])
+    return shlex.split(entry.get("command", ""))
+
+
+def flag_values(args: list[str], flags: tuple[str, ...]) -> list[str]:
+    """The values of flags given either as "-Xvalue" or as "-X value"."""
+    values = []
+    for i, arg in enumerate(args):
+        for flag in flags:
+            if arg == flag and i + 1 < len(args):
+                values.append(args[i + 1])
+            elif arg.startswith(flag) and len(arg) > len(flag):
+                values.append(arg[len(flag) :])
+    return values
+
+
+def read_depfile(path: str) -> list[str]:
+    """Return the prerequisites of a Makefile-style depfile written by -MD.
+
+    Returns an empty list when the file does not exist yet, e.g. for a
+    target that was never built.
+    """
+    try:
+        with open(path) as f:
+            return parse_depfile(f.read())
+    except OSError:
+        return []
+
+
+def parse_depfile(content: str) -> list[str]:
+    """Return the prerequisites of a Makefile-style rule, as -MD or -MM write."""
+    _target, _sep, prerequisites = content.replace("\\\n", " ").partition(": ")
+    # Spaces inside paths are escaped as "\ ".
+    words = prerequisites.replace("\\ ", "\0").split()
+    return [w.replace("\0", " ") for w in words]
+
+
+def include_signature(
+    entry: dict[str, Any], headers: Iterable[str] | None = None
+) -> frozenset[str]:
+    """The headers and include directories a compile DB entry reads.
+
+    The headers are the given ones, e.g. from the include index, or else
+    come from the entry's depfile (-MF) when the object was built. The
+    include search directories stand in for headers neither source knows.
+    """
+    directory = entry["directory"]
+    source = os.path.normpath(os.path.join(directory, entry["file"]))
+    args = entry_arguments(entry)
+    signature = {
+        "dir:" + os.path.normpath(os.path.join(directory, d))
+        for d in flag_values(args, _INCLUDE_FLAGS)
+    }
+    if headers is None:
+        headers = [
+            header
+            for depfile in flag_values(args, ("-MF",))
+            for header in read_depfile(os.path.join(directory, depfile))
+        ]
+    for header in headers:
+        path = os.path.normpath(os.path.join(directory, header))
+        if path != source:
+            signature.add(path)
+    return frozenset(signature)
+
+
+def include_signatures(
+    entries: list[dict[str, Any]], headers: dict[str, list[str]] | None = None
+) -> dict[str, frozenset[str]]:
+    """Map the absolute path of every compile DB entry to its signature.
+
+    headers maps absolute file paths to the headers they read, for the
+    files whose headers are known without a depfile.
+    """
+    signatures = {}
+    for entry in entries:
+        path = os.path.normpath(os.path.join(entry["directory"], entry["file"]))
+        known = headers.get(path) if headers is not None else None
+        signatures[path] = include_signature(entry, known)
+    return signatures
+
+
+def _jaccard(a: int, b: int) -> float:
+    union = (a | b).bit_count()
+    return (a & b).bit_count() / union if union else 0.0
+
+
+def locality_chains(
+    items: list[tuple[str, float, frozenset[str]]], target_cost: float
+) -> list[list[int]]:
+    """Split (file, cost, signature) items into chains of related TUs.
+
+    Files are grouped by directory; the directories are then walked
+    greedily, each followed by the unvisited one whose combined include set
+    overlaps most with it, starting with the most expensive directory. The
+    resulting sequence is cut into chains of at most target_cost, so a
+    chain can run back-to-back on one worker while the chains still
+    balance over all workers. Returns the item indices of each chain.
+    """
+    if not items:
+        return []
+    bits: dict[str, int] = {}
+    directories: dict[str, list[int]] = {}
+    masks: dict[str, int] = {}
+    for index, (file, _cost, signature) in enumerate(items):
+        directory = os.path.dirname(file)
+        directories.setdefault(directory, []).append(index)
+        mask = masks.get(directory, 0)
+        for key in signature:
+            mask |= 1 << bits.setdefault(key, len(bits))
+        masks[directory] = mask
+
+    costs = {d: sum(items[i][1] for i in members) for d, members in directories.items()}
+    remaining = set(directories)
+    current = min(remaining, key=lambda d: (-costs[d], d))
+    sequence: list[int] = []
+    while True:
+        remaining.discard(current)
+        sequence += sorted(directories[current], key=lambda i: items[i][0])
+        if not remaining:
+            break
+        current = min(remaining, key=lambda d: (-_jaccard(masks[current], masks[d]), d))
+
+    chains: list[list[int]] = []
+    chain: list[int] = []
+    chain_cost = 0.0
+    for index in sequence:
+        cost = items[index][1]
+        if chain and chain_cost + cost > target_cost:
+            chains.append(chain)
+            chain, chain_cost = [], 0.0
+        chain.append(index)
+        chain_cost += cost
+    if chain:
+        chains.append(chain)
+    return chains
@@ -0,0 +1,127 @@
+"""Combine the log directories of sharded analyze runs into one."""
+
+import glob
+import os
+import shutil
+import sys
+from typing import Any
+
+from testers.analyze import aggregate_profiles, write_profile_table
+from testers.baseline import DIFF_FILE
+from testers.journal import JOURNAL_FILE, Journal
+from testers.results import RESULTS_FILE
+
+_PROGRESS_LOG = "progress.log"
+
+# Lines ProjectWork.finish() writes after the TU outputs, in the order it
+# writes them; they are not journaled, so they are copied from the shard logs.
+_EVENT_PREFIXES = ("CTIT PARSE-FAILURE: ", "CTIT FLOOD: ", "CTIT PREFILTER: ")
+
+
+def _read_journal(shard_dir: str) -> Journal:
+    path = os.path.join(shard_dir, JOURNAL_FILE)
+    try:
+        return Journal.read(path)
+    except (OSError, ValueError) as e:
+        print(
+            f"Error: {shard_dir} has no readable {JOURNAL_FILE} ({e}); only logs of "
+            "the built-in engine can be merged.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+def _project_entries(journals: list[Journal], project: str) -> list[dict[str, Any]]:
+    """The project's TU entries of its most recent commit, in file order."""
+    entries = [e for j in journals for e in j.entries() if e["project"] == project]
+    if not entries:
+        return []
+    commit = entries[-1]["commit"]
+    by_file = {e["file"]: e for e in entries if e["commit"] == commit}
+    return [by_file[f] for f in sorted(by_file)]
+
+
+def _project_events(shard_dirs: list[str], project: str) -> list[str]:
+    """The project's event lines from all shard logs, grouped by kind."""
+    lines: list[str] = []
+    for d in shard_dirs:
+        try:
+            with open(os.path.join(d, f"{project}.log"), errors="replace") as f:
+                lines += [line for line in f if line.startswith(_EVENT_PREFIXES)]
+        except OSError:
+            continue
+    return [
+        line
+        for prefix in _EVENT_PREFIXES
+        for line in sorted(set(lines))
+        if line.startswith(prefix)
+    ]
+
+
+def merge_logs(shard_dirs: list[str], output_dir: str) -> None:
+    """Merge shard log directories into output_dir.
+
+    Each project log is rebuilt from the shard journals in file order,
+    followed by the parse failure, flood and prefilter lines of every shard
+    and the check profile aggregated over all shards, so the result is the
+    same as the log of an unsharded run. The journals and profiles are merged
+    too, which keeps the result resumable, and so are the per-TU results
+    and baseline diffs.
+    """
+    if any(os.path.realpath(d) == os.path.realpath(output_dir) for d in shard_dirs):
+        print("Error: the output directory must not be a shard.", file=sys.stderr)
+        sys.exit(1)
+
+    journals = [_read_journal(d) for d in shard_dirs]
+    fingerprints = {j.fingerprint for j in journals}
+    if len(fingerprints) > 1:
+        print(
+            "Error: the shards were analyzed with different clang-tidy binaries, "
+            "checks or config.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    projects = sorted(
+        {
+            os.path.basename(path).removesuffix(".log")
+            for d in shard_dirs
+            for path in glob.glob(os.path.join(d, "*.log"))
+            if os.path.basename(path) != _PROGRESS_LOG
+        }
+    )
+
+    os.makedirs(output_dir, exist_ok=True)
+    merged: list[dict[str, Any]] = []
+    for project in projects:
+        profile_dir = None
+        for d in shard_dirs:
+            for path in glob.glob(os.path.join(d, "profiles", project, "*.json")):
+                profile_dir = os.path.join(output_dir, "profiles", project)
+                os.makedirs(profile_dir, exist_ok=True)
+                shutil.copy2(path, profile_dir)
+
+        entries = _project_entries(journals, project)
+        with open(os.path.join(output_dir, f"{project}.log"), "w") as log:
+            log.writelines(entry["output"] for entry in entries)
+            log.writelines(_project_events(shard_dirs, project))
+            if profile_dir:
+                write_profile_table(log, aggregate_profiles(profile_dir))
+        merged += entries
+        print(f"[{project}] Merged {len(entries)} TUs from {len(shard_dirs)} shards")
+    Journal(os.path.join(output_dir, JOURNAL_FILE), fingerprints.pop(), merged).save()
+
+    for name in (_PROGRESS_LOG, RESULTS_FILE, DIFF_FILE):
+        paths = [
+            os.path.join(d, name)
+            for d in shard_dirs
+            if os.path.isfile(os.path.join(d, name))
+        ]
+        if not paths:
+            continue
+        with open(os.path.join(output_dir, name), "w") as merged_file:
+            for path in paths:
+                with open(path) as f:
+                    shutil.copyfileobj(f, merged_file)
+
+    print(f"Merged {len(shard_dirs)} shards into {output_dir}")
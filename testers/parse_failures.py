@@ -0,0 +1,149 @@
+"""Cache of TUs that fail to parse regardless of the check under test."""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from functools import cache
+from typing import Any
+
+from testers.config import CACHE_DIR
+from testers.locality import entry_arguments
+
+DEFAULT_PARSE_FAILURES_FILE = os.path.join(CACHE_DIR, "parse-failures.json")
+
+# Only the most recent commits of a project are kept.
+_KEEP_COMMITS = 3
+
+
+class ParseFailures:
+    """TUs whose syntax-only parse fails, keyed by project, commit and compiler.
+
+    The store is a JSON file of {project: {commit: {compiler: {file: error}}}}
+    with file paths relative to the project's source directory and the first
+    error the syntax-only parse reported for the file. The parse runs the
+    compiler of the file's compile DB entry, so the compiler key is that
+    compiler's compiler_id(): its path and the first line of its --version
+    output.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._data: dict[str, dict[str, dict[str, dict[str, str]]]] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "ParseFailures":
+        cache = cls(path)
+        try:
+            with open(path) as f:
+                data: Any = json.load(f)
+        except FileNotFoundError:
+            return cache
+        except (OSError, ValueError) as e:
+            print(f"Warning: ignoring parse failure cache {path}: {e}", file=sys.stderr)
+            return cache
+
+        if isinstance(data, dict):
+            cache._data = data.get("projects", {})
+        return cache
+
+    def save(self) -> None:
+        """Atomically write the store so an interrupted run cannot corrupt it."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": 1, "projects": self._data}, f)
+        os.replace(tmp, self.path)
+
+    def failures(self, project: str, commit: str, compiler: str) -> dict[str, str]:
+        """Return {file: first error} of the TUs known to fail to parse."""
+        return dict(self._data.get(project, {}).get(commit, {}).get(compiler, {}))
+
+    def record(
+        self, project: str, commit: str, compiler: str, file: str, error: str
+    ) -> None:
+        commits = self._data.setdefault(project, {})
+        if commit not in commits:
+            commits[commit] = {}
+            for stale in list(commits)[:-_KEEP_COMMITS]:
+                del commits[stale]
+        commits[commit].setdefault(compiler, {})[file] = error
+
+
+# Arguments that write build outputs; a syntax-only parse drops them.
+_OUTPUT_FLAGS_WITH_VALUE = {"-o", "-MF", "-MT", "-MQ"}
+_OUTPUT_FLAGS = {"-c", "-MD", "-MMD"}
+
+# Matches "error: " and "fatal error: " at the start of a diagnostic.
+_ERROR_RE = re.compile(r"(?:^|: )(?:fatal )?error: ")
+
+# Compiler launchers configure_cmake() may put in front of the compiler.
+_LAUNCHERS = {"ccache", "sccache"}
+
+
+def _compiler_arguments(entry: dict[str, Any]) -> list[str]:
+    args = entry_arguments(entry)
+    if args and os.path.basename(args[0]) in _LAUNCHERS:
+        return args[1:]
+    return args
+
+
+def entry_compiler(entry: dict[str, Any]) -> str:
+    """The compiler of a compile DB entry, without a compiler launcher."""
+    args = _compiler_arguments(entry)
+    return args[0] if args else ""
+
+
+def syntax_only_command(entry: dict[str, Any]) -> list[str]:
+    """The entry's compiler invocation turned into a -fsyntax-only parse."""
+    args = _compiler_arguments(entry)
+    command = []
+    skip_value = False
+    for arg in args:
+        if skip_value:
+            skip_value = False
+        elif arg in _OUTPUT_FLAGS_WITH_VALUE:
+            skip_value = True
+        elif arg not in _OUTPUT_FLAGS and not arg.startswith(("-o", "-MF")):
+            command.append(arg)
+    return command + ["-fsyntax-only"]
+
+
+@cache
+def compiler_id(compiler: str) -> str:
+    """The compiler's path and the first line of its --version output."""
+    try:
+        proc = subprocess.run(
+            [compiler, "--version"], capture_output=True, text=True, check=False
+        )
+    except OSError:
+        return compiler
+    version = proc.stdout.splitlines()[0] if proc.stdout else ""
+    return f"{compiler} {version}".strip()
+
+
+def parse_error(entry: dict[str, Any], timeout: float | None = None) -> str | None:
+    """Parse the entry's file syntax-only; return the first error, if any.
+
+    A parse that times out or a compiler that cannot run tells nothing
+    about the file, so both count as no error.
+    """
+    try:
+        proc = subprocess.run(
+            syntax_only_command(entry),
+            cwd=entry["directory"],
+            capture_output=True,
+            text=True,
+            errors="replace",
+            timeout=timeout,
+            check=False,
+        )
+    except (subprocess.TimeoutExpired, OSError):
+        return None
+    if proc.returncode == 0:
+        return None
+    for line in proc.stderr.splitlines():
+        if _ERROR_RE.search(line):
+            return line
+    return f"exit code {proc.returncode}"
@@ -0,0 +1,312 @@
+"""Check-performance comparison of a patched clang-tidy with a baseline binary."""
+
+import fnmatch
+import json
+import math
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any
+
+from testers.analyze import (
+    DEFAULT_CLANG_TIDY_BIN,
+    DEFAULT_LOG_DIR,
+    DEFAULT_TU_TIMEOUT,
+    AnalysisConfig,
+    TranslationUnit,
+    TuLimits,
+    aggregate_profiles,
+    clang_tidy_command,
+    collect_translation_units,
+    compile_db_plans,
+    get_analysis_configs,
+    plan_projects,
+    run_translation_unit,
+)
+from testers.baseline import PERF_FILE
+from testers.config import CONFIG_FILE, PROJECTS_DIR, load_projects
+
+DEFAULT_REPETITIONS = 5
+DEFAULT_PERF_SAMPLE = 20
+
+# Two-sided 95% quantiles of Student's t distribution by degrees of freedom;
+# a df between two entries takes the quantile of the smaller, wider one.
+_T_95 = {
+    1: 12.706,
+    2: 4.303,
+    3: 3.182,
+    4: 2.776,
+    5: 2.571,
+    6: 2.447,
+    7: 2.365,
+    8: 2.306,
+    9: 2.262,
+    10: 2.228,
+    12: 2.179,
+    15: 2.131,
+    20: 2.086,
+    30: 2.042,
+}
+_Z_95 = 1.96
+
+
+@dataclass
+class Comparison:
+    """Patched against baseline time of a check or TU over the repetitions.
+
+    baseline and patched are mean seconds per repetition; ratio is their
+    geometric mean ratio, low and high bound its 95% confidence interval.
+    """
+
+    name: str
+    baseline: float
+    patched: float
+    ratio: float
+    low: float
+    high: float
+
+    @property
+    def slower(self) -> bool:
+        return self.low > 1.0
+
+    @property
+    def faster(self) -> bool:
+        return self.high < 1.0
+
+
+@dataclass
+class PerfSummary:
+    """The comparisons of an A/B run, those of the checks under test first."""
+
+    checks_pattern: str
+    repetitions: int
+    tus: int
+    tested: list[Comparison]
+    others: list[Comparison]
+    units: list[Comparison]
+
+
+def _t_95(df: int) -> float:
+    if df > max(_T_95):
+        return _Z_95
+    return _T_95[max(k for k in _T_95 if k <= df)]
+
+
+def compare(
+    name: str, baseline: list[float], patched: list[float]
+) -> Comparison | None:
+    """Compare times paired by repetition, None without two usable pairs.
+
+    The interval is the t interval of the mean log ratio of the pairs, so
+    slow and fast repetitions, which hit both binaries alike, cancel out.
+    """
+    pairs = [(b, p) for b, p in zip(baseline, patched, strict=True) if b > 0 and p > 0]
+    if len(pairs) < 2:
+        return None
+    logs = [math.log(p / b) for b, p in pairs]
+    mean = statistics.fmean(logs)
+    half = _t_95(len(logs) - 1) * statistics.stdev(logs) / math.sqrt(len(logs))
+    return Comparison(
+        name,
+        statistics.fmean(b for b, _p in pairs),
+        statistics.fmean(p for _b, p in pairs),
+        math.exp(mean),
+        math.exp(mean - half),
+        math.exp(mean + half),
+    )
+
+
+def under_test(check: str, pattern: str) -> bool:
+    """Whether a -checks pattern enables check; later globs win."""
+    enabled = False
+    for glob in pattern.split(","):
+        glob = glob.strip()
+        if glob and fnmatch.fnmatchcase(check, glob.removeprefix("-")):
+            enabled = not glob.startswith("-")
+    return enabled
+
+
+def summarize(perf: dict[str, Any]) -> PerfSummary:
+    """Compare the runs of a PERF_FILE per check and per TU.
+
+    A TU is compared by the time of the checks under test only. A TU's
+    repetition counts only if both binaries finished it, so the totals of
+    both sides cover the same work.
+    """
+    pattern = perf["checks"]
+    runs: dict[tuple[str, str, int], dict[str, dict[str, float]]] = defaultdict(dict)
+    for run in perf["runs"]:
+        key = (run["project"], run["file"], run["repetition"])
+        runs[key][run["binary"]] = run["checks"]
+    complete = {key: sides for key, sides in runs.items() if len(sides) == 2}
+
+    reps = perf["repetitions"]
+    checks: dict[str, dict[str, list[float]]] = {}
+    units: dict[str, dict[str, list[float]]] = {}
+    for (project, file, rep), sides in complete.items():
+        for binary, timings in sides.items():
+            for check, wall in timings.items():
+                totals = checks.setdefault(
+                    check, {"baseline": [0.0] * reps, "patched": [0.0] * reps}
+                )
+                totals[binary][rep] += wall
+            unit = units.setdefault(
+                f"{project}/{file}", {"baseline": [0.0] * reps, "patched": [0.0] * reps}
+            )
+            unit[binary][rep] += sum(
+                wall for check, wall in timings.items() if under_test(check, pattern)
+            )
+
+    def comparisons(
+        times: dict[str, dict[str, list[float]]],
+    ) -> list[Comparison]:
+        found = (compare(n, t["baseline"], t["patched"]) for n, t in times.items())
+        return sorted((c for c in found if c), key=lambda c: -c.ratio)
+
+    by_check = comparisons(checks)
+    return PerfSummary(
+        checks_pattern=pattern,
+        repetitions=reps,
+        tus=len({(project, file) for project, file, _rep in complete}),
+        tested=[c for c in by_check if under_test(c.name, pattern)],
+        others=[c for c in by_check if not under_test(c.name, pattern)],
+        units=comparisons(units),
+    )
+
+
+def load_perf(path: str) -> PerfSummary:
+    with open(path) as f:
+        return summarize(json.load(f))
+
+
+def _profile_run(
+    command: list[str], unit: TranslationUnit, profile_dir: str, limits: TuLimits
+) -> tuple[float, dict[str, float]] | None:
+    """Run one TU with check profiling; return its wall time and check walls."""
+    shutil.rmtree(profile_dir, ignore_errors=True)
+    os.makedirs(profile_dir)
+    result = run_translation_unit(command, unit, limits=limits)
+    if result.crashed or result.limit_exceeded:
+        return None
+    profile = aggregate_profiles(profile_dir)
+    return result.elapsed, {check: t["wall"] for check, t in profile.items()}
+
+
+def perf_ab(
+    check_name: str,
+    baseline_binary: str,
+    clang_tidy_bin: str = DEFAULT_CLANG_TIDY_BIN,
+    tidy_config: str | None = None,
+    work_dir: str = PROJECTS_DIR,
+    log_dir: str = DEFAULT_LOG_DIR,
+    config_path: str = CONFIG_FILE,
+    skip_headers: bool = False,
+    repetitions: int = DEFAULT_REPETITIONS,
+    sample: int = DEFAULT_PERF_SAMPLE,
+    tu_timeout: float = DEFAULT_TU_TIMEOUT,
+    rewrite: bool = True,
+    drop_flag_groups: list[str] | None = None,
+) -> None:
+    """Profile the checks of both binaries on the same TUs and compare them.
+
+    sample TUs per project, spread over its compile DB (0 for all), run one
+    at a time, repetitions times over. The binaries alternate which runs
+    first on a TU, from TU to TU and repetition to repetition, so drift in
+    the machine's speed and the warmth of the page cache favour neither.
+    The runs go to PERF_FILE in log_dir, for generate_report.py to add a
+    section on them to issue.md; analyze removes it, so perf-ab runs after
+    the analysis it goes with. Like analyze, the TUs run on the rewritten
+    compile DBs, with the drop_flag_groups dropped too, or on the compile
+    DBs as built without rewrite.
+    """
+    for binary in (clang_tidy_bin, baseline_binary):
+        if not shutil.which(binary) and not os.path.isfile(binary):
+            print(f"Error: clang-tidy binary not found: {binary}", file=sys.stderr)
+            sys.exit(1)
+    if repetitions < 2:
+        print(
+            "Error: confidence intervals need 2 or more repetitions.", file=sys.stderr
+        )
+        sys.exit(1)
+
+    projects = load_projects(config_path)
+    configs = get_analysis_configs(config_path)
+    plans = compile_db_plans(projects, configs, rewrite, drop_flag_groups or [])
+    plan_projects(projects, work_dir, plans)
+
+    units = []
+    for project in projects:
+        config = configs.get(project.name, AnalysisConfig(name=project.name))
+        source_dir = os.path.abspath(os.path.join(work_dir, project.name))
+        build_dir = os.path.join(source_dir, "build")
+        if not os.path.isfile(os.path.join(build_dir, "compile_commands.json")):
+            continue
+        found, _total = collect_translation_units(
+            project.name, build_dir, source_dir, config.file_regex
+        )
+        if sample and found:
+            found = found[:: max(1, len(found) // sample)][:sample]
+        units += found
+    print(
+        f"Profiling {len(units)} TUs {repetitions} times with {baseline_binary} "
+        f"and {clang_tidy_bin}"
+    )
+
+    limits = TuLimits(tu_timeout or None)
+    runs = []
+    failed = 0
+    with tempfile.TemporaryDirectory(prefix="ctit-perf-") as tmp_dir:
+        profile_dir = os.path.join(tmp_dir, "profile")
+        for rep in range(repetitions):
+            for i, unit in enumerate(units):
+                binaries = [("baseline", baseline_binary), ("patched", clang_tidy_bin)]
+                if (rep + i) % 2:
+                    binaries.reverse()
+                for side, binary in binaries:
+                    command = clang_tidy_command(
+                        binary,
+                        unit.build_dir,
+                        check_name,
+                        tidy_config,
+                        skip_headers,
+                        profile_dir,
+                    )
+                    timed = _profile_run(command, unit, profile_dir, limits)
+                    if timed is None:
+                        failed += 1
+                        continue
+                    wall, checks = timed
+                    runs.append(
+                        {
+                            "project": unit.project,
+                            "file": unit.key,
+                            "binary": side,
+                            "repetition": rep,
+                            "wall": round(wall, 4),
+                            "checks": checks,
+                        }
+                    )
+            print(f"Repetition {rep + 1}/{repetitions} done")
+    if failed:
+        print(
+            f"Warning: {failed} runs crashed or hit the time limit and are left out",
+            file=sys.stderr,
+        )
+
+    os.makedirs(log_dir, exist_ok=True)
+    path = os.path.join(log_dir, PERF_FILE)
+    perf = {"checks": check_name, "repetitions": repetitions, "runs": runs}
+    with open(path, "w") as f:
+        json.dump(perf, f)
+
+    summary = summarize(perf)
+    for c in summary.tested:
+        print(
+            f"{c.name}: {c.baseline:.3f}s -> {c.patched:.3f}s, {c.ratio:.2f}x "
+            f"(95% CI {c.low:.2f}x-{c.high:.2f}x)"
+        )
+    print(f"Profiles saved to {path}")
@@ -0,0 +1,277 @@
+"""Process and container resource accounting for the analysis scheduler."""
+
+import os
+import threading
+from dataclasses import dataclass
+
+_CGROUP_ROOT = "/sys/fs/cgroup"
+_PROC_CGROUP = "/proc/self/cgroup"
+_PROC_STAT = "/proc/stat"
+
+# cgroup v1 reports "no limit" as a page-aligned LONG_MAX.
+_UNLIMITED_BYTES = 1 << 60
+
+# Leave room for the page cache and CTIT itself inside the memory limit.
+_MEMORY_BUDGET_FRACTION = 0.9
+
+# Rough peak RSS of one compile job when building the projects' targets.
+_BUILD_JOB_BYTES = 2 << 30
+
+
+@dataclass
+class ResourceLimits:
+    """CPUs and memory this process may use after cgroup and affinity limits."""
+
+    cpus: int
+    memory_bytes: int | None = None
+    cpu_quota: float | None = None
+    cpuset_cpus: int | None = None
+
+    def describe(self) -> str:
+        details = []
+        if self.cpu_quota is not None:
+            details.append(f"CPU quota {self.cpu_quota:g}")
+        if self.cpuset_cpus is not None:
+            details.append(f"cpuset {self.cpuset_cpus}")
+        source = f" ({', '.join(details)})" if details else ""
+        memory = (
+            f"{self.memory_bytes >> 20} MB memory limit"
+            if self.memory_bytes is not None
+            else "no memory limit"
+        )
+        return f"{self.cpus} CPUs{source}, {memory}"
+
+    def memory_budget_mb(self) -> int | None:
+        """Default memory budget for analysis workers, None without a limit."""
+        if self.memory_bytes is None:
+            return None
+        return int(self.memory_bytes * _MEMORY_BUDGET_FRACTION) >> 20
+
+    def build_jobs(self) -> int:
+        """Parallel ninja jobs that fit both the CPUs and the memory limit."""
+        if self.memory_bytes is None:
+            return self.cpus
+        return max(1, min(self.cpus, self.memory_bytes // _BUILD_JOB_BYTES))
+
+
+def _read(path: str) -> str | None:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_paths(proc_cgroup: str) -> dict[str, str]:
+    """Map each controller ("" for the v2 hierarchy) to this process's cgroup."""
+    paths: dict[str, str] = {}
+    content = _read(proc_cgroup)
+    if content is None:
+        return paths
+    for line in content.splitlines():
+        parts = line.split(":", 2)
+        if len(parts) != 3:
+            continue
+        for controller in parts[1].split(","):
+            paths[controller] = parts[2]
+    return paths
+
+
+def _cgroup_dirs(mount: str, path: str) -> list[str]:
+    """The process's cgroup directory and its ancestors that exist under mount.
+
+    Containers without a cgroup namespace see the host path in
+    /proc/self/cgroup while their own cgroup is mounted at the root, so the
+    root itself is always a candidate.
+    """
+    dirs = []
+    rel = path.strip("/")
+    while True:
+        candidate = os.path.join(mount, rel) if rel else mount
+        if os.path.isdir(candidate):
+            dirs.append(candidate)
+        if not rel:
+            return dirs
+        rel = os.path.dirname(rel)
+
+
+def _v1_dirs(root: str, controller: str, paths: dict[str, str]) -> list[str]:
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return []
+    for name in names:
+        if controller in name.split(","):
+            return _cgroup_dirs(os.path.join(root, name), paths.get(controller, "/"))
+    return []
+
+
+def _v2_dirs(root: str, paths: dict[str, str]) -> list[str]:
+    if not os.path.exists(os.path.join(root, "cgroup.controllers")):
+        return []
+    return _cgroup_dirs(root, paths.get("", "/"))
+
+
+def _count_cpu_list(cpu_list: str) -> int:
+    """Count the CPUs in a cpuset list such as "0-3,8,10-11"."""
+    count = 0
+    for part in cpu_list.split(","):
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            count += int(hi) - int(lo) + 1
+        elif part:
+            count += 1
+    return count
+
+
+def _cpu_quota(root: str, paths: dict[str, str]) -> float | None:
+    quotas = []
+    for d in _v2_dirs(root, paths):
+        fields = (_read(os.path.join(d, "cpu.max")) or "max").split()
+        if fields[0] != "max" and len(fields) == 2:
+            quotas.append(int(fields[0]) / int(fields[1]))
+    for d in _v1_dirs(root, "cpu", paths):
+        quota = _read(os.path.join(d, "cpu.cfs_quota_us"))
+        period = _read(os.path.join(d, "cpu.cfs_period_us"))
+        if quota and period and int(quota) > 0:
+            quotas.append(int(quota) / int(period))
+    return min(quotas, default=None)
+
+
+def _cpuset_cpus(root: str, paths: dict[str, str]) -> int | None:
+    counts = []
+    for d in _v2_dirs(root, paths):
+        cpus = _read(os.path.join(d, "cpuset.cpus.effective"))
+        if cpus:
+            counts.append(_count_cpu_list(cpus))
+    for d in _v1_dirs(root, "cpuset", paths):
+        cpus = _read(os.path.join(d, "cpuset.effective_cpus")) or _read(
+            os.path.join(d, "cpuset.cpus")
+        )
+        if cpus:
+            counts.append(_count_cpu_list(cpus))
+    return min(counts, default=None)
+
+
+def _memory_limit(root: str, paths: dict[str, str]) -> int | None:
+    limits = []
+    for d in _v2_dirs(root, paths):
+        for name in ("memory.max", "memory.high"):
+            value = _read(os.path.join(d, name))
+            if value and value != "max":
+                limits.append(int(value))
+    for d in _v1_dirs(root, "memory", paths):
+        value = _read(os.path.join(d, "memory.limit_in_bytes"))
+        if value and int(value) < _UNLIMITED_BYTES:
+            limits.append(int(value))
+    return min(limits, default=None)
+
+
+def detect_limits(
+    root: str = _CGROUP_ROOT, proc_cgroup: str = _PROC_CGROUP
+) -> ResourceLimits:
+    """Read cgroup v1/v2 CPU quota, cpuset and memory limits.
+
+    os.cpu_count() reports the host's cores inside a container; the usable
+    CPU count is the smallest of the scheduler affinity, the cpuset and the
+    CFS quota (rounded down, at least one).
+    """
+    paths = _cgroup_paths(proc_cgroup)
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    quota = _cpu_quota(root, paths)
+    cpuset = _cpuset_cpus(root, paths)
+    if cpuset is not None:
+        cpus = min(cpus, cpuset)
+    if quota is not None:
+        cpus = min(cpus, max(1, int(quota)))
+
+    return ResourceLimits(
+        cpus=cpus,
+        memory_bytes=_memory_limit(root, paths),
+        cpu_quota=quota,
+        cpuset_cpus=cpuset,
+    )
+
+
+def read_rss_kb(pid: int) -> int | None:
+    """Return the current resident set size of a process in KiB.
+
+    Returns None when the process is gone or /proc is unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def read_iowait_seconds(proc_stat: str = _PROC_STAT) -> float | None:
+    """Return the time all CPUs have spent waiting for I/O since boot.
+
+    Returns None when /proc/stat is unavailable.
+    """
+    content = _read(proc_stat)
+    if content is None:
+        return None
+    for line in content.splitlines():
+        fields = line.split()
+        # cpu user nice system idle iowait ...
+        if fields[:1] == ["cpu"] and len(fields) > 5:
+            return int(fields[5]) / os.sysconf("SC_CLK_TCK")
+    return None
+
+
+class MemoryBudget:
+    """Admits new processes only while projected memory fits a fixed budget.
+
+    Each running process is projected at the larger of its sampled RSS and
+    the peak expected for it, so a TU that has not yet grown to its usual
+    peak still reserves that memory.
+    """
+
+    def __init__(self, budget_kb: int) -> None:
+        self.budget_kb = budget_kb
+        self._lock = threading.Lock()
+        self._expected: dict[int, float] = {}
+        self._pids: dict[int, int] = {}
+
+    def start(self, token: int, expected_kb: float) -> None:
+        with self._lock:
+            self._expected[token] = expected_kb
+
+    def set_pid(self, token: int, pid: int) -> None:
+        with self._lock:
+            self._pids[token] = pid
+
+    def finish(self, token: int) -> None:
+        with self._lock:
+            self._expected.pop(token, None)
+            self._pids.pop(token, None)
+
+    def projected_kb(self) -> float:
+        """Projected memory of all running processes."""
+        with self._lock:
+            running = [(exp, self._pids.get(t)) for t, exp in self._expected.items()]
+        total = 0.0
+        for expected, pid in running:
+            rss = read_rss_kb(pid) if pid is not None else None
+            total += max(expected, rss or 0)
+        return total
+
+    def admits(self, expected_kb: float) -> bool:
+        """Whether a process expected to peak at expected_kb fits right now.
+
+        With nothing running a process is always admitted, so a TU larger
+        than the whole budget still gets analyzed, just on its own.
+        """
+        with self._lock:
+            if not self._expected:
+                return True
+        return self.projected_kb() + expected_kb <= self.budget_kb
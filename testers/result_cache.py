@@ -0,0 +1,189 @@
+"""Content-addressed cache of clang-tidy outputs, reused across runs."""
+
+import hashlib
+import json
+import os
+import sys
+from typing import Any
+
+from testers.config import CACHE_DIR
+from testers.include_index import DEFAULT_DEPS_TIMEOUT, entry_headers
+from testers.locality import entry_arguments
+
+DEFAULT_RESULT_CACHE_DIR = os.path.join(CACHE_DIR, "results")
+DEFAULT_RESULT_CACHE_MB = 4096
+
+
+class ResultCache:
+    """clang-tidy outputs keyed by everything that determines them.
+
+    A key covers the fingerprint of the run (clang-tidy binary, checks,
+    config and the other run settings), the TU's compile command and the
+    contents of the TU and of every header it reads, system headers
+    included, as found by include_index.entry_headers(). A TU whose headers
+    cannot be found is never cached. Each output is one file whose modification time is
+    bumped on every hit, so gc() can evict the least recently used ones
+    once the cache outgrows max_bytes.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fingerprint: str = "",
+        max_bytes: int | None = None,
+        deps_timeout: float = DEFAULT_DEPS_TIMEOUT,
+    ) -> None:
+        self.directory = directory
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self.deps_timeout = deps_timeout
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self._digests: dict[str, tuple[tuple[int, int], str]] = {}
+        self._headers: dict[str, list[str] | None] = {}
+
+    def _file_digest(self, path: str) -> str:
+        """Hash a file by content, once per process unless it changes."""
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        known = self._digests.get(path)
+        if known is not None and known[0] == version:
+            return known[1]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        self._digests[path] = (version, sha.hexdigest())
+        return sha.hexdigest()
+
+    def key(self, entry: dict[str, Any]) -> str | None:
+        """The key of a compile DB entry's output, None if it has none."""
+        closure = self.closure_key(entry)
+        if closure is None:
+            return None
+        return hashlib.sha256(f"{self.fingerprint}\0{closure}".encode()).hexdigest()
+
+    def closure_key(self, entry: dict[str, Any]) -> str | None:
+        """Hash a compile DB entry's command and include closure.
+
+        The headers come from the entry's depfile, or from its compiler run
+        with -M when it has none, as CMake's Ninja compile DBs never do. They
+        include the system headers, so an update of the standard library or
+        toolchain changes the key. The compiler is asked once per command
+        and process. Returns None if the headers cannot be found.
+        """
+        directory = entry["directory"]
+        args = entry_arguments(entry)
+        command = json.dumps([directory, entry["file"], args])
+        if command not in self._headers:
+            self._headers[command] = entry_headers(
+                entry, self.deps_timeout, system_headers=True
+            )
+        headers = self._headers[command]
+        if headers is None:
+            return None
+        source = os.path.normpath(os.path.join(directory, entry["file"]))
+        closure = {source, *headers}
+        sha = hashlib.sha256(command.encode())
+        try:
+            for path in sorted(closure):
+                sha.update(f"{path}\0{self._file_digest(path)}\0".encode())
+        except OSError:
+            return None
+        return sha.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:])
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Return the stored {"output", "elapsed"} of key and mark it used."""
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                stored: dict[str, Any] = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return stored
+
+    def put(self, key: str, output: str, elapsed: float) -> None:
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump({"output": output, "elapsed": elapsed}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Warning: could not store {path}: {e}", file=sys.stderr)
+            return
+        self.stored += 1
+
+    def _files(self) -> list[tuple[float, int, str]]:
+        """(mtime, size, path) of every stored output."""
+        files = []
+        for root, _dirs, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def stats(self) -> tuple[int, int]:
+        """Return the number of stored outputs and their total size in bytes."""
+        files = self._files()
+        return len(files), sum(size for _mtime, size, _path in files)
+
+    def gc(self, max_bytes: int | None = None) -> tuple[int, int]:
+        """Evict least recently used outputs until the cache fits max_bytes.
+
+        Defaults to the cache's own bound. Returns the number of evicted
+        outputs and the bytes they took.
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        files = sorted(self._files())
+        total = sum(size for _mtime, size, _path in files)
+        removed = freed = 0
+        for _mtime, size, path in files:
+            if limit is None or total - freed <= limit:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed += 1
+            freed += size
+        return removed, freed
+
+    def describe(self) -> str:
+        return (
+            f"Result cache: {self.hits} hits, {self.misses} misses, "
+            f"{self.stored} stored"
+        )
+
+
+def _mb(size: int) -> str:
+    return f"{size / (1 << 20):.1f} MB"
+
+
+def cache_stats(directory: str) -> None:
+    """Print how many outputs the result cache holds and their size."""
+    count, size = ResultCache(directory).stats()
+    print(f"{directory}: {count} outputs, {_mb(size)}")
+
+
+def cache_gc(directory: str, max_mb: int) -> None:
+    """Evict least recently used outputs until the cache fits max_mb."""
+    cache = ResultCache(directory, max_bytes=max_mb << 20)
+    removed, freed = cache.gc()
+    count, size = cache.stats()
+    print(
+        f"Evicted {removed} outputs ({_mb(freed)}); "
+        f"{count} outputs, {_mb(size)} left in {directory}"
+    )
@@ -0,0 +1,44 @@
+"""Structured per-TU result records, written next to the analyze logs."""
+
+import hashlib
+import json
+import os
+from typing import Any
+
+RESULTS_FILE = "results.jsonl"
+
+
+def command_hash(invocation: list[str]) -> str:
+    """A short, stable identifier of a clang-tidy invocation."""
+    return hashlib.sha256(json.dumps(invocation).encode()).hexdigest()[:16]
+
+
+class ResultLog:
+    """One JSON record per analyzed TU, in the order the TUs finished.
+
+    Unlike the journal, records are not synced to disk one by one: they
+    serve to inspect a run afterwards, while the journal is what makes a
+    run resumable. A resumed run appends to the records of the runs before.
+    """
+
+    def __init__(self, path: str, append: bool = False) -> None:
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if not append:
+            open(path, "w").close()
+
+    def record(self, **values: Any) -> None:
+        with open(self.path, "a") as f:
+            f.write(json.dumps(values) + "\n")
+
+
+def read_results(path: str) -> list[dict[str, Any]]:
+    """Load the records of a results file, skipping a torn last line."""
+    records = []
+    with open(path) as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
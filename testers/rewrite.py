@@ -0,0 +1,146 @@
+"""Rewriting of compile DB commands to drop flags clang-tidy does not need."""
+
+import json
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+
+from testers.locality import entry_arguments
+
+# Where analyze writes the rewritten compile DB, relative to the build dir.
+REWRITTEN_DB_DIR = "ctit-compile-db"
+
+# Flags that cannot change any diagnostic: debug info and precompiled
+# headers left over from the build.
+DEFAULT_DROP_FLAGS = [
+    r"-g(\d|gdb\d?|dwarf(-\d)?|line-tables-only|split-dwarf|column-info)?",
+    r"-include-pch .*",
+    r"-include .*cmake_pch\.hxx",
+]
+
+# Further flags dropped only on request, by group. They cost frontend time
+# too, but can change diagnostics: sanitizer flags change what is
+# preprocessed (__has_feature(address_sanitizer), __SANITIZE_ADDRESS__), and
+# warning options (not -Wp, -Wl and -Wa, which pass options to other tools)
+# change the clang-diagnostic-* output.
+OPTIONAL_DROP_FLAGS = {
+    "sanitizers": [r"-f(no-)?sanitize(-[\w-]+)?(=.*)?"],
+    "warnings": [r"-W(?![lpa],).+"],
+}
+
+# Flags whose value is a separate argument; the pair is matched as one.
+_FLAGS_WITH_VALUE = {
+    "-D",
+    "-I",
+    "-MF",
+    "-MQ",
+    "-MT",
+    "-U",
+    "-idirafter",
+    "-imacros",
+    "-include",
+    "-include-pch",
+    "-iquote",
+    "-isystem",
+    "-o",
+    "-x",
+}
+
+
+@dataclass
+class RewriteRules:
+    """Regexes for the flags to drop, and for flags to keep regardless.
+
+    Each regex must match the whole flag; a flag with a separate value is
+    matched as "flag value", with -Xclang prefixes left out.
+    """
+
+    drop: list[str] = field(default_factory=list)
+    keep: list[str] = field(default_factory=list)
+
+    def dropping_rule(self, flag: str) -> str | None:
+        """Return the first drop rule for flag, None if the flag is kept."""
+        if any(re.fullmatch(rule, flag) for rule in self.keep):
+            return None
+        return next((rule for rule in self.drop if re.fullmatch(rule, flag)), None)
+
+
+def _flag_groups(args: list[str]) -> list[list[str]]:
+    """Split compiler arguments into flags together with their values."""
+    groups: list[list[str]] = []
+    i = 0
+    while i < len(args):
+        group = [args[i]]
+        flag = args[i]
+        if flag == "-Xclang" and i + 1 < len(args):
+            group.append(args[i + 1])
+            flag = args[i + 1]
+        i += len(group)
+        if flag in _FLAGS_WITH_VALUE and i < len(args):
+            value = args[i : i + 2] if args[i] == "-Xclang" else args[i : i + 1]
+            group += value
+            i += len(value)
+        groups.append(group)
+    return groups
+
+
+def rewrite_arguments(
+    args: list[str], rules: RewriteRules
+) -> tuple[list[str], Counter[str]]:
+    """Drop the flags matched by rules; return the rest and drops per rule.
+
+    The compiler itself is never dropped.
+    """
+    kept = args[:1]
+    dropped: Counter[str] = Counter()
+    for group in _flag_groups(args[1:]):
+        rule = rules.dropping_rule(" ".join(a for a in group if a != "-Xclang"))
+        if rule is None:
+            kept += group
+        else:
+            dropped[rule] += 1
+    return kept, dropped
+
+
+def compile_db_dir(build_dir: str) -> str:
+    """The directory of the compile DB clang-tidy should use.
+
+    That is the rewritten one once analyze wrote it, else the build dir.
+    """
+    rewritten = os.path.join(build_dir, REWRITTEN_DB_DIR)
+    if os.path.isfile(os.path.join(rewritten, "compile_commands.json")):
+        return rewritten
+    return build_dir
+
+
+def rewrite_entries(
+    entries: list[dict[str, Any]], rules: RewriteRules
+) -> tuple[list[dict[str, Any]], Counter[str]]:
+    """Rewrite the commands of compile DB entries by rules.
+
+    Entries keep their directory, so relative paths resolve as before.
+    Returns the rewritten entries and how many flags each rule dropped.
+    """
+    dropped: Counter[str] = Counter()
+    rewritten = []
+    for entry in entries:
+        args, entry_dropped = rewrite_arguments(entry_arguments(entry), rules)
+        dropped.update(entry_dropped)
+        new_entry = {
+            k: v for k, v in entry.items() if k not in ("command", "arguments")
+        }
+        rewritten.append({**new_entry, "arguments": args})
+    return rewritten, dropped
+
+
+def write_compile_db(build_dir: str, entries: list[dict[str, Any]]) -> None:
+    """Atomically write entries as build_dir's rewritten compile DB."""
+    out_dir = os.path.join(build_dir, REWRITTEN_DB_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, "compile_commands.json")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(entries, f, indent=2)
+    os.replace(tmp, path)
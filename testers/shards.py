@@ -0,0 +1,45 @@
+"""Deterministic split of the TUs of all projects into shards for several runners."""
+
+import heapq
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Shard:
+    """Shard `index` (1-based) of `count`."""
+
+    index: int
+    count: int
+
+    @classmethod
+    def parse(cls, spec: str) -> "Shard":
+        """Parse "I/N", e.g. "2/4" for the second of four shards."""
+        index, sep, count = spec.partition("/")
+        if not sep or not index.isdigit() or not count.isdigit():
+            raise ValueError(f"expected I/N, got '{spec}'")
+        shard = cls(int(index), int(count))
+        if not 1 <= shard.index <= shard.count:
+            raise ValueError(f"shard index must be between 1 and {shard.count}")
+        return shard
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def assign_shards(
+    items: list[tuple[str, str, int]], count: int
+) -> dict[tuple[str, str], int]:
+    """Assign (project, file, size) items to shards 0..count-1.
+
+    Items are dealt largest first to the least loaded shard, with ties broken
+    by name and shard number. The result only depends on the project files,
+    never on the runner or its history, so every shard computes the same
+    split independently.
+    """
+    loads = [(0, shard) for shard in range(count)]
+    assignment: dict[tuple[str, str], int] = {}
+    for project, file, size in sorted(items, key=lambda x: (-x[2], x[0], x[1])):
+        load, shard = heapq.heappop(loads)
+        assignment[(project, file)] = shard
+        heapq.heappush(loads, (load + max(size, 1), shard))
+    return assignment
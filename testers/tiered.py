@@ -0,0 +1,236 @@
+"""Progressive analysis: a stratified sample of TUs first, the rest after."""
+
+import hashlib
+import json
+import math
+import os
+import sys
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from testers.analyze import (
+    DEFAULT_LOG_DIR,
+    AnalysisConfig,
+    TranslationUnit,
+    analyze,
+    collect_translation_units,
+    compile_db_plans,
+    file_size,
+    get_analysis_configs,
+    plan_projects,
+)
+from testers.config import CACHE_DIR, CONFIG_FILE, PROJECTS_DIR, load_projects
+from testers.generate_report import DEFAULT_OUTPUT_FILE, generate_report
+from testers.history import DEFAULT_HISTORY_FILE, TuHistory, estimate_walls
+
+DEFAULT_SAMPLE_FRACTION = 0.1
+DEFAULT_SAMPLE_FILE = os.path.join(CACHE_DIR, "tu-sample.json")
+
+# Each directory's TUs are split into this many tiers of estimated cost.
+_COST_TIERS = 3
+
+
+@dataclass
+class SampleCoverage:
+    """How much of all TUs a sample covers, by count, cost and directory."""
+
+    tus: int
+    total_tus: int
+    cost: float
+    total_cost: float
+    directories: int
+    total_directories: int
+
+    def describe(self) -> str:
+        share = self.cost / self.total_cost if self.total_cost else 0.0
+        return (
+            f"{self.tus} of {self.total_tus} TUs, an estimated {share:.0%} of "
+            f"the analysis time, from {self.directories} of "
+            f"{self.total_directories} directories"
+        )
+
+
+def _order(unit: TranslationUnit) -> str:
+    return hashlib.sha256(f"{unit.project}/{unit.key}".encode()).hexdigest()
+
+
+def stratified_sample(
+    units: list[TranslationUnit], costs: list[float], fraction: float
+) -> tuple[list[TranslationUnit], SampleCoverage]:
+    """Pick about fraction of units, spread evenly over their strata.
+
+    The strata are the directories of each project, split further into
+    tiers of estimated cost. Units are lined up stratum by stratum, in an
+    order fixed by a hash of their path within one, and every k-th is
+    taken, so each stratum gets its share of the sample, up to rounding,
+    without drawing random numbers.
+    """
+    if not units:
+        return [], SampleCoverage(0, 0, 0.0, 0.0, 0, 0)
+    by_directory: dict[tuple[str, str], list[int]] = {}
+    for i, unit in enumerate(units):
+        directory = (unit.project, os.path.dirname(unit.key))
+        by_directory.setdefault(directory, []).append(i)
+    tiers = {}
+    for members in by_directory.values():
+        ranked = sorted(members, key=lambda i: (costs[i], _order(units[i])))
+        for rank, i in enumerate(ranked):
+            tiers[i] = rank * _COST_TIERS // len(ranked)
+
+    lineup = sorted(
+        range(len(units)),
+        key=lambda i: (
+            units[i].project,
+            os.path.dirname(units[i].key),
+            tiers[i],
+            _order(units[i]),
+        ),
+    )
+    size = max(1, math.ceil(fraction * len(units)))
+    step = len(units) / size
+    picked = [lineup[int((n + 0.5) * step)] for n in range(size)]
+
+    coverage = SampleCoverage(
+        tus=len(picked),
+        total_tus=len(units),
+        cost=sum(costs[i] for i in picked),
+        total_cost=sum(costs),
+        directories=len(
+            {(units[i].project, os.path.dirname(units[i].key)) for i in picked}
+        ),
+        total_directories=len(by_directory),
+    )
+    return [units[i] for i in picked], coverage
+
+
+def load_sample(
+    path: str, key: dict[str, Any]
+) -> tuple[set[tuple[str, str]], SampleCoverage] | None:
+    """Return the sample saved in path for key, None if there is none."""
+    try:
+        with open(path) as f:
+            saved = json.load(f)
+        if saved["key"] != key:
+            return None
+        files = {(project, file) for project, file in saved["files"]}
+        return files, SampleCoverage(**saved["coverage"])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def save_sample(
+    path: str,
+    key: dict[str, Any],
+    files: set[tuple[str, str]],
+    coverage: SampleCoverage,
+) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"key": key, "files": sorted(files), "coverage": asdict(coverage)}, f)
+    os.replace(tmp, path)
+
+
+def pick_sample(
+    fraction: float,
+    work_dir: str = PROJECTS_DIR,
+    config_path: str = CONFIG_FILE,
+    history_file: str = DEFAULT_HISTORY_FILE,
+    sample_file: str = DEFAULT_SAMPLE_FILE,
+    rewrite: bool = True,
+    drop_flag_groups: list[str] | None = None,
+) -> tuple[set[tuple[str, str]], SampleCoverage]:
+    """Return the stratified sample of the TUs of all projects and its coverage.
+
+    The recorded durations the cost tiers come from change with every run,
+    so the sample is saved in sample_file and reused for as long as the
+    fraction, the projects' commits and their TUs stay the same. Reruns of
+    the same change thus analyze the same sample.
+    """
+    projects = load_projects(config_path)
+    configs = get_analysis_configs(config_path)
+    plans = compile_db_plans(projects, configs, rewrite, drop_flag_groups or [])
+    plan_projects(projects, work_dir, plans)
+
+    units = []
+    for project in projects:
+        config = configs.get(project.name, AnalysisConfig(name=project.name))
+        source_dir = os.path.abspath(os.path.join(work_dir, project.name))
+        build_dir = os.path.join(source_dir, "build")
+        if not os.path.isfile(os.path.join(build_dir, "compile_commands.json")):
+            continue
+        found, _total = collect_translation_units(
+            project.name, build_dir, source_dir, config.file_regex
+        )
+        units += found
+
+    files = sorted((u.project, u.key) for u in units)
+    commits = {p.name: p.commit for p in projects}
+    key = {
+        "fraction": fraction,
+        "commits": commits,
+        "files": hashlib.sha256(json.dumps(files).encode()).hexdigest(),
+    }
+    saved = load_sample(sample_file, key)
+    if saved is not None:
+        return saved
+
+    costs, _known = estimate_walls(
+        TuHistory.load(history_file),
+        [(u.project, commits[u.project], u.key, file_size(u.file)) for u in units],
+    )
+    sample, coverage = stratified_sample(units, costs, fraction)
+    picked = {(u.project, u.key) for u in sample}
+    save_sample(sample_file, key, picked, coverage)
+    return picked, coverage
+
+
+def tiered_analyze(
+    fraction: float = DEFAULT_SAMPLE_FRACTION,
+    report: str = DEFAULT_OUTPUT_FILE,
+    sample_file: str = DEFAULT_SAMPLE_FILE,
+    **analyze_args: Any,
+) -> None:
+    """Analyze a stratified sample, report on it, then analyze everything.
+
+    The first pass analyzes the sample picked by pick_sample() and writes a
+    provisional report noting its coverage. The second resumes from the
+    journal of the first, so the sample is not analyzed twice, and
+    rewrites the report for all TUs. analyze_args go to both passes.
+    """
+    if not 0 < fraction < 1:
+        print("Error: the sample fraction must be between 0 and 1.", file=sys.stderr)
+        sys.exit(1)
+    if analyze_args.get("reuse_check_sources") is not None:
+        print(
+            "Error: '--sample-first' cannot be combined with "
+            "'--reuse-by-check-source', whose full runs it would count twice.",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+    log_dir = analyze_args.get("log_dir", DEFAULT_LOG_DIR)
+    files, coverage = pick_sample(
+        fraction,
+        analyze_args.get("work_dir", PROJECTS_DIR),
+        analyze_args.get("config_path", CONFIG_FILE),
+        analyze_args.get("history_file", DEFAULT_HISTORY_FILE),
+        sample_file,
+        analyze_args.get("rewrite", True),
+        analyze_args.get("drop_flag_groups"),
+    )
+    print(f"Sample: {coverage.describe()}")
+
+    analyze(**analyze_args, only_files=files)
+    generate_report(
+        log_dir,
+        report,
+        preamble=(
+            f"> ⏳ **Provisional results** from a stratified sample of "
+            f"{coverage.describe()}. The full run is in progress; this report "
+            "is updated when it finishes."
+        ),
+    )
+
+    analyze(**{**analyze_args, "resume": True})
+    generate_report(log_dir, report)
+    print(f"Sample analyzed first: {coverage.describe()}")
@@ -1,22 +1,54 @@
+import io
+import json
 import os
+import sys
 import tempfile
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import ANY, MagicMock, patch
 
 from testers.analyze import (
     AnalysisConfig,
+    CompileDbPlan,
+    ProjectWork,
+    SchedulerOptions,
+    TranslationUnit,
+    TuLimits,
+    aggregate_profiles,
     analyze,
+    analyze_global,
     analyze_project,
     build_project,
     check_clang_compiler,
+    clang_tidy_command,
+    collect_translation_units,
     configure_cmake,
     configure_project,
     find_run_tidy_script,
+    form_batches,
+    measure_rewrite,
+    plan_compile_db,
+    quick_files,
     remove_clang_tidy_configs,
     run_clang_tidy,
+    run_batch,
+    run_clang_tidy_native,
+    run_translation_unit,
+    run_work_queue,
+    select_files,
+    split_batch_output,
+    untriggered_files,
     get_analysis_configs,
+    write_profile_table,
 )
+from testers.baseline import DIFF_FILE, PERF_FILE
+from testers.check_reuse import CheckReuse
 from testers.config import Project
+from testers.history import TuHistory
+from testers.journal import Journal
+from testers.parse_failures import ParseFailures, compiler_id
+from testers.result_cache import ResultCache
+from testers.results import ResultLog, read_results
+from testers.rewrite import REWRITTEN_DB_DIR
 
 
 class TestCheckClangCompiler(unittest.TestCase):
@@ -145,11 +177,21 @@ class TestBuildProject(unittest.TestCase):
         args = mock_run.call_args[0][0]
         self.assertEqual(args, ["ninja", "-C", "/build", "clang", "clang-tidy"])
 
+    @patch("testers.analyze.subprocess.run")
+    def test_build_with_jobs(self, mock_run):
+        build_project("/build", ["clang"], jobs=6)
+        args = mock_run.call_args[0][0]
+        self.assertEqual(args, ["ninja", "-C", "/build", "-j", "6", "clang"])
+
 
 class TestRunClangTidy(unittest.TestCase):
     def _make_mock_proc(self, lines: list[str]) -> MagicMock:
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, "".join(lines).encode())
+        os.close(write_fd)
         proc = MagicMock()
-        proc.stdout = iter(lines)
+        proc.stdout.fileno.return_value = read_fd
+        self.addCleanup(os.close, read_fd)
         proc.wait.return_value = 0
         return proc
 
@@ -198,6 +240,26 @@ class TestRunClangTidy(unittest.TestCase):
             args = mock_popen.call_args[0][0]
             self.assertIn("^/src/project/clang/.*$", args[-1])
 
+    @patch("testers.analyze.subprocess.Popen")
+    def test_with_jobs(self, mock_popen):
+        mock_popen.return_value = self._make_mock_proc([])
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            run_clang_tidy(
+                "/bin/clang-tidy",
+                "/script/run-clang-tidy.py",
+                "/build",
+                "check",
+                "/src",
+                None,
+                os.path.join(tmp_dir, "test.log"),
+                os.path.join(tmp_dir, "progress.log"),
+                None,
+                jobs=8,
+            )
+
+            args = mock_popen.call_args[0][0]
+            self.assertEqual(args[args.index("-j") + 1], "8")
+
     @patch("testers.analyze.subprocess.Popen")
     def test_with_tidy_config(self, mock_popen):
         mock_popen.return_value = self._make_mock_proc([])
@@ -241,6 +303,1073 @@ class TestRunClangTidy(unittest.TestCase):
                 content = f.read()
             self.assertEqual(content, "line1\nline2\n")
 
+    @patch("testers.analyze._PUMP_CHUNK_BYTES", 7)
+    @patch("testers.analyze.subprocess.Popen")
+    def test_splits_progress_across_chunks(self, mock_popen):
+        mock_popen.return_value = self._make_mock_proc(
+            [
+                "Running clang-tidy in 8 threads\n",
+                "[1/2] clang-tidy a.cpp\n",
+                "a.cpp:1:1: warning: w [check]\n",
+                "[not progress]\n",
+                "[ 2/2] clang-tidy b.cpp\n",
+                "no newline",
+            ]
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, "test.log")
+            progress_file = os.path.join(tmp_dir, "progress.log")
+            with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                run_clang_tidy(
+                    "/bin/ct",
+                    "/script/rct.py",
+                    "/build",
+                    "check",
+                    "/src",
+                    None,
+                    log_file,
+                    progress_file,
+                    None,
+                )
+
+            progress = (
+                "Running clang-tidy in 8 threads\n"
+                "[1/2] clang-tidy a.cpp\n"
+                "[ 2/2] clang-tidy b.cpp\n"
+            )
+            self.assertEqual(stdout.getvalue(), progress)
+            with open(progress_file) as f:
+                self.assertEqual(f.read(), progress)
+            with open(log_file) as f:
+                self.assertEqual(
+                    f.read(),
+                    "a.cpp:1:1: warning: w [check]\n[not progress]\nno newline",
+                )
+
+
+def _write_compile_db(build_dir: str, entries: list[dict]) -> None:
+    os.makedirs(build_dir, exist_ok=True)
+    with open(os.path.join(build_dir, "compile_commands.json"), "w") as f:
+        json.dump(entries, f)
+
+
+class TestCollectTranslationUnits(unittest.TestCase):
+    def test_absolute_sorted_and_deduplicated(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = os.path.join(tmp_dir, "build")
+            _write_compile_db(
+                build_dir,
+                [
+                    {"directory": build_dir, "file": "../b.cpp", "command": "c++"},
+                    {"directory": tmp_dir, "file": "a.cpp", "command": "c++"},
+                    {"directory": tmp_dir, "file": "b.cpp", "command": "c++ -g"},
+                ],
+            )
+            units, total = collect_translation_units("p", build_dir, tmp_dir, None)
+
+            self.assertEqual(total, 3)
+            self.assertEqual(
+                [u.file for u in units],
+                [os.path.join(tmp_dir, "a.cpp"), os.path.join(tmp_dir, "b.cpp")],
+            )
+            self.assertEqual(units[0].project, "p")
+
+    def test_file_regex_anchored_at_source_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = os.path.join(tmp_dir, "build")
+            _write_compile_db(
+                build_dir,
+                [
+                    {"directory": tmp_dir, "file": "clang/a.cpp", "command": "c++"},
+                    {"directory": tmp_dir, "file": "llvm/b.cpp", "command": "c++"},
+                ],
+            )
+            units, _ = collect_translation_units("p", build_dir, tmp_dir, "clang/.*")
+            self.assertEqual(
+                [u.file for u in units], [os.path.join(tmp_dir, "clang/a.cpp")]
+            )
+
+
+class TestPlanCompileDb(unittest.TestCase):
+    def test_filters_collapses_and_caches(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source_dir = os.path.join(tmp_dir, "src")
+            build_dir = os.path.join(source_dir, "build")
+            _write_compile_db(
+                build_dir,
+                [
+                    {
+                        "directory": build_dir,
+                        "file": "../a.cpp",
+                        "command": "cc -g -O1",
+                    },
+                    {"directory": build_dir, "file": "../a.cpp", "command": "cc -O2"},
+                    {"directory": build_dir, "file": "../test/t.cpp", "command": "cc"},
+                    {"directory": build_dir, "file": "../b.cpp", "command": "cc"},
+                ],
+            )
+            plan = CompileDbPlan("(?!test/).*", AnalysisConfig("p").rewrite_rules())
+
+            manifest, cached = plan_compile_db(build_dir, source_dir, plan)
+
+            self.assertFalse(cached)
+            a, b = os.path.join(source_dir, "a.cpp"), os.path.join(source_dir, "b.cpp")
+            self.assertEqual(manifest.files, [a, b])
+            self.assertEqual(manifest.entries, 4)
+            self.assertEqual(manifest.duplicates, 1)
+            self.assertEqual(sum(manifest.dropped.values()), 1)
+            db = os.path.join(build_dir, REWRITTEN_DB_DIR, "compile_commands.json")
+            with open(db) as f:
+                self.assertEqual(
+                    [e["arguments"] for e in json.load(f)], [["cc", "-O1"], ["cc"]]
+                )
+            self.assertTrue(plan_compile_db(build_dir, source_dir, plan)[1])
+
+            with patch("testers.analyze.load_compile_commands") as mock_load:
+                units, total = collect_translation_units(
+                    "p", build_dir, source_dir, "(?!test/).*"
+                )
+            mock_load.assert_not_called()
+            self.assertEqual([u.file for u in units], [a, b])
+            self.assertEqual(total, 4)
+
+    def test_replans_changed_compile_db(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            build_dir = os.path.join(tmp_dir, "build")
+            entry = {"directory": build_dir, "file": "a.cpp", "command": "cc"}
+            _write_compile_db(build_dir, [entry])
+            plan_compile_db(build_dir, tmp_dir, CompileDbPlan())
+
+            _write_compile_db(build_dir, [entry, {**entry, "file": "bb.cpp"}])
+            manifest, cached = plan_compile_db(build_dir, tmp_dir, CompileDbPlan())
+
+            self.assertFalse(cached)
+            self.assertEqual(len(manifest.files), 2)
+
+
+class TestClangTidyCommand(unittest.TestCase):
+    def test_basic(self):
+        cmd = clang_tidy_command("/bin/ct", "/build", "bugprone-*", None)
+        self.assertEqual(
+            cmd, ["/bin/ct", "-p=/build", "-checks=-*,bugprone-*", "-quiet"]
+        )
+
+    def test_all_options(self):
+        cmd = clang_tidy_command(
+            "/bin/ct", "/build", "check", "{}", skip_headers=True, profile_dir="/prof"
+        )
+        self.assertIn("-header-filter=", cmd)
+        self.assertIn("-enable-check-profile", cmd)
+        self.assertIn("-store-check-profile=/prof", cmd)
+        self.assertIn("-config={}", cmd)
+
+
+class TestProfileTable(unittest.TestCase):
+    def test_aggregates_and_formats(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for i in range(2):
+                with open(os.path.join(tmp_dir, f"{i}.json"), "w") as f:
+                    json.dump(
+                        {
+                            "file": f"{i}.cpp",
+                            "profile": {
+                                "time.clang-tidy.check-a.wall": 1.5,
+                                "time.clang-tidy.check-a.user": 1.0,
+                                "time.clang-tidy.check-a.sys": 0.5,
+                            },
+                        },
+                        f,
+                    )
+            checks = aggregate_profiles(tmp_dir)
+            self.assertEqual(checks["check-a"]["wall"], 3.0)
+
+            out = io.StringIO()
+            write_profile_table(out, checks)
+            text = out.getvalue()
+            self.assertIn("clang-tidy checks profiling", text)
+            self.assertIn("(3.0000 wall clock)", text)
+            self.assertRegex(text, r"3\.0000 \(100\.0%\)   check-a\n")
+
+    def test_empty_profile_writes_nothing(self):
+        out = io.StringIO()
+        write_profile_table(out, {})
+        self.assertEqual(out.getvalue(), "")
+
+
+def _write_fake_clang_tidy(tmp_dir: str) -> str:
+    """Create a clang-tidy stand-in that warns once per file and logs its calls."""
+    path = os.path.join(tmp_dir, "clang-tidy")
+    with open(path, "w") as f:
+        f.write(
+            f"#!{sys.executable}\n"
+            "import sys\n"
+            f"with open({path + '.trace'!r}, 'a') as trace:\n"
+            "    trace.write(sys.argv[-1] + '\\n')\n"
+            "print(sys.argv[-1] + ':1:1: warning: w [check]')\n"
+        )
+    os.chmod(path, 0o755)
+    return path
+
+
+def _read_trace(clang_tidy: str) -> list[str]:
+    with open(clang_tidy + ".trace") as f:
+        return [os.path.basename(line) for line in f.read().splitlines()]
+
+
+class TestRunTranslationUnit(unittest.TestCase):
+    def test_captures_output_and_peak_rss(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            unit = TranslationUnit("p", "/src/a.cpp", "/build")
+            pids: list[int] = []
+
+            result = run_translation_unit([clang_tidy], unit, pids.append)
+
+            self.assertEqual(result.returncode, 0)
+            self.assertEqual(result.output, "/src/a.cpp:1:1: warning: w [check]\n")
+            self.assertEqual(result.invocation, [clang_tidy, "/src/a.cpp"])
+            self.assertGreater(result.peak_rss_kb, 0)
+            self.assertEqual(len(pids), 1)
+
+
+def _write_batching_clang_tidy(tmp_dir: str) -> str:
+    """Create a clang-tidy stand-in that takes several files per call.
+
+    It logs each call's files on one line and crashes when given more than
+    one file and any of them is named crash*.
+    """
+    path = os.path.join(tmp_dir, "clang-tidy")
+    with open(path, "w") as f:
+        f.write(
+            f"#!{sys.executable}\n"
+            "import os, signal, sys\n"
+            "files = [a for a in sys.argv[1:] if not a.startswith('-')]\n"
+            f"with open({path + '.trace'!r}, 'a') as trace:\n"
+            "    trace.write(' '.join(os.path.basename(f) for f in files) + '\\n')\n"
+            "for f in files:\n"
+            "    print(f + ':1:1: warning: w [check]')\n"
+            "    print(f + ':1:1: note: n')\n"
+            "if len(files) > 1 and any('crash' in f for f in files):\n"
+            "    os.kill(os.getpid(), signal.SIGSEGV)\n"
+        )
+    os.chmod(path, 0o755)
+    return path
+
+
+class TestSplitBatchOutput(unittest.TestCase):
+    def test_attributes_diagnostics_and_notes(self):
+        output = (
+            "/s/a.cpp:1:1: warning: x [c]\n"
+            "  int x;\n"
+            "/s/inc.h:2:1: note: declared here\n"
+            "/s/b.cpp:3:1: warning: y [c]\n"
+            "/s/inc.h:4:1: warning: z [c]\n"
+        )
+
+        chunks = split_batch_output(output, ["/s/a.cpp", "/s/b.cpp"])
+
+        self.assertEqual(
+            chunks["/s/a.cpp"],
+            "/s/a.cpp:1:1: warning: x [c]\n"
+            "  int x;\n"
+            "/s/inc.h:2:1: note: declared here\n"
+            "/s/inc.h:4:1: warning: z [c]\n",
+        )
+        self.assertEqual(chunks["/s/b.cpp"], "/s/b.cpp:3:1: warning: y [c]\n")
+
+
+class TestFormBatches(unittest.TestCase):
+    def test_expensive_tus_run_alone(self):
+        units = [
+            TranslationUnit("p", f"/s/{name}.cpp", "/b", cost=cost)
+            for name, cost in [("a", 1), ("big", 50), ("b", 2), ("c", 3), ("d", 4)]
+        ]
+
+        batches = form_batches(units, batch_size=3, target_cost=10)
+
+        self.assertEqual(
+            [[os.path.basename(u.file) for u in b] for b in batches],
+            [["big.cpp"], ["d.cpp", "c.cpp", "b.cpp"], ["a.cpp"]],
+        )
+
+    def test_batch_size_one_disables_batching(self):
+        units = [TranslationUnit("p", f"/s/{i}.cpp", "/b", cost=1) for i in range(3)]
+
+        self.assertEqual(len(form_batches(units, 1, 100)), 3)
+
+
+class TestRunBatch(unittest.TestCase):
+    def test_one_process_for_all_files(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_batching_clang_tidy(tmp_dir)
+            units = [
+                TranslationUnit("p", f"/src/{name}.cpp", "/build", cost=cost)
+                for name, cost in [("a", 3.0), ("b", 1.0)]
+            ]
+
+            results = run_batch([clang_tidy], units)
+
+            self.assertEqual(_read_trace(clang_tidy), ["a.cpp b.cpp"])
+            self.assertEqual(
+                [r.output for r in results],
+                [
+                    "/src/a.cpp:1:1: warning: w [check]\n/src/a.cpp:1:1: note: n\n",
+                    "/src/b.cpp:1:1: warning: w [check]\n/src/b.cpp:1:1: note: n\n",
+                ],
+            )
+            self.assertEqual([r.batch_size for r in results], [2, 2])
+            self.assertAlmostEqual(results[0].elapsed, 3 * results[1].elapsed)
+            self.assertFalse(any(r.crashed for r in results))
+
+
+class TestWatchdog(unittest.TestCase):
+    def _write_script(self, tmp_dir: str, body: str) -> str:
+        path = os.path.join(tmp_dir, "clang-tidy")
+        with open(path, "w") as f:
+            f.write(f"#!{sys.executable}\nimport sys, time\nprint('partial')\n{body}")
+        os.chmod(path, 0o755)
+        return path
+
+    def test_kills_hanging_tu(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = self._write_script(tmp_dir, "time.sleep(30)\n")
+            unit = TranslationUnit("p", "/src/a.cpp", "/build")
+            command = [clang_tidy, "-checks=-*,bugprone-foo"]
+
+            result = run_translation_unit(command, unit, limits=TuLimits(timeout=0.3))
+
+            self.assertEqual(result.limit_exceeded, "TIMEOUT")
+            self.assertLess(result.elapsed, 10)
+            self.assertEqual(
+                result.output,
+                "CTIT TIMEOUT: /src/a.cpp exceeded the 0.3s per-TU time limit "
+                "(checks: bugprone-foo)\n",
+            )
+
+    def test_kills_tu_over_memory_limit(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = self._write_script(
+                tmp_dir, "data = bytearray(200 << 20)\ntime.sleep(30)\n"
+            )
+            unit = TranslationUnit("p", "/src/a.cpp", "/build")
+            command = [clang_tidy, "-checks=-*,bugprone-foo"]
+
+            result = run_translation_unit(command, unit, limits=TuLimits(memory_mb=100))
+
+            self.assertEqual(result.limit_exceeded, "OOM")
+            self.assertTrue(result.output.startswith("CTIT OOM: /src/a.cpp exceeded"))
+
+    def test_tu_within_limits_is_untouched(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            unit = TranslationUnit("p", "/src/a.cpp", "/build")
+
+            result = run_translation_unit(
+                [clang_tidy], unit, limits=TuLimits(timeout=60, memory_mb=4096)
+            )
+
+            self.assertIsNone(result.limit_exceeded)
+            self.assertEqual(result.output, "/src/a.cpp:1:1: warning: w [check]\n")
+
+
+class TestRunClangTidyNative(unittest.TestCase):
+    def test_writes_log_and_progress(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            build_dir = os.path.join(tmp_dir, "build")
+            _write_compile_db(
+                build_dir,
+                [
+                    {"directory": tmp_dir, "file": "a.cpp", "command": "c++"},
+                    {"directory": tmp_dir, "file": "b.cpp", "command": "c++"},
+                ],
+            )
+            log_file = os.path.join(tmp_dir, "proj.log")
+            progress_file = os.path.join(tmp_dir, "progress.log")
+            run_clang_tidy_native(
+                clang_tidy,
+                build_dir,
+                "check",
+                tmp_dir,
+                None,
+                log_file,
+                progress_file,
+                None,
+                options=SchedulerOptions(jobs=2),
+            )
+
+            with open(log_file) as f:
+                log = f.read()
+            with open(progress_file) as f:
+                progress = f.read().splitlines()
+
+            self.assertIn(f"{tmp_dir}/a.cpp:1:1: warning: w [check]", log)
+            self.assertIn(f"{tmp_dir}/b.cpp:1:1: warning: w [check]", log)
+            self.assertTrue(progress[0].startswith("Running clang-tidy in 2 threads"))
+            self.assertRegex(
+                progress[1], rf"^\[1/2\]\[\d+\.\ds\] {clang_tidy} -p=.*\(peak RSS"
+            )
+            self.assertEqual(sorted(_read_trace(clang_tidy)), ["a.cpp", "b.cpp"])
+
+    def test_resume_skips_journaled_tus_with_identical_log(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            build_dir = os.path.join(tmp_dir, "build")
+            _write_compile_db(
+                build_dir,
+                [
+                    {"directory": tmp_dir, "file": f, "command": "c++"}
+                    for f in ("a.cpp", "b.cpp", "c.cpp")
+                ],
+            )
+            log_file = os.path.join(tmp_dir, "proj.log")
+            progress_file = os.path.join(tmp_dir, "progress.log")
+            journal_file = os.path.join(tmp_dir, "journal.jsonl")
+
+            def run(journal: Journal) -> str:
+                run_clang_tidy_native(
+                    clang_tidy,
+                    build_dir,
+                    "check",
+                    tmp_dir,
+                    None,
+                    log_file,
+                    progress_file,
+                    None,
+                    options=SchedulerOptions(jobs=3, journal=journal),
+                    commit="c",
+                )
+                with open(log_file) as f:
+                    return f.read()
+
+            with patch("sys.stdout", new_callable=io.StringIO):
+                uninterrupted = run(Journal.open(journal_file, "fp"))
+                os.remove(clang_tidy + ".trace")
+
+                # An interrupted run that only got to finish b.cpp.
+                journal = Journal.open(journal_file, "fp")
+                b_file = os.path.join(tmp_dir, "b.cpp")
+                journal.record(
+                    "proj", "c", b_file, output=f"{b_file}:1:1: warning: w [check]\n"
+                )
+                resumed = run(Journal.open(journal_file, "fp", resume=True))
+
+            self.assertEqual(sorted(_read_trace(clang_tidy)), ["a.cpp", "c.cpp"])
+            self.assertEqual(resumed, uninterrupted)
+            self.assertEqual(
+                [line.split(":")[0] for line in resumed.splitlines()],
+                [os.path.join(tmp_dir, f) for f in ("a.cpp", "b.cpp", "c.cpp")],
+            )
+
+
+class TestRunWorkQueue(unittest.TestCase):
+    def test_starts_slowest_first_and_records_history(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            history = TuHistory(os.path.join(tmp_dir, "history.json"))
+            history.record("p", "c1", "fast.cpp", wall=1.0)
+            history.record("p", "c1", "slow.cpp", wall=90.0)
+            history.record("p", "c1", "mid.cpp", wall=10.0)
+            units = [
+                TranslationUnit("p", os.path.join(tmp_dir, f), tmp_dir, tmp_dir)
+                for f in ("fast.cpp", "mid.cpp", "slow.cpp")
+            ]
+            work = ProjectWork("p", units, [clang_tidy], io.StringIO(), commit="c1")
+
+            run_work_queue(
+                [work], io.StringIO(), SchedulerOptions(jobs=1, history=history)
+            )
+
+            self.assertEqual(
+                _read_trace(clang_tidy), ["slow.cpp", "mid.cpp", "fast.cpp"]
+            )
+            reloaded = TuHistory.load(history.path)
+            record = reloaded.lookup("p", "c1", "fast.cpp")
+            assert record is not None
+            self.assertGreater(record["rss"], 0)
+
+    def test_writes_result_records(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            units = [
+                TranslationUnit("p", os.path.join(tmp_dir, "a.cpp"), tmp_dir, tmp_dir)
+            ]
+            work = ProjectWork("p", units, [clang_tidy], io.StringIO(), commit="c1")
+            results = ResultLog(os.path.join(tmp_dir, "results.jsonl"))
+
+            run_work_queue(
+                [work], io.StringIO(), SchedulerOptions(jobs=1, results=results)
+            )
+
+            [record] = read_results(results.path)
+            self.assertEqual(record["project"], "p")
+            self.assertEqual(record["commit"], "c1")
+            self.assertEqual(record["file"], "a.cpp")
+            self.assertEqual(record["exit_code"], 0)
+            self.assertIsNone(record["signal"])
+            self.assertFalse(record["crashed"])
+            self.assertEqual(record["diagnostics"], {"check": 1})
+            self.assertGreater(record["peak_rss_kb"], 0)
+            self.assertAlmostEqual(record["end"] - record["start"], record["wall"], 2)
+
+    def test_diffs_against_baseline_binary(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            baseline = os.path.join(tmp_dir, "baseline-clang-tidy")
+            with open(baseline, "w") as f:
+                f.write(
+                    f"#!{sys.executable}\n"
+                    "import sys\n"
+                    "print(sys.argv[-1] + ':2:1: warning: old [check]')\n"
+                )
+            os.chmod(baseline, 0o755)
+            units = [
+                TranslationUnit("p", os.path.join(tmp_dir, f), tmp_dir, tmp_dir)
+                for f in ("a.cpp", "b.cpp")
+            ]
+            log = io.StringIO()
+            work = ProjectWork("p", units, [clang_tidy], log, commit="c1")
+            diffs = ResultLog(os.path.join(tmp_dir, "diff.jsonl"))
+
+            run_work_queue(
+                [work],
+                io.StringIO(),
+                SchedulerOptions(jobs=1, batch_size=2, baseline=baseline, diffs=diffs),
+            )
+
+            records = sorted(read_results(diffs.path), key=lambda r: r["file"])
+            self.assertEqual([r["file"] for r in records], ["a.cpp", "b.cpp"])
+            a = os.path.join(tmp_dir, "a.cpp")
+            self.assertEqual(records[0]["added"], [f"{a}:1:1: warning: w [check]"])
+            self.assertEqual(records[0]["removed"], [f"{a}:2:1: warning: old [check]"])
+            self.assertEqual(records[0]["unchanged"], 0)
+            self.assertFalse(records[0]["baseline_crashed"])
+            self.assertNotIn("old", log.getvalue())
+
+    def test_baseline_binary_stores_no_check_profiles(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            baseline = os.path.join(tmp_dir, "baseline-clang-tidy")
+            trace = os.path.join(tmp_dir, "trace")
+            with open(baseline, "w") as f:
+                f.write(
+                    f"#!{sys.executable}\n"
+                    "import sys\n"
+                    f"open({trace!r}, 'a').write(' '.join(sys.argv[1:]) + '\\n')\n"
+                )
+            os.chmod(baseline, 0o755)
+            units = [
+                TranslationUnit("p", os.path.join(tmp_dir, "a.cpp"), tmp_dir, tmp_dir)
+            ]
+            command = [
+                clang_tidy,
+                "-checks=-*,check",
+                "-enable-check-profile",
+                f"-store-check-profile={tmp_dir}",
+            ]
+            work = ProjectWork("p", units, command, io.StringIO(), commit="c1")
+
+            run_work_queue(
+                [work], io.StringIO(), SchedulerOptions(jobs=1, baseline=baseline)
+            )
+
+            with open(trace) as f:
+                self.assertEqual(
+                    f.read(), f"-checks=-*,check {os.path.join(tmp_dir, 'a.cpp')}\n"
+                )
+
+    def test_skips_untriggered_units(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            units = [
+                TranslationUnit("p", os.path.join(tmp_dir, f), tmp_dir, tmp_dir)
+                for f in ("a.cpp", "b.cpp", "c.cpp")
+            ]
+            log = io.StringIO()
+            work = ProjectWork("p", units, [clang_tidy], log, commit="c1")
+
+            run_work_queue(
+                [work],
+                io.StringIO(),
+                SchedulerOptions(jobs=1, untriggered={("p", "b.cpp"), ("p", "c.cpp")}),
+            )
+
+            self.assertEqual(_read_trace(clang_tidy), ["a.cpp"])
+            self.assertIn(
+                "CTIT PREFILTER: skipped 2 of 3 TUs containing none of the checks' "
+                "trigger identifiers\n",
+                log.getvalue(),
+            )
+
+    def test_replays_cached_outputs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            entries = []
+            for name in ("a", "b"):
+                with open(os.path.join(tmp_dir, f"{name}.cpp"), "w") as f:
+                    f.write("int x;\n")
+                with open(os.path.join(tmp_dir, f"{name}.o.d"), "w") as f:
+                    f.write(f"{name}.o: {name}.cpp\n")
+                args = ["cc", "-MF", f"{name}.o.d", "-c", f"{name}.cpp"]
+                entries.append(
+                    {"directory": tmp_dir, "file": f"{name}.cpp", "arguments": args}
+                )
+            _write_compile_db(tmp_dir, entries)
+
+            def run() -> str:
+                units = [
+                    TranslationUnit("p", os.path.join(tmp_dir, f), tmp_dir, tmp_dir)
+                    for f in ("a.cpp", "b.cpp")
+                ]
+                log = io.StringIO()
+                work = ProjectWork("p", units, [clang_tidy], log, commit="c1")
+                cache = ResultCache(os.path.join(tmp_dir, "cache"), "fingerprint")
+                with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                    run_work_queue(
+                        [work],
+                        io.StringIO(),
+                        SchedulerOptions(jobs=1, result_cache=cache, results=results),
+                    )
+                self.assertIn(cache.describe(), stdout.getvalue())
+                return log.getvalue()
+
+            results = ResultLog(os.path.join(tmp_dir, "results.jsonl"))
+            first = run()
+            with open(os.path.join(tmp_dir, "b.cpp"), "w") as f:
+                f.write("int y;\n")
+            results = ResultLog(os.path.join(tmp_dir, "results.jsonl"))
+            second = run()
+
+            self.assertEqual(first, second)
+            self.assertEqual(_read_trace(clang_tidy), ["a.cpp", "b.cpp", "b.cpp"])
+            # The replayed TU has a result record like the analyzed one.
+            records = sorted(read_results(results.path), key=lambda r: r["file"])
+            self.assertEqual([r["file"] for r in records], ["a.cpp", "b.cpp"])
+            self.assertEqual(records[0]["diagnostics"], {"check": 1})
+            self.assertEqual(records[0]["wall"], 0.0)
+
+    def test_reuses_outputs_of_unchanged_checks(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Warns once per enabled check, on the line of its position.
+            clang_tidy = os.path.join(tmp_dir, "clang-tidy")
+            with open(clang_tidy, "w") as f:
+                f.write(
+                    f"#!{sys.executable}\n"
+                    "import sys\n"
+                    "checks = sys.argv[1].removeprefix('-checks=-*,').split(',')\n"
+                    f"with open({clang_tidy + '.trace'!r}, 'a') as trace:\n"
+                    "    trace.write(','.join(checks) + '\\n')\n"
+                    "for check in checks:\n"
+                    "    line = ['a', 'b'].index(check) + 1\n"
+                    "    print(f'{sys.argv[-1]}:{line}:1: warning: w [{check}]')\n"
+                )
+            os.chmod(clang_tidy, 0o755)
+            with open(os.path.join(tmp_dir, "t.cpp"), "w") as f:
+                f.write("int x;\n")
+            with open(os.path.join(tmp_dir, "t.o.d"), "w") as f:
+                f.write("t.o: t.cpp\n")
+            args = ["cc", "-MF", "t.o.d", "-c", "t.cpp"]
+            _write_compile_db(
+                tmp_dir, [{"directory": tmp_dir, "file": "t.cpp", "arguments": args}]
+            )
+
+            def run(keys: dict[str, str], full: bool = False) -> str:
+                unit = TranslationUnit(
+                    "p", os.path.join(tmp_dir, "t.cpp"), tmp_dir, tmp_dir
+                )
+                log = io.StringIO()
+                work = ProjectWork(
+                    "p", [unit], [clang_tidy, "-checks=-*,a,b"], log, commit="c1"
+                )
+                cache = ResultCache(os.path.join(tmp_dir, "cache"))
+                reuse = CheckReuse(cache, {"": "base", **keys}, ["a", "b"], full)
+                with (
+                    patch("sys.stdout", new_callable=io.StringIO),
+                    patch("sys.stderr", new_callable=io.StringIO) as stderr,
+                ):
+                    run_work_queue(
+                        [work],
+                        io.StringIO(),
+                        SchedulerOptions(jobs=1, check_reuse=reuse),
+                    )
+                self.assertEqual(
+                    log.getvalue(),
+                    f"{unit.file}:1:1: warning: w [a]\n"
+                    f"{unit.file}:2:1: warning: w [b]\n",
+                )
+                return stderr.getvalue()
+
+            run({"a": "a1", "b": "b1"})
+            run({"a": "a1", "b": "b1"})
+            run({"a": "a1", "b": "b2"})
+            self.assertEqual(run({"a": "a1", "b": "b2"}, full=True), "")
+            with open(clang_tidy + ".trace") as f:
+                self.assertEqual(f.read().splitlines(), ["a,b", "b", "a,b"])
+
+            # A stored output the key failed to invalidate.
+            cache = ResultCache(os.path.join(tmp_dir, "cache"))
+            reuse = CheckReuse(cache, {"": "base", "a": "a1"}, ["a"])
+            entry = {"directory": tmp_dir, "file": "t.cpp", "arguments": args}
+            closure = cache.closure_key(entry)
+            assert closure is not None
+            reuse.store(closure, ["a"], "t.cpp:9:1: warning: stale [a]\n")
+            self.assertIn("[p] t.cpp", run({"a": "a1", "b": "b2"}, full=True))
+
+    def test_memory_budget_serializes_large_tus(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = os.path.join(tmp_dir, "clang-tidy")
+            trace = os.path.join(tmp_dir, "trace")
+            with open(clang_tidy, "w") as f:
+                f.write(
+                    f"#!{sys.executable}\n"
+                    "import sys, time\n"
+                    f"open({trace!r}, 'a').write('start\\n')\n"
+                    "time.sleep(0.2)\n"
+                    f"open({trace!r}, 'a').write('end\\n')\n"
+                )
+            os.chmod(clang_tidy, 0o755)
+
+            # Each TU is known to peak at 800 MB, two never fit in 1000 MB.
+            history = TuHistory(os.path.join(tmp_dir, "history.json"))
+            units = []
+            for i in range(3):
+                history.record("p", "c", f"{i}.cpp", wall=1.0, rss=800 * 1024)
+                units.append(
+                    TranslationUnit(
+                        "p", os.path.join(tmp_dir, f"{i}.cpp"), tmp_dir, tmp_dir
+                    )
+                )
+            work = ProjectWork("p", units, [clang_tidy], io.StringIO(), commit="c")
+            options = SchedulerOptions(jobs=3, history=history, memory_budget_mb=1000)
+
+            run_work_queue([work], io.StringIO(), options)
+
+            with open(trace) as f:
+                self.assertEqual(f.read().split(), ["start", "end"] * 3)
+
+    def test_batches_cheap_tus_and_retries_crashed_batch(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_batching_clang_tidy(tmp_dir)
+            history = TuHistory(os.path.join(tmp_dir, "history.json"))
+            names = ["big.cpp", "a.cpp", "crash.cpp", "b.cpp", "c.cpp"]
+            for name, wall in zip(names, [40.0, 4.0, 3.0, 2.0, 1.0]):
+                history.record("p", "c", name, wall=wall)
+            units = [
+                TranslationUnit("p", os.path.join(tmp_dir, f), tmp_dir, tmp_dir)
+                for f in sorted(names)
+            ]
+            log = io.StringIO()
+            work = ProjectWork("p", units, [clang_tidy], log, commit="c")
+            options = SchedulerOptions(jobs=1, history=history, batch_size=2)
+
+            with patch("sys.stdout", new_callable=io.StringIO):
+                run_work_queue([work], io.StringIO(), options)
+
+            self.assertEqual(
+                _read_trace(clang_tidy),
+                ["big.cpp", "a.cpp crash.cpp", "a.cpp", "crash.cpp", "b.cpp c.cpp"],
+            )
+            for name in names:
+                self.assertEqual(
+                    log.getvalue().count(f"{name}:1:1: warning: w [check]"), 1
+                )
+            self.assertNotIn("Segmentation", log.getvalue())
+            # A batch's peak RSS is no figure for its TUs.
+            self.assertIn("rss", history.lookup("p", "c", "big.cpp"))
+            self.assertEqual(history.lookup("p", "c", "b.cpp"), {"wall": ANY})
+
+    def test_stops_project_flooded_with_diagnostics(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            units = [
+                TranslationUnit("p", os.path.join(tmp_dir, f), tmp_dir, tmp_dir)
+                for f in ("a.cpp", "b.cpp", "c.cpp")
+            ]
+            log = io.StringIO()
+            work = ProjectWork("p", units, [clang_tidy], log)
+            options = SchedulerOptions(jobs=1, max_diagnostics=1)
+
+            with patch("sys.stdout", new_callable=io.StringIO):
+                run_work_queue([work], io.StringIO(), options)
+
+            self.assertEqual(len(_read_trace(clang_tidy)), 2)
+            self.assertIn(
+                "CTIT FLOOD: stopped after 2 diagnostics from check, over the limit "
+                "of 1; 1 of 3 TUs were not analyzed\n",
+                log.getvalue(),
+            )
+
+    def test_caches_and_skips_tus_that_fail_to_parse(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = os.path.join(tmp_dir, "clang-tidy")
+            compiler = os.path.join(tmp_dir, "clang")
+            scripts = {
+                clang_tidy: (
+                    "f = sys.argv[-1]\n"
+                    "print(f + ':1:1: warning: w [check]')\n"
+                    "if 'bad' in f:\n"
+                    "    print(f + ':1:1: error: no gen.h [clang-diagnostic-error]')\n"
+                ),
+                compiler: (
+                    "if 'bad.cpp' in sys.argv:\n"
+                    "    sys.exit('bad.cpp:1:1: fatal error: no gen.h')\n"
+                ),
+            }
+            for path, body in scripts.items():
+                with open(path, "w") as f:
+                    f.write(f"#!{sys.executable}\nimport sys\n{body}")
+                os.chmod(path, 0o755)
+            _write_compile_db(
+                tmp_dir,
+                [
+                    {"directory": tmp_dir, "file": f, "arguments": [compiler, f]}
+                    for f in ("bad.cpp", "good.cpp")
+                ],
+            )
+            cache = ParseFailures(os.path.join(tmp_dir, "parse-failures.json"))
+
+            def run(**kwargs) -> str:
+                units = [
+                    TranslationUnit("p", os.path.join(tmp_dir, f), tmp_dir, tmp_dir)
+                    for f in ("bad.cpp", "good.cpp")
+                ]
+                log = io.StringIO()
+                work = ProjectWork("p", units, [clang_tidy], log, commit="c")
+                options = SchedulerOptions(jobs=1, parse_failures=cache, **kwargs)
+                with patch("sys.stdout", new_callable=io.StringIO):
+                    run_work_queue([work], io.StringIO(), options)
+                return log.getvalue()
+
+            self.assertIn("[clang-diagnostic-error]", run())
+            reloaded = ParseFailures.load(cache.path)
+            self.assertEqual(
+                list(reloaded.failures("p", "c", compiler_id(compiler))), ["bad.cpp"]
+            )
+
+            log = run()
+            self.assertNotIn("bad.cpp:1:1: warning", log)
+            self.assertIn("good.cpp:1:1: warning", log)
+            self.assertIn(
+                f"CTIT PARSE-FAILURE: {tmp_dir}/bad.cpp (skipped): "
+                "bad.cpp:1:1: fatal error: no gen.h\n",
+                log,
+            )
+
+            log = run(analyze_parse_failures=True)
+            self.assertIn("bad.cpp:1:1: warning", log)
+            self.assertIn("bad.cpp (analyzed anyway)", log)
+
+    def test_locality_order_runs_related_tus_back_to_back(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            files = {
+                "a/1.cpp": "-Ia",
+                "b/1.cpp": "-Ib",
+                "a/2.cpp": "-Ia",
+                "c/1.cpp": "",
+            }
+            _write_compile_db(
+                tmp_dir,
+                [
+                    {"directory": tmp_dir, "file": f, "command": f"cc {flag} -c {f}"}
+                    for f, flag in files.items()
+                ],
+            )
+            history = TuHistory(os.path.join(tmp_dir, "history.json"))
+            history.record_run("lpt", tus=3, read_mb=5.0, iowait=1.5)
+            for name, wall in zip(files, [1.0, 6.0, 1.0, 1.5]):
+                history.record("p", "c", name, wall=wall)
+            units = [
+                TranslationUnit("p", os.path.join(tmp_dir, f), tmp_dir, tmp_dir)
+                for f in sorted(files)
+            ]
+            work = ProjectWork("p", units, [clang_tidy], io.StringIO(), commit="c")
+            options = SchedulerOptions(jobs=1, history=history, order="locality")
+
+            with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                run_work_queue([work], io.StringIO(), options)
+
+            # The a/ TUs form one chain that runs ahead of the costlier c/1.cpp.
+            with open(clang_tidy + ".trace") as f:
+                trace = [os.path.relpath(p, tmp_dir) for p in f.read().split()]
+            self.assertEqual(trace, ["b/1.cpp", "a/1.cpp", "a/2.cpp", "c/1.cpp"])
+            self.assertIn("I/O in locality order: ", stdout.getvalue())
+            self.assertIn("; last lpt run: 5 MB read", stdout.getvalue())
+            reloaded = TuHistory.load(history.path)
+            run = reloaded.last_run("locality")
+            assert run is not None
+            self.assertEqual(run["tus"], 4)
+
+    def test_locality_order_groups_by_headers_without_depfiles(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            # Answers -MM as if only b/ used a header of its own.
+            compiler = os.path.join(tmp_dir, "cc")
+            with open(compiler, "w") as f:
+                f.write(
+                    f"#!{sys.executable}\n"
+                    "import sys\n"
+                    "src = sys.argv[1]\n"
+                    "header = 'b.h' if src.startswith('b') else 'common.h'\n"
+                    "print(f'x.o: {src} {header}')\n"
+                )
+            os.chmod(compiler, 0o755)
+            files = ["a/1.cpp", "b/1.cpp", "c/1.cpp"]
+            _write_compile_db(
+                tmp_dir,
+                [
+                    {"directory": tmp_dir, "file": f, "command": f"{compiler} -c {f}"}
+                    for f in files
+                ],
+            )
+            history = TuHistory(os.path.join(tmp_dir, "history.json"))
+            for name, wall in zip(files, [6.0, 1.0, 1.0]):
+                history.record("p", "c", name, wall=wall)
+            units = [
+                TranslationUnit("p", os.path.join(tmp_dir, f), tmp_dir, tmp_dir)
+                for f in files
+            ]
+            work = ProjectWork("p", units, [clang_tidy], io.StringIO(), commit="c")
+            options = SchedulerOptions(jobs=1, history=history, order="locality")
+
+            with patch("sys.stdout", new_callable=io.StringIO):
+                run_work_queue([work], io.StringIO(), options)
+
+            # c/ shares common.h with a/, so it follows a/ ahead of b/.
+            with open(clang_tidy + ".trace") as f:
+                trace = [os.path.relpath(p, tmp_dir) for p in f.read().split()]
+            self.assertEqual(trace, ["a/1.cpp", "c/1.cpp", "b/1.cpp"])
+
+
+class TestMeasureRewrite(unittest.TestCase):
+    def test_ignores_warning_counts_of_dropped_flags(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = os.path.join(tmp_dir, "clang-tidy")
+            with open(clang_tidy, "w") as f:
+                f.write(
+                    f"#!{sys.executable}\n"
+                    "import sys\n"
+                    "print(sys.argv[-1] + ':1:1: warning: w [check]')\n"
+                    "if not sys.argv[1].endswith('ctit-compile-db'):\n"
+                    "    print('2 warnings generated.')\n"
+                )
+            os.chmod(clang_tidy, 0o755)
+            source_dir = os.path.join(tmp_dir, "p")
+            build_dir = os.path.join(source_dir, "build")
+            _write_compile_db(
+                build_dir,
+                [
+                    {"directory": build_dir, "file": f"../{name}", "command": "cc -g"}
+                    for name in ("a.cpp", "b.cpp", "c.cpp", "d.cpp")
+                ],
+            )
+            plan = CompileDbPlan(rules=AnalysisConfig("p").rewrite_rules())
+            plan_compile_db(build_dir, source_dir, plan)
+
+            with patch("sys.stdout", new_callable=io.StringIO) as stdout:
+                measure_rewrite(
+                    Project("p", "u", "c"),
+                    AnalysisConfig("p"),
+                    source_dir,
+                    clang_tidy,
+                    "check",
+                    None,
+                    False,
+                    2,
+                )
+
+            self.assertRegex(
+                stdout.getvalue(),
+                r"\[p\] Rewrite on 2 sampled TUs: .*, diagnostics identical",
+            )
+
+    def test_times_original_commands_without_duplicate_entries(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Records how many entries its compile DB has for the file.
+            trace = os.path.join(tmp_dir, "trace")
+            clang_tidy = os.path.join(tmp_dir, "clang-tidy")
+            with open(clang_tidy, "w") as f:
+                f.write(
+                    f"#!{sys.executable}\n"
+                    "import json, os, sys\n"
+                    "db = sys.argv[1].removeprefix('-p=')\n"
+                    "entries = json.load(open(os.path.join(db, 'compile_commands.json')))\n"
+                    "count = sum(e['file'].endswith('a.cpp') for e in entries)\n"
+                    f"open({trace!r}, 'a').write(f'{{count}}\\n')\n"
+                )
+            os.chmod(clang_tidy, 0o755)
+            source_dir = os.path.join(tmp_dir, "p")
+            build_dir = os.path.join(source_dir, "build")
+            _write_compile_db(
+                build_dir,
+                [
+                    {"directory": build_dir, "file": "../a.cpp", "command": f"cc {f}"}
+                    for f in ("-g", "-O2")
+                ],
+            )
+            plan = CompileDbPlan(rules=AnalysisConfig("p").rewrite_rules())
+            plan_compile_db(build_dir, source_dir, plan)
+
+            with patch("sys.stdout", new_callable=io.StringIO):
+                measure_rewrite(
+                    Project("p", "u", "c"),
+                    AnalysisConfig("p"),
+                    source_dir,
+                    clang_tidy,
+                    "check",
+                    None,
+                    False,
+                    1,
+                )
+
+            with open(trace) as f:
+                self.assertEqual(f.read().split(), ["1", "1"])
+
+
+class TestAnalyzeGlobal(unittest.TestCase):
+    def test_one_queue_split_into_project_logs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            clang_tidy = _write_fake_clang_tidy(tmp_dir)
+            work_dir = os.path.join(tmp_dir, "work")
+            for name in ("a", "b"):
+                src = os.path.join(work_dir, name)
+                _write_compile_db(
+                    os.path.join(src, "build"),
+                    [
+                        {"directory": src, "file": f"{name}{i}.cpp", "command": "c++"}
+                        for i in range(3)
+                    ],
+                )
+            log_dir = os.path.join(tmp_dir, "logs")
+            os.makedirs(log_dir)
+            progress_file = os.path.join(log_dir, "progress.log")
+            projects = [
+                Project(name="a", url="u", commit="c"),
+                Project(name="b", url="u", commit="c"),
+            ]
+
+            analyze_global(
+                projects,
+                {},
+                work_dir,
+                clang_tidy,
+                "check",
+                log_dir,
+                progress_file,
+                options=SchedulerOptions(jobs=4),
+            )
+
+            for name in ("a", "b"):
+                with open(os.path.join(log_dir, f"{name}.log")) as f:
+                    log = f.read()
+                self.assertEqual(log.count("warning"), 3)
+                self.assertNotIn("/a/" if name == "b" else "/b/", log)
+            with open(progress_file) as f:
+                progress = f.read().splitlines()
+            self.assertIn("for 6 files out of 6 in compilation databases", progress[0])
+            self.assertEqual(sum(line.startswith("[") for line in progress), 6)
+            self.assertTrue(any(line.startswith("[6/6]") for line in progress))
+
 
 class TestConfigureProject(unittest.TestCase):
     @patch("testers.analyze.build_project")
@@ -288,6 +1417,28 @@ class TestConfigureProject(unittest.TestCase):
 
 
 class TestAnalyzeProject(unittest.TestCase):
+    @patch("testers.analyze.run_clang_tidy_native")
+    def test_uses_native_engine_without_script(self, mock_native):
+        project = Project(
+            name="cppcheck", url="https://example.com/p.git", commit="abc"
+        )
+        config = AnalysisConfig(name="cppcheck")
+        analyze_project(
+            project,
+            config,
+            "/work/cppcheck",
+            "/bin/ct",
+            None,
+            "check",
+            "/logs",
+            "/logs/progress.log",
+            options=SchedulerOptions(jobs=4),
+        )
+
+        mock_native.assert_called_once()
+        self.assertEqual(mock_native.call_args[0][10].jobs, 4)
+        self.assertEqual(mock_native.call_args[0][-1], "abc")
+
     @patch("testers.analyze.run_clang_tidy")
     def test_runs_clang_tidy(self, mock_tidy):
         project = Project(
@@ -328,6 +1479,165 @@ class TestFindRunTidyScript(unittest.TestCase):
         self.assertIsNone(find_run_tidy_script())
 
 
+class TestSelectFiles(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.work_dir = tmp.name
+        build_dir = os.path.join(self.work_dir, "p", "build")
+        os.makedirs(build_dir)
+        entries = []
+        for name, header in (("src/a", "x"), ("src/b", "y"), ("tools/c", "x")):
+            depfile = f"{name.replace('/', '_')}.d"
+            with open(os.path.join(build_dir, depfile), "w") as f:
+                f.write(f"{name}.o: ../{name}.cpp \\\n  ../inc/{header}.h\n")
+            entries.append(
+                {
+                    "directory": build_dir,
+                    "file": f"../{name}.cpp",
+                    "arguments": ["cc", "-MD", "-MF", depfile, "-c", f"../{name}.cpp"],
+                }
+            )
+        with open(os.path.join(build_dir, "compile_commands.json"), "w") as f:
+            json.dump(entries, f)
+        self.projects = [Project(name="p", url="u", commit="c")]
+
+    def _select(self, **selectors):
+        with patch("sys.stdout"):
+            return select_files(self.projects, {}, self.work_dir, **selectors)
+
+    def test_files_including_a_header(self):
+        self.assertEqual(
+            self._select(files_including=["inc/x.h"]),
+            {("p", "src/a.cpp"), ("p", "tools/c.cpp")},
+        )
+
+    def test_selectors_of_different_kinds_intersect(self):
+        self.assertEqual(
+            self._select(files_including=["x.h"], paths=["src/*"]),
+            {("p", "src/a.cpp")},
+        )
+        self.assertEqual(
+            self._select(paths=["p/tools/*", "src/b.cpp"]),
+            {("p", "src/b.cpp"), ("p", "tools/c.cpp")},
+        )
+
+    def test_files_with_findings(self):
+        log_dir = os.path.join(self.work_dir, "logs")
+        results = ResultLog(os.path.join(log_dir, "results.jsonl"))
+        results.record(project="p", file="src/b.cpp", diagnostics={"misc-x": 1})
+        results.record(
+            project="p", file="tools/c.cpp", diagnostics={"clang-diagnostic-error": 1}
+        )
+        results.record(project="p", file="src/a.cpp", diagnostics={})
+
+        self.assertEqual(self._select(findings_dir=log_dir), {("p", "src/b.cpp")})
+
+    def test_findings_without_results_exit(self):
+        with self.assertRaises(SystemExit) as ctx:
+            self._select(findings_dir=os.path.join(self.work_dir, "missing"))
+        self.assertEqual(ctx.exception.code, 1)
+
+
+class TestQuickFiles(unittest.TestCase):
+    def test_picks_tus_covering_every_node_kind(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            build_dir = os.path.join(work_dir, "p", "build")
+            os.makedirs(build_dir)
+            # Dumps a function holding the node kinds its source lists.
+            compiler = os.path.join(work_dir, "cc")
+            with open(compiler, "w") as f:
+                f.write(
+                    f"#!{sys.executable}\n"
+                    "import sys\n"
+                    "src = sys.argv[-5]\n"
+                    "print('TranslationUnitDecl 0x1 <<invalid sloc>> <invalid sloc>')\n"
+                    "print(f'`-FunctionDecl 0x2 <{src}:1:1, col:9> col:6 f')\n"
+                    "for kind in open(src).read().split():\n"
+                    "    print(f'  `-{kind} 0x3 <col:8>')\n"
+                )
+            os.chmod(compiler, 0o755)
+            entries = []
+            for name, kinds in (
+                ("a", "CallExpr"),
+                ("b", "CallExpr LambdaExpr"),
+                ("c", "CoreturnStmt"),
+                ("d", "LambdaExpr"),
+            ):
+                path = os.path.join(work_dir, "p", f"{name}.cpp")
+                with open(path, "w") as f:
+                    f.write(kinds)
+                entries.append(
+                    {
+                        "directory": build_dir,
+                        "file": path,
+                        "arguments": [compiler, path],
+                    }
+                )
+            with open(os.path.join(build_dir, "compile_commands.json"), "w") as f:
+                json.dump(entries, f)
+            projects = [Project(name="p", url="u", commit="c")]
+
+            with patch("sys.stdout"):
+                chosen = quick_files(projects, {}, work_dir)
+                among = quick_files(
+                    projects, {}, work_dir, among={("p", "a.cpp"), ("p", "d.cpp")}
+                )
+
+            self.assertEqual(chosen, {("p", "b.cpp"), ("p", "c.cpp")})
+            self.assertEqual(among, {("p", "a.cpp"), ("p", "d.cpp")})
+
+
+class TestUntriggeredFiles(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.work_dir = tmp.name
+        build_dir = os.path.join(self.work_dir, "p", "build")
+        os.makedirs(build_dir)
+        # Preprocesses a source by printing it.
+        compiler = os.path.join(self.work_dir, "cc")
+        with open(compiler, "w") as f:
+            f.write(
+                f"#!{sys.executable}\nimport sys\nprint(open(sys.argv[-3]).read())\n"
+            )
+        os.chmod(compiler, 0o755)
+        entries = []
+        for name, source in (("a", "memset(p, 0, n);"), ("b", "int x;")):
+            path = os.path.join(self.work_dir, "p", f"{name}.cpp")
+            with open(path, "w") as f:
+                f.write(source)
+            entries.append(
+                {"directory": build_dir, "file": path, "arguments": [compiler, path]}
+            )
+        with open(os.path.join(build_dir, "compile_commands.json"), "w") as f:
+            json.dump(entries, f)
+        self.projects = [Project(name="p", url="u", commit="c")]
+
+    def _untriggered(self, checks, tidy_config=None):
+        with (
+            patch("testers.analyze.enabled_checks", return_value=checks),
+            patch("sys.stdout"),
+        ):
+            return untriggered_files(
+                self.projects, {}, self.work_dir, "clang-tidy", "*", tidy_config
+            )
+
+    def test_units_without_trigger_identifiers(self):
+        self.assertEqual(
+            self._untriggered(["bugprone-suspicious-memset-usage"]), {("p", "b.cpp")}
+        )
+
+    def test_disabled_for_checks_without_triggers(self):
+        self.assertIsNone(
+            self._untriggered(["bugprone-suspicious-memset-usage", "misc-x"])
+        )
+
+    def test_disabled_by_options_changing_triggers(self):
+        config = "{CheckOptions: {modernize-use-std-print.PrintfLikeFunctions: f}}"
+        self.assertIsNone(self._untriggered(["modernize-use-std-print"], config))
+
+
 class TestAnalyze(unittest.TestCase):
     def test_exits_when_clang_tidy_missing(self):
         with self.assertRaises(SystemExit) as ctx:
@@ -348,6 +1658,7 @@ class TestAnalyze(unittest.TestCase):
                 analyze(
                     check_name="check",
                     clang_tidy_bin=ct_bin,
+                    run_tidy_script="auto",
                 )
             self.assertEqual(ctx.exception.code, 1)
 
@@ -378,6 +1689,65 @@ class TestAnalyze(unittest.TestCase):
             self.assertEqual(mock_analyze.call_count, 2)
             self.assertTrue(os.path.isdir(log_dir))
 
+    @patch("testers.analyze.analyze_project")
+    @patch("testers.analyze.load_projects", return_value=[])
+    def test_removes_reports_of_earlier_runs(self, mock_load, mock_analyze):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ct_bin = os.path.join(tmp_dir, "clang-tidy")
+            script = os.path.join(tmp_dir, "run-clang-tidy.py")
+            log_dir = os.path.join(tmp_dir, "logs")
+            os.makedirs(log_dir)
+            stale = [os.path.join(log_dir, name) for name in (DIFF_FILE, PERF_FILE)]
+            for path in (ct_bin, script, *stale):
+                with open(path, "w") as f:
+                    f.write("")
+
+            analyze(
+                check_name="check",
+                clang_tidy_bin=ct_bin,
+                run_tidy_script=script,
+                log_dir=log_dir,
+            )
+
+            for path in stale:
+                self.assertFalse(os.path.exists(path))
+
+    @patch("testers.analyze.analyze_global")
+    @patch("testers.analyze.analyze_project")
+    @patch("testers.analyze.load_projects")
+    def test_global_queue(self, mock_load, mock_analyze, mock_global):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ct_bin = os.path.join(tmp_dir, "clang-tidy")
+            with open(ct_bin, "w") as f:
+                f.write("")
+            mock_load.return_value = [Project(name="a", url="u", commit="c")]
+
+            analyze(
+                check_name="check",
+                clang_tidy_bin=ct_bin,
+                log_dir=os.path.join(tmp_dir, "logs"),
+                global_queue=True,
+            )
+
+            mock_global.assert_called_once()
+            mock_analyze.assert_not_called()
+
+    def test_global_queue_rejects_script_backend(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            ct_bin = os.path.join(tmp_dir, "clang-tidy")
+            script = os.path.join(tmp_dir, "run-clang-tidy.py")
+            for path in (ct_bin, script):
+                with open(path, "w") as f:
+                    f.write("")
+            with self.assertRaises(SystemExit) as ctx:
+                analyze(
+                    check_name="check",
+                    clang_tidy_bin=ct_bin,
+                    run_tidy_script=script,
+                    global_queue=True,
+                )
+            self.assertEqual(ctx.exception.code, 1)
+
 
 class TestGetAnalysisConfigs(unittest.TestCase):
     def test_discovers_cppcheck(self):
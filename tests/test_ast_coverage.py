@@ -0,0 +1,99 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from testers.ast_coverage import (
+    build_ast_index,
+    cover_kinds,
+    load_ast_index,
+    main_file_kinds,
+)
+from testers.rewrite import write_compile_db
+
+_DUMP = """\
+TranslationUnitDecl 0x1 <<invalid sloc>> <invalid sloc>
+|-TypedefDecl 0x2 <<invalid sloc>> <invalid sloc> implicit __int128_t '__int128'
+| `-BuiltinType 0x3 '__int128'
+|-FunctionDecl 0x4 <./a.h:1:1, col:10> col:6 helper 'void ()'
+| `-CompoundStmt 0x5 <col:9, col:10>
+|-CXXRecordDecl 0x6 <line:3:1, line:5:1> line:3:8 struct S definition
+|-FunctionDecl 0x7 <a.cpp:2:1, line:4:1> line:2:6 f 'void ()'
+| `-CompoundStmt 0x8 <col:10, line:4:1>
+|   `-CallExpr 0x9 <line:3:3, col:10> 'void'
+|     `-ImplicitCastExpr 0xa <col:3> 'void (*)()' <FunctionToPointerDecay>
+`-VarDecl 0xb <line:6:1, col:5> col:5 x 'int'
+"""
+
+
+class TestMainFileKinds(unittest.TestCase):
+    def test_counts_nodes_below_main_file_declarations(self):
+        self.assertEqual(
+            main_file_kinds(_DUMP.splitlines(), "/b/a.cpp", "/b"),
+            {
+                "FunctionDecl": 1,
+                "CompoundStmt": 1,
+                "CallExpr": 1,
+                "ImplicitCastExpr": 1,
+                "VarDecl": 1,
+            },
+        )
+
+
+class TestCoverKinds(unittest.TestCase):
+    def test_covers_all_kinds_with_few_files(self):
+        kinds = {
+            "a": {"x", "y"},
+            "b": {"x", "y", "z"},
+            "c": {"w"},
+            "d": {"z"},
+        }
+        self.assertEqual(cover_kinds(kinds, {}), ["b", "c"])
+
+    def test_ties_prefer_cheap_files(self):
+        kinds = {"a": {"x"}, "b": {"x"}}
+        self.assertEqual(cover_kinds(kinds, {"a": 2.0, "b": 1.0}), ["b"])
+        self.assertEqual(cover_kinds({}, {}), [])
+
+
+class TestBuildAstIndex(unittest.TestCase):
+    def test_indexes_planned_files_once_per_commit(self):
+        with tempfile.TemporaryDirectory() as build_dir:
+            # A compiler stand-in that prints a source's AST, if it has any.
+            compiler = os.path.join(build_dir, "cc")
+            with open(compiler, "w") as f:
+                f.write(
+                    f"#!{sys.executable}\n"
+                    "import sys\n"
+                    "assert sys.argv[-4:] == ['-fsyntax-only', "
+                    "'-fno-color-diagnostics', '-Xclang', '-ast-dump']\n"
+                    "dump = open(sys.argv[-5]).read()\n"
+                    "sys.stdout.write(dump)\n"
+                    "sys.exit(0 if dump else 1)\n"
+                )
+            os.chmod(compiler, 0o755)
+            entries = []
+            for name, dump in (("a.cpp", _DUMP), ("b.cpp", ""), ("c.cpp", _DUMP)):
+                with open(os.path.join(build_dir, name), "w") as f:
+                    f.write(dump)
+                args = [compiler, "-o", "x.o", "-c", name]
+                entries.append(
+                    {"directory": build_dir, "file": name, "arguments": args}
+                )
+            with open(os.path.join(build_dir, "compile_commands.json"), "w") as f:
+                json.dump(entries, f)
+            # The planned compile DB leaves out c.cpp.
+            write_compile_db(build_dir, entries[:2])
+
+            index, reused = build_ast_index(build_dir, "c1", jobs=2)
+
+            self.assertFalse(reused)
+            a, b = (os.path.join(build_dir, n) for n in ("a.cpp", "b.cpp"))
+            self.assertEqual(
+                index.kinds,
+                {a: main_file_kinds(_DUMP.splitlines(), a, build_dir)},
+            )
+            self.assertEqual(index.unindexed, [b])
+            self.assertTrue(build_ast_index(build_dir, "c1")[1])
+            self.assertIsNone(load_ast_index(build_dir, "c2"))
@@ -0,0 +1,24 @@
+import unittest
+
+from testers.baseline import diff_diagnostics
+
+
+class TestDiffDiagnostics(unittest.TestCase):
+    def test_added_removed_and_unchanged(self):
+        baseline = (
+            "/s/a.cpp:1:1: warning: kept [check]\n"
+            "    1 | int a;\n"
+            "/s/a.cpp:2:1: warning: gone [check]\n"
+        )
+        patched = (
+            "/s/a.cpp:1:1: warning: kept [check]\n"
+            "/s/a.cpp:1:1: note: moved note\n"
+            "/s/a.cpp:3:1: warning: new [check]\n"
+            "/s/a.cpp:3:1: warning: new [check]\n"
+        )
+
+        added, removed, unchanged = diff_diagnostics(baseline, patched)
+
+        self.assertEqual(added, ["/s/a.cpp:3:1: warning: new [check]"] * 2)
+        self.assertEqual(removed, ["/s/a.cpp:2:1: warning: gone [check]"])
+        self.assertEqual(unchanged, 1)
@@ -0,0 +1,140 @@
+import os
+import subprocess
+import tempfile
+import unittest
+
+from testers.check_reuse import (
+    FRONTEND,
+    CheckReuse,
+    check_keys,
+    diagnostics,
+    due_for_full_run,
+    join_checks,
+    record_run,
+    split_by_check,
+)
+from testers.result_cache import ResultCache
+
+_OUTPUT = (
+    "2 warnings generated.\n"
+    "/s/a.cpp:1:5: warning: unused [misc-unused]\n"
+    "    1 | int x;\n"
+    "/s/a.cpp:3:1: error: no type [clang-diagnostic-error]\n"
+    "/s/a.cpp:4:2: warning: magic [readability-magic,cppcoreguidelines-magic]\n"
+    "/s/a.cpp:4:2: note: here\n"
+)
+
+
+class TestSplitByCheck(unittest.TestCase):
+    def test_groups_diagnostics_with_their_notes(self):
+        parts = split_by_check(_OUTPUT)
+
+        self.assertEqual(
+            parts,
+            {
+                FRONTEND: "2 warnings generated.\n"
+                "/s/a.cpp:3:1: error: no type [clang-diagnostic-error]\n",
+                "misc-unused": "/s/a.cpp:1:5: warning: unused [misc-unused]\n"
+                "    1 | int x;\n",
+                "readability-magic": "/s/a.cpp:4:2: warning: magic "
+                "[readability-magic,cppcoreguidelines-magic]\n"
+                "/s/a.cpp:4:2: note: here\n",
+            },
+        )
+
+    def test_join_restores_order(self):
+        self.assertEqual(join_checks(split_by_check(_OUTPUT)), _OUTPUT)
+        self.assertEqual(diagnostics(_OUTPUT), diagnostics(join_checks({"": _OUTPUT})))
+
+
+class TestCheckReuse(unittest.TestCase):
+    def test_lookup_returns_stored_parts_and_missing_checks(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            keys = {FRONTEND: "base", "misc-unused": "k1", "readability-magic": "k2"}
+            checks = ["misc-unused", "readability-magic", "unkeyed"]
+            reuse = CheckReuse(ResultCache(tmp_dir), keys, checks)
+            self.assertEqual(reuse.lookup("tu"), ({}, checks))
+
+            reuse.store("tu", checks, _OUTPUT)
+            parts, missing = reuse.lookup("tu")
+            self.assertEqual(join_checks(parts), _OUTPUT)
+            self.assertEqual(missing, ["unkeyed"])
+
+            changed = CheckReuse(
+                ResultCache(tmp_dir), {**keys, "misc-unused": "k3"}, checks
+            )
+            parts, missing = changed.lookup("tu")
+            self.assertNotIn("misc-unused", parts)
+            self.assertEqual(missing, ["misc-unused", "unkeyed"])
+
+
+class TestCheckKeys(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.src = tmp.name
+        self._write(
+            "clang-tools-extra/clang-tidy/misc/MiscTidyModule.cpp",
+            'CheckFactories.registerCheck<UnusedCheck>("misc-unused");\n'
+            'CheckFactories.registerCheck<misc::OtherCheck>("misc-other");\n',
+        )
+        self._write("clang-tools-extra/clang-tidy/misc/UnusedCheck.cpp", "a\n")
+        self._write("clang-tools-extra/clang-tidy/misc/OtherCheck.cpp", "b\n")
+        self._write("clang-tools-extra/clang-tidy/ClangTidy.cpp", "c\n")
+        self._write("clang/lib/Sema/Sema.cpp", "d\n")
+        self._git("init", "-q")
+        self._commit()
+
+    def _write(self, path: str, content: str) -> None:
+        path = os.path.join(self.src, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content)
+
+    def _git(self, *args: str) -> None:
+        subprocess.run(
+            ["git", "-C", self.src, "-c", "user.name=t", "-c", "user.email=t@t", *args],
+            check=True,
+        )
+
+    def _commit(self) -> None:
+        self._git("add", "-A")
+        self._git("commit", "-q", "-m", "c")
+
+    def _keys(self) -> dict[str, str]:
+        return check_keys(self.src, ["misc-unused", "misc-other", "misc-gone"], {})
+
+    def test_key_changes_with_the_check_sources_only(self):
+        before = self._keys()
+        self.assertEqual(set(before), {FRONTEND, "misc-unused", "misc-other"})
+
+        self._write("clang-tools-extra/clang-tidy/misc/UnusedCheck.cpp", "a2\n")
+        self._commit()
+        after = self._keys()
+
+        self.assertNotEqual(after["misc-unused"], before["misc-unused"])
+        self.assertEqual(after["misc-other"], before["misc-other"])
+
+    def test_framework_and_frontend_change_every_key(self):
+        before = self._keys()
+        self._write("clang/lib/Sema/Sema.cpp", "d2\n")
+        self._commit()
+        after_frontend = self._keys()
+        self._write("clang-tools-extra/clang-tidy/ClangTidy.cpp", "c2\n")
+        self._commit()
+        after_framework = self._keys()
+
+        for check in before:
+            self.assertNotEqual(after_frontend[check], before[check])
+            self.assertNotEqual(after_framework[check], after_frontend[check])
+
+
+class TestFullRuns(unittest.TestCase):
+    def test_every_nth_run_is_full(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            full = []
+            for _ in range(5):
+                full.append(due_for_full_run(tmp_dir, 3))
+                record_run(tmp_dir, full[-1])
+
+            self.assertEqual(full, [True, False, False, True, False])
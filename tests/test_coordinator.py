@@ -0,0 +1,242 @@
+import io
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from testers.analyze import (
+    DEFAULT_TU_MEMORY_LIMIT_MB,
+    DEFAULT_TU_TIMEOUT,
+    AnalysisConfig,
+    CompileDbPlan,
+    TuLimits,
+    analyze,
+    run_settings,
+)
+from testers.coordinator import parse_address, run_coordinator, run_worker
+from testers.journal import run_fingerprint
+from testers.results import RESULTS_FILE, read_results
+
+
+class TestParseAddress(unittest.TestCase):
+    def test_tcp(self):
+        self.assertEqual(
+            parse_address("0.0.0.0:9000"), (socket.AF_INET, ("0.0.0.0", 9000))
+        )
+
+    def test_unix(self):
+        self.assertEqual(
+            parse_address("unix:/tmp/ctit.sock"), (socket.AF_UNIX, "/tmp/ctit.sock")
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_address("localhost")
+
+
+@patch("sys.stdout", new_callable=io.StringIO)
+class TestCoordinator(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = self._tmp.name
+        self.work_dir = os.path.join(self.tmp_dir, "work")
+        projects = {"a": ["x.cpp", "y.cpp", "z.cpp"], "b": ["b1.cpp", "b2.cpp"]}
+        for name, files in projects.items():
+            source_dir = os.path.join(self.work_dir, name)
+            os.makedirs(os.path.join(source_dir, "build"))
+            with open(
+                os.path.join(source_dir, "build", "compile_commands.json"), "w"
+            ) as f:
+                json.dump(
+                    [
+                        {"directory": source_dir, "file": file, "command": "c++"}
+                        for file in files
+                    ],
+                    f,
+                )
+        self.config = os.path.join(self.tmp_dir, "projects.json")
+        with open(self.config, "w") as f:
+            json.dump(
+                {"projects": {p: {"url": "u", "commit": "c"} for p in projects}}, f
+            )
+        self.clang_tidy = os.path.join(self.tmp_dir, "clang-tidy")
+        with open(self.clang_tidy, "w") as f:
+            f.write(
+                f"#!{sys.executable}\n"
+                "import sys\n"
+                "print(sys.argv[-1] + ':1:1: warning: w [check]')\n"
+            )
+        os.chmod(self.clang_tidy, 0o755)
+        self.address = f"unix:{os.path.join(self.tmp_dir, 'ctit.sock')}"
+        self.worker_exits: list[int | str | None] = []
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _start_coordinator(self) -> threading.Thread:
+        coordinator = threading.Thread(
+            target=run_coordinator,
+            kwargs={
+                "check_name": "check",
+                "work_dir": self.work_dir,
+                "clang_tidy_bin": self.clang_tidy,
+                "log_dir": os.path.join(self.tmp_dir, "coordinated"),
+                "config_path": self.config,
+                "address": self.address,
+                "history_file": os.path.join(self.tmp_dir, "history.json"),
+            },
+        )
+        coordinator.start()
+        return coordinator
+
+    def _run_worker(self) -> None:
+        try:
+            run_worker(
+                address=self.address,
+                clang_tidy_bin=self.clang_tidy,
+                work_dir=self.work_dir,
+                jobs=2,
+                connect_timeout=10,
+            )
+        except SystemExit as e:
+            self.worker_exits.append(e.code)
+        else:
+            self.worker_exits.append(0)
+
+    def _worker(self) -> threading.Thread:
+        return threading.Thread(target=self._run_worker)
+
+    def _assert_logs_match_local_run(self) -> None:
+        analyze(
+            check_name="check",
+            work_dir=self.work_dir,
+            clang_tidy_bin=self.clang_tidy,
+            log_dir=os.path.join(self.tmp_dir, "local"),
+            config_path=self.config,
+            jobs=2,
+            history_file=os.path.join(self.tmp_dir, "history.json"),
+            parse_failures_file=os.path.join(self.tmp_dir, "parse-failures.json"),
+            result_cache_dir=os.path.join(self.tmp_dir, "result-cache"),
+        )
+        for name in ("a.log", "b.log"):
+            with open(os.path.join(self.tmp_dir, "coordinated", name)) as f:
+                coordinated = f.read()
+            with open(os.path.join(self.tmp_dir, "local", name)) as f:
+                self.assertEqual(coordinated, f.read())
+
+    def test_workers_analyze_all_tus(self, _stdout):
+        coordinator = self._start_coordinator()
+        workers = [self._worker() for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for thread in [coordinator, *workers]:
+            thread.join(timeout=30)
+            self.assertFalse(thread.is_alive())
+
+        # A worker that only connects once all TUs are done cannot reach the
+        # coordinator anymore; the other one must have run to the end.
+        self.assertIn(0, self.worker_exits)
+        self._assert_logs_match_local_run()
+
+    def _take_task(self) -> socket.socket:
+        """Connect as a worker and take a TU without ever answering."""
+        _, path = parse_address(self.address)
+        limits = TuLimits(
+            DEFAULT_TU_TIMEOUT or None, DEFAULT_TU_MEMORY_LIMIT_MB or None
+        )
+        plans = {
+            name: CompileDbPlan(rules=AnalysisConfig(name).rewrite_rules())
+            for name in ("a", "b")
+        }
+        settings = run_settings("check", None, False, False, limits, plans)
+        while True:
+            sock = socket.socket(socket.AF_UNIX)
+            try:
+                sock.connect(path)
+                break
+            except OSError:
+                sock.close()
+                time.sleep(0.05)
+        with sock.makefile("rb") as rfile, sock.makefile("wb") as wfile:
+            wfile.write(b'{"type": "hello", "version": 5, "worker": "flaky"}\n')
+            wfile.flush()
+            self.assertEqual(json.loads(rfile.readline())["settings"], settings)
+            fingerprint = run_fingerprint(self.clang_tidy, settings)
+            wfile.write(json.dumps({"fingerprint": fingerprint}).encode() + b"\n")
+            wfile.flush()
+            self.assertEqual(json.loads(rfile.readline())["type"], "task")
+        return sock
+
+    def _finish_with_worker(self, coordinator: threading.Thread) -> None:
+        worker = self._worker()
+        worker.start()
+        for thread in (coordinator, worker):
+            thread.join(timeout=30)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(self.worker_exits, [0])
+
+    def test_tu_of_lost_worker_is_requeued(self, _stdout):
+        coordinator = self._start_coordinator()
+        # A worker that takes one TU and disappears.
+        self._take_task().close()
+        self._finish_with_worker(coordinator)
+        self._assert_logs_match_local_run()
+
+    @patch("testers.coordinator._HEARTBEAT_TIMEOUT", 0.5)
+    def test_tu_of_silent_worker_is_requeued(self, _stdout):
+        coordinator = self._start_coordinator()
+        # A worker whose connection stays up but that never answers.
+        with self._take_task():
+            self._finish_with_worker(coordinator)
+        self._assert_logs_match_local_run()
+
+    @patch("testers.coordinator._HEARTBEAT_TIMEOUT", 0.3)
+    @patch("testers.coordinator._HEARTBEAT_SECONDS", 0.05)
+    def test_heartbeats_keep_slow_worker(self, _stdout):
+        with open(self.clang_tidy, "a") as f:
+            f.write("import time\ntime.sleep(0.6)\n")
+        self._finish_with_worker(self._start_coordinator())
+
+        records = read_results(os.path.join(self.tmp_dir, "coordinated", RESULTS_FILE))
+        self.assertEqual(len(records), 5)
+        self.assertFalse(any(r["crashed"] for r in records))
+
+    @patch("testers.coordinator._MAX_ATTEMPTS", 1)
+    def test_tu_losing_too_many_workers_is_a_crash(self, _stdout):
+        coordinator = self._start_coordinator()
+        self._take_task().close()
+        self._finish_with_worker(coordinator)
+
+        records = read_results(os.path.join(self.tmp_dir, "coordinated", RESULTS_FILE))
+        self.assertEqual(len(records), 5)
+        [crashed] = [r for r in records if r["crashed"]]
+        self.assertEqual(crashed["signal"], "SIGKILL")
+
+    def test_rejects_worker_with_other_binary(self, _stdout):
+        coordinator = self._start_coordinator()
+        other = os.path.join(self.tmp_dir, "other-clang-tidy")
+        with open(self.clang_tidy) as src, open(other, "w") as dst:
+            dst.write(src.read() + "# patched\n")
+        os.chmod(other, 0o755)
+
+        with (
+            patch("sys.stderr", new_callable=io.StringIO),
+            self.assertRaises(SystemExit),
+        ):
+            run_worker(self.address, other, self.work_dir, jobs=1, connect_timeout=10)
+
+        worker = self._worker()
+        worker.start()
+        for thread in (coordinator, worker):
+            thread.join(timeout=30)
+            self.assertFalse(thread.is_alive())
+        self.assertEqual(self.worker_exits, [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
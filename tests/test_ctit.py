@@ -2,8 +2,20 @@ import unittest
 from unittest.mock import patch
 
 from ctit import main
-from testers.analyze import DEFAULT_CLANG_TIDY_BIN, DEFAULT_LOG_DIR
+from testers.analyze import (
+    DEFAULT_CLANG_TIDY_BIN,
+    DEFAULT_LOG_DIR,
+    DEFAULT_MAX_DIAGNOSTICS,
+    DEFAULT_TU_MEMORY_LIMIT_MB,
+    DEFAULT_TU_TIMEOUT,
+)
+from testers.check_reuse import DEFAULT_FULL_RUN_EVERY
 from testers.config import CONFIG_FILE, PROJECTS_DIR
+from testers.history import DEFAULT_HISTORY_FILE
+from testers.parse_failures import DEFAULT_PARSE_FAILURES_FILE
+from testers.perf_ab import DEFAULT_PERF_SAMPLE
+from testers.result_cache import DEFAULT_RESULT_CACHE_DIR, DEFAULT_RESULT_CACHE_MB
+from testers.shards import Shard
 
 
 class TestCtitCli(unittest.TestCase):
@@ -43,16 +55,21 @@ class TestCtitCli(unittest.TestCase):
     def test_configure_calls_configure(self, mock_configure):
         main(["configure"])
         mock_configure.assert_called_once_with(
-            work_dir=PROJECTS_DIR, config_path=CONFIG_FILE
+            work_dir=PROJECTS_DIR, config_path=CONFIG_FILE, jobs=None
         )
 
     @patch("ctit.configure")
     def test_configure_with_args(self, mock_configure):
         main(["configure", "--work-dir", "/tmp/projects", "--config", "custom.json"])
         mock_configure.assert_called_once_with(
-            work_dir="/tmp/projects", config_path="custom.json"
+            work_dir="/tmp/projects", config_path="custom.json", jobs=None
         )
 
+    @patch("ctit.configure")
+    def test_configure_with_jobs(self, mock_configure):
+        main(["configure", "-j", "6"])
+        self.assertEqual(mock_configure.call_args.kwargs["jobs"], 6)
+
     @patch("ctit.analyze")
     def test_analyze_calls_analyze(self, mock_analyze):
         main(["analyze", "--check-name", "bugprone-*"])
@@ -66,6 +83,33 @@ class TestCtitCli(unittest.TestCase):
             config_path=CONFIG_FILE,
             skip_headers=False,
             profile=False,
+            jobs=None,
+            global_queue=False,
+            history_file=DEFAULT_HISTORY_FILE,
+            memory_budget_mb=None,
+            batch_size=1,
+            tu_timeout=DEFAULT_TU_TIMEOUT,
+            tu_memory_limit_mb=DEFAULT_TU_MEMORY_LIMIT_MB,
+            resume=False,
+            shard=None,
+            order="lpt",
+            max_diagnostics=DEFAULT_MAX_DIAGNOSTICS,
+            parse_failures_file=DEFAULT_PARSE_FAILURES_FILE,
+            analyze_parse_failures=False,
+            rewrite=True,
+            rewrite_sample=0,
+            drop_flag_groups=None,
+            result_cache=False,
+            result_cache_dir=DEFAULT_RESULT_CACHE_DIR,
+            result_cache_mb=DEFAULT_RESULT_CACHE_MB,
+            reuse_check_sources=None,
+            full_run_every=DEFAULT_FULL_RUN_EVERY,
+            baseline_binary=None,
+            files_including=None,
+            findings_dir=None,
+            paths=None,
+            identifier_prefilter=False,
+            quick=False,
         )
 
     @patch("ctit.analyze")
@@ -89,6 +133,33 @@ class TestCtitCli(unittest.TestCase):
             config_path=CONFIG_FILE,
             skip_headers=False,
             profile=False,
+            jobs=None,
+            global_queue=False,
+            history_file=DEFAULT_HISTORY_FILE,
+            memory_budget_mb=None,
+            batch_size=1,
+            tu_timeout=DEFAULT_TU_TIMEOUT,
+            tu_memory_limit_mb=DEFAULT_TU_MEMORY_LIMIT_MB,
+            resume=False,
+            shard=None,
+            order="lpt",
+            max_diagnostics=DEFAULT_MAX_DIAGNOSTICS,
+            parse_failures_file=DEFAULT_PARSE_FAILURES_FILE,
+            analyze_parse_failures=False,
+            rewrite=True,
+            rewrite_sample=0,
+            drop_flag_groups=None,
+            result_cache=False,
+            result_cache_dir=DEFAULT_RESULT_CACHE_DIR,
+            result_cache_mb=DEFAULT_RESULT_CACHE_MB,
+            reuse_check_sources=None,
+            full_run_every=DEFAULT_FULL_RUN_EVERY,
+            baseline_binary=None,
+            files_including=None,
+            findings_dir=None,
+            paths=None,
+            identifier_prefilter=False,
+            quick=False,
         )
 
     @patch("ctit.analyze")
@@ -114,7 +185,115 @@ class TestCtitCli(unittest.TestCase):
             config_path=CONFIG_FILE,
             skip_headers=False,
             profile=False,
+            jobs=None,
+            global_queue=False,
+            history_file=DEFAULT_HISTORY_FILE,
+            memory_budget_mb=None,
+            batch_size=1,
+            tu_timeout=DEFAULT_TU_TIMEOUT,
+            tu_memory_limit_mb=DEFAULT_TU_MEMORY_LIMIT_MB,
+            resume=False,
+            shard=None,
+            order="lpt",
+            max_diagnostics=DEFAULT_MAX_DIAGNOSTICS,
+            parse_failures_file=DEFAULT_PARSE_FAILURES_FILE,
+            analyze_parse_failures=False,
+            rewrite=True,
+            rewrite_sample=0,
+            drop_flag_groups=None,
+            result_cache=False,
+            result_cache_dir=DEFAULT_RESULT_CACHE_DIR,
+            result_cache_mb=DEFAULT_RESULT_CACHE_MB,
+            reuse_check_sources=None,
+            full_run_every=DEFAULT_FULL_RUN_EVERY,
+            baseline_binary=None,
+            files_including=None,
+            findings_dir=None,
+            paths=None,
+            identifier_prefilter=False,
+            quick=False,
+        )
+
+    @patch("ctit.analyze")
+    def test_analyze_with_jobs(self, mock_analyze):
+        main(["analyze", "--check-name", "bugprone-*", "-j", "16"])
+        self.assertEqual(mock_analyze.call_args.kwargs["jobs"], 16)
+
+    @patch("ctit.analyze")
+    def test_analyze_with_memory_budget(self, mock_analyze):
+        main(["analyze", "--check-name", "*", "--memory-budget", "48000"])
+        self.assertEqual(mock_analyze.call_args.kwargs["memory_budget_mb"], 48000)
+
+    @patch("ctit.analyze")
+    def test_analyze_with_shard(self, mock_analyze):
+        main(["analyze", "--check-name", "*", "--shard", "2/4"])
+        self.assertEqual(mock_analyze.call_args.kwargs["shard"], Shard(2, 4))
+
+    @patch("ctit.analyze")
+    def test_analyze_with_locality_order(self, mock_analyze):
+        main(["analyze", "--check-name", "*", "--order", "locality"])
+        self.assertEqual(mock_analyze.call_args.kwargs["order"], "locality")
+
+    def test_analyze_rejects_bad_shard(self):
+        with self.assertRaises(SystemExit) as ctx:
+            main(["analyze", "--check-name", "*", "--shard", "5/4"])
+        self.assertEqual(ctx.exception.code, 2)
+
+    @patch("ctit.merge_logs")
+    def test_merge_logs(self, mock_merge):
+        main(["merge-logs", "s1", "s2", "--log-dir", "/tmp/logs"])
+        mock_merge.assert_called_once_with(
+            shard_dirs=["s1", "s2"], output_dir="/tmp/logs"
+        )
+
+    @patch("ctit.analyze")
+    @patch("ctit.tiered_analyze")
+    def test_analyze_sample_first(self, mock_tiered, mock_analyze):
+        main(["analyze", "--check-name", "misc-*", "--sample-first", "0.2"])
+        mock_analyze.assert_not_called()
+        [(fraction, report), kwargs] = mock_tiered.call_args
+        self.assertEqual((fraction, report), (0.2, "issue.md"))
+        self.assertEqual(kwargs["check_name"], "misc-*")
+
+    @patch("ctit.perf_ab")
+    def test_perf_ab(self, mock_perf):
+        main(
+            [
+                "perf-ab",
+                "--check-name",
+                "misc-*",
+                "--baseline-binary",
+                "/base/clang-tidy",
+                "--repetitions",
+                "3",
+                "--no-rewrite",
+                "--drop-flags",
+                "warnings",
+            ]
         )
+        mock_perf.assert_called_once_with(
+            check_name="misc-*",
+            baseline_binary="/base/clang-tidy",
+            clang_tidy_bin=DEFAULT_CLANG_TIDY_BIN,
+            tidy_config=None,
+            work_dir=PROJECTS_DIR,
+            log_dir=DEFAULT_LOG_DIR,
+            config_path=CONFIG_FILE,
+            skip_headers=False,
+            repetitions=3,
+            sample=DEFAULT_PERF_SAMPLE,
+            tu_timeout=DEFAULT_TU_TIMEOUT,
+            rewrite=False,
+            drop_flag_groups=["warnings"],
+        )
+
+    @patch("ctit.cache_gc")
+    @patch("ctit.cache_stats")
+    def test_cache(self, mock_stats, mock_gc):
+        main(["cache", "stats", "--cache-dir", "/c"])
+        mock_stats.assert_called_once_with("/c")
+        main(["cache", "gc", "--cache-dir", "/c", "--max-size", "10"])
+        mock_gc.assert_called_once_with("/c", 10)
 
     @patch("ctit.generate_report")
     def test_report_calls_generate_report(self, mock_report):
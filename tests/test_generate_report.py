@@ -1,9 +1,11 @@
 import io
+import json
 import os
 import tempfile
 import unittest
 from unittest.mock import patch
 
+from testers.baseline import DIFF_FILE
 from testers.generate_report import (
     Issue,
     ProjectResult,
@@ -14,6 +16,8 @@ from testers.generate_report import (
     write_project_details,
     write_summary_table,
 )
+from testers.perf_ab import PERF_FILE
+from testers.results import ResultLog
 
 
 class TestProjectResultStatus(unittest.TestCase):
@@ -163,6 +167,56 @@ class TestParseLogFile(unittest.TestCase):
             self.assertEqual(result.name, "nonexistent")
             self.assertEqual(result.warnings_count, 0)
 
+    def test_flood_event(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log = (
+                "/path/proj/a.cpp:1:1: warning: msg [check-a]\n"
+                "CTIT FLOOD: stopped after 11 diagnostics from check-a, over the "
+                "limit of 10; 3 of 5 TUs were not analyzed\n"
+            )
+            path = self._write_log(tmp_dir, "proj", log)
+            result = parse_log_file(path)
+            self.assertEqual(result.warnings_count, 1)
+            self.assertEqual(
+                result.stopped_early,
+                "stopped after 11 diagnostics from check-a, over the limit of 10; "
+                "3 of 5 TUs were not analyzed",
+            )
+
+    def test_prefilter_counts_add_up_over_shards(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log = (
+                "CTIT PREFILTER: skipped 2 of 5 TUs containing none of the checks' "
+                "trigger identifiers\n"
+                "CTIT PREFILTER: skipped 3 of 4 TUs containing none of the checks' "
+                "trigger identifiers\n"
+            )
+            path = self._write_log(tmp_dir, "proj", log)
+            result = parse_log_file(path)
+            self.assertEqual((result.prefiltered, result.prefilter_total), (5, 9))
+
+    def test_parse_failures_are_not_check_errors(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log = (
+                "/path/proj/a.cpp:1:10: error: 'gen.h' file not found "
+                "[clang-diagnostic-error]\n"
+                "/path/proj/b.cpp:2:1: error: real [check-a]\n"
+                "CTIT PARSE-FAILURE: /path/proj/a.cpp (analyzed anyway): "
+                "a.cpp:1:10: fatal error: 'gen.h' file not found\n"
+                "CTIT PARSE-FAILURE: /path/proj/c.cpp (skipped): exit code 1\n"
+            )
+            path = self._write_log(tmp_dir, "proj", log)
+            result = parse_log_file(path)
+            self.assertEqual(result.errors_count, 1)
+            self.assertEqual([i.check_name for i in result.issues], ["check-a"])
+            self.assertEqual(
+                result.parse_failures,
+                [
+                    ("a.cpp", "a.cpp:1:10: fatal error: 'gen.h' file not found"),
+                    ("c.cpp", "exit code 1"),
+                ],
+            )
+
     def test_noise_lines_ignored(self):
         with tempfile.TemporaryDirectory() as tmp_dir:
             log = (
@@ -288,6 +342,20 @@ class TestWriteSummaryTable(unittest.TestCase):
         self.assertIn("| **a** |", output)
         self.assertIn("| **b** |", output)
 
+    def test_project_stopped_early(self):
+        f = io.StringIO()
+        results = [ProjectResult(name="proj", stopped_early="stopped after 11")]
+        write_summary_table(f, results)
+        output = f.getvalue()
+        self.assertIn("Pass (stopped early) |", output)
+        self.assertIn("**proj**: analysis stopped after 11.", output)
+
+    def test_prefiltered_tus_noted(self):
+        f = io.StringIO()
+        results = [ProjectResult(name="proj", prefiltered=3, prefilter_total=8)]
+        write_summary_table(f, results)
+        self.assertIn("**proj**: skipped 3 of 8 TUs containing none", f.getvalue())
+
     def test_header_present(self):
         f = io.StringIO()
         write_summary_table(f, [])
@@ -303,6 +371,14 @@ class TestWriteProjectDetails(unittest.TestCase):
         write_project_details(f, result, {})
         self.assertEqual(f.getvalue(), "")
 
+    def test_parse_failures_listed(self):
+        f = io.StringIO()
+        result = ProjectResult(name="proj", parse_failures=[("a.cpp", "exit code 1")])
+        write_project_details(f, result, {})
+        output = f.getvalue()
+        self.assertIn("TUs that fail to parse with any check", output)
+        self.assertIn("- `a.cpp`: exit code 1", output)
+
     def test_crash_banner(self):
         f = io.StringIO()
         result = ProjectResult(name="proj", has_crash=True)
@@ -407,6 +483,14 @@ class TestGenerateMarkdown(unittest.TestCase):
                 content = f.read()
             self.assertIn("Clang-Tidy Integration Test Results", content)
 
+    def test_preamble_comes_first(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_path = os.path.join(tmp_dir, "report.md")
+            generate_markdown([], output_path, preamble="> Provisional")
+            with open(output_path) as f:
+                content = f.read()
+            self.assertTrue(content.startswith("> Provisional\n\n"))
+
     def test_empty_results(self):
         with tempfile.TemporaryDirectory() as tmp_dir:
             output_path = os.path.join(tmp_dir, "report.md")
@@ -484,6 +568,67 @@ class TestGenerateReport(unittest.TestCase):
             self.assertIn("| **proj** |", content)
             self.assertIn("check-a", content)
 
+    @patch("testers.generate_report.load_projects", side_effect=OSError)
+    def test_flags_slowdown_of_check_under_test(self, mock_load):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, "proj.log"), "w") as f:
+                f.write("")
+            runs = [
+                {
+                    "project": "proj",
+                    "file": "a.cpp",
+                    "binary": binary,
+                    "repetition": rep,
+                    "wall": 1.0,
+                    "checks": {"check-a": wall * (1 + rep / 10), "other": 0.5},
+                }
+                for rep in range(3)
+                for binary, wall in (("baseline", 1.0), ("patched", 1.5))
+            ]
+            with open(os.path.join(tmp_dir, PERF_FILE), "w") as f:
+                json.dump({"checks": "check-a", "repetitions": 3, "runs": runs}, f)
+
+            output_path = os.path.join(tmp_dir, "issue.md")
+            generate_report(tmp_dir, output_path)
+
+            with open(output_path) as f:
+                content = f.read()
+            self.assertIn("### Check Performance", content)
+            self.assertIn("🐢 **`check-a` is significantly slower**: 1.50×", content)
+            self.assertIn("| `other` | 0.500 | 0.500 | 1.00×", content)
+            self.assertIn("| 🐢 `proj/a.cpp` |", content)
+
+    @patch("testers.generate_report.load_projects", side_effect=OSError)
+    def test_baseline_diff_shows_only_changes(self, mock_load):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, "proj.log"), "w") as f:
+                f.write(
+                    "/w/proj/a.cpp:1:1: warning: same [check-a]\n"
+                    "/w/proj/a.cpp:2:1: warning: new [check-a]\n"
+                )
+            diffs = ResultLog(os.path.join(tmp_dir, DIFF_FILE))
+            for file in ("a.cpp", "b.cpp"):
+                diffs.record(
+                    project="proj",
+                    file=file,
+                    added=["/w/proj/a.h:2:1: warning: new [check-a]"],
+                    removed=["/w/proj/a.h:3:1: warning: gone [check-a]"],
+                    unchanged=1,
+                    baseline_crashed=file == "b.cpp",
+                    baseline_limit_exceeded=None,
+                )
+
+            output_path = os.path.join(tmp_dir, "issue.md")
+            generate_report(tmp_dir, output_path)
+
+            with open(output_path) as f:
+                content = f.read()
+            self.assertIn("| **proj** | 1 | 1 | 2 | - |", content)
+            self.assertIn("#### ➕ a.h:2\nnew `[check-a]`", content)
+            self.assertIn("#### ➖ a.h:3\ngone `[check-a]`", content)
+            self.assertIn("on 1 TUs", content)
+            self.assertNotIn("same", content)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,134 @@
+import json
+import os
+import tempfile
+import unittest
+
+from testers.history import TuHistory, estimate_peak_rss, estimate_walls
+
+
+class TestTuHistory(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sub", "history.json")
+            history = TuHistory(path)
+            history.record("p", "c1", "a.cpp", wall=2.5)
+            history.save()
+
+            reloaded = TuHistory.load(path)
+            self.assertEqual(reloaded.lookup("p", "c1", "a.cpp"), {"wall": 2.5})
+
+    def test_runs_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "history.json")
+            history = TuHistory(path)
+            history.record_run("lpt", tus=10, iowait=2.0)
+            history.record_run("lpt", tus=12, iowait=3.0)
+            history.save()
+
+            reloaded = TuHistory.load(path)
+            self.assertEqual(reloaded.last_run("lpt"), {"tus": 12, "iowait": 3.0})
+            self.assertIsNone(reloaded.last_run("locality"))
+
+    def test_missing_file_is_empty(self):
+        history = TuHistory.load("/nonexistent/history.json")
+        self.assertIsNone(history.lookup("p", "c", "a.cpp"))
+
+    def test_corrupt_file_is_ignored(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "history.json")
+            with open(path, "w") as f:
+                f.write("{not json")
+            history = TuHistory.load(path)
+            self.assertIsNone(history.lookup("p", "c", "a.cpp"))
+
+    def test_prefers_current_commit(self):
+        history = TuHistory("unused")
+        history.record("p", "old", "a.cpp", wall=1.0)
+        history.record("p", "new", "a.cpp", wall=5.0)
+        self.assertEqual(history.lookup("p", "new", "a.cpp"), {"wall": 5.0})
+        self.assertEqual(history.lookup("p", "old", "a.cpp"), {"wall": 1.0})
+
+    def test_falls_back_to_other_commit(self):
+        history = TuHistory("unused")
+        history.record("p", "old", "a.cpp", wall=3.0)
+        self.assertEqual(history.lookup("p", "new", "a.cpp"), {"wall": 3.0})
+
+    def test_prunes_old_commits(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "history.json")
+            history = TuHistory(path)
+            for i in range(5):
+                history.record("p", f"c{i}", "a.cpp", wall=float(i))
+            history.save()
+            with open(path) as f:
+                commits = json.load(f)["projects"]["p"]
+            self.assertEqual(list(commits), ["c2", "c3", "c4"])
+
+
+class TestEstimateWalls(unittest.TestCase):
+    def test_known_walls_used_directly(self):
+        history = TuHistory("unused")
+        history.record("p", "c", "a.cpp", wall=7.0)
+        estimates, known = estimate_walls(history, [("p", "c", "a.cpp", 100)])
+        self.assertEqual(estimates, [7.0])
+        self.assertEqual(known, 1)
+
+    def test_unknown_scaled_by_size(self):
+        history = TuHistory("unused")
+        history.record("p", "c", "a.cpp", wall=10.0)
+        estimates, known = estimate_walls(
+            history, [("p", "c", "a.cpp", 1000), ("p", "c", "b.cpp", 3000)]
+        )
+        self.assertEqual(estimates, [10.0, 30.0])
+        self.assertEqual(known, 1)
+
+    def test_unknown_project_uses_global_rate(self):
+        history = TuHistory("unused")
+        history.record("p", "c", "a.cpp", wall=10.0)
+        estimates, _ = estimate_walls(
+            history, [("p", "c", "a.cpp", 1000), ("q", "c", "b.cpp", 500)]
+        )
+        self.assertEqual(estimates[1], 5.0)
+
+    def test_unknown_size_uses_project_median(self):
+        history = TuHistory("unused")
+        history.record("p", "c", "a.cpp", wall=2.0)
+        history.record("p", "c", "b.cpp", wall=4.0)
+        history.record("p", "c", "c.cpp", wall=9.0)
+        items = [("p", "c", f, 0) for f in ("a.cpp", "b.cpp", "c.cpp", "new.cpp")]
+        estimates, _ = estimate_walls(history, items)
+        self.assertEqual(estimates[-1], 4.0)
+
+    def test_no_history_orders_by_size(self):
+        history = TuHistory("unused")
+        estimates, known = estimate_walls(
+            history, [("p", "c", "a.cpp", 10), ("p", "c", "b.cpp", 20)]
+        )
+        self.assertEqual(estimates, [10.0, 20.0])
+        self.assertEqual(known, 0)
+
+
+class TestEstimatePeakRss(unittest.TestCase):
+    def test_recorded_then_project_then_global_median(self):
+        history = TuHistory("unused")
+        history.record("p", "c", "a.cpp", wall=1.0, rss=100.0)
+        history.record("p", "c", "b.cpp", wall=1.0, rss=300.0)
+        history.record("q", "c", "x.cpp", wall=1.0, rss=1000.0)
+        items = [
+            ("p", "c", "a.cpp", 0),
+            ("p", "c", "b.cpp", 0),
+            ("p", "c", "new.cpp", 0),
+            ("q", "c", "x.cpp", 0),
+            ("r", "c", "y.cpp", 0),
+        ]
+        self.assertEqual(
+            estimate_peak_rss(history, items), [100.0, 300.0, 200.0, 1000.0, 300.0]
+        )
+
+    def test_nothing_recorded(self):
+        history = TuHistory("unused")
+        self.assertEqual(estimate_peak_rss(history, [("p", "c", "a.cpp", 9)]), [0.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
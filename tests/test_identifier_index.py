@@ -0,0 +1,119 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from testers.identifier_index import (
+    IdentifierIndex,
+    build_identifier_index,
+    load_identifier_index,
+    trigger_identifiers,
+    trigger_options,
+)
+from testers.rewrite import write_compile_db
+
+
+class TestTriggerIdentifiers(unittest.TestCase):
+    def test_unqualified_names_of_all_checks(self):
+        self.assertEqual(
+            trigger_identifiers(
+                ["bugprone-suspicious-memset-usage", "modernize-make-unique"]
+            ),
+            {"memset", "unique_ptr"},
+        )
+
+    def test_none_if_a_check_is_not_listed(self):
+        self.assertIsNone(
+            trigger_identifiers(["bugprone-suspicious-memset-usage", "misc-x"])
+        )
+        self.assertIsNone(trigger_identifiers([]))
+
+
+class TestTriggerOptions(unittest.TestCase):
+    def test_options_the_config_sets(self):
+        checks = ["modernize-use-std-print", "bugprone-suspicious-memset-usage"]
+        config = (
+            "{CheckOptions: {modernize-use-std-print.PrintfLikeFunctions: "
+            "'fmt::printf'}}"
+        )
+        self.assertEqual(
+            trigger_options(checks, config),
+            ["modernize-use-std-print.PrintfLikeFunctions"],
+        )
+        self.assertEqual(trigger_options(checks, "{CheckOptions: {}}"), [])
+        self.assertEqual(trigger_options(checks, None), [])
+
+
+class TestIdentifierIndex(unittest.TestCase):
+    def test_without_leaves_out_unindexed_files(self):
+        index = IdentifierIndex(
+            key={},
+            files=["/s/a.cpp", "/s/b.cpp", "/s/c.cpp", "/s/d.cpp"],
+            identifiers={"memset": [0], "memcpy": [1]},
+            unindexed=["/s/d.cpp"],
+        )
+        self.assertEqual(index.without({"memset"}), {"/s/b.cpp", "/s/c.cpp"})
+        self.assertEqual(index.without({"memset", "memcpy"}), {"/s/c.cpp"})
+
+
+class TestBuildIdentifierIndex(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.build_dir = tmp.name
+        # A compiler stand-in that preprocesses a source by printing it, and
+        # fails on c.cpp.
+        compiler = os.path.join(tmp.name, "cc")
+        with open(compiler, "w") as f:
+            f.write(
+                f"#!{sys.executable}\n"
+                "import sys\n"
+                "assert sys.argv[-2:] == ['-E', '-P'] and '-o' not in sys.argv\n"
+                "if sys.argv[-3] == 'c.cpp':\n"
+                "    sys.exit(1)\n"
+                "print(open(sys.argv[-3]).read())\n"
+            )
+        os.chmod(compiler, 0o755)
+        sources = {"a.cpp": "memset(p, 0, n);", "b.cpp": "int memsets;", "c.cpp": ""}
+        entries = []
+        for name, source in sources.items():
+            with open(os.path.join(self.build_dir, name), "w") as f:
+                f.write(source)
+            entries.append(
+                {
+                    "directory": self.build_dir,
+                    "file": name,
+                    "arguments": [compiler, "-o", "x.o", "-c", name],
+                }
+            )
+        with open(os.path.join(self.build_dir, "compile_commands.json"), "w") as f:
+            json.dump(entries, f)
+
+    def test_indexes_whole_identifiers(self):
+        index, reused = build_identifier_index(
+            self.build_dir, "c1", {"memset", "memcpy"}, jobs=2
+        )
+
+        self.assertFalse(reused)
+        a, b, c = (os.path.join(self.build_dir, n) for n in ("a.cpp", "b.cpp", "c.cpp"))
+        self.assertEqual(index.identifiers, {"memset": [0]})
+        self.assertEqual(index.unindexed, [c])
+        self.assertEqual(index.without({"memset"}), {b})
+        self.assertNotIn(a, index.without({"memset"}))
+
+    def test_reused_for_the_same_commit_and_identifiers_only(self):
+        build_identifier_index(self.build_dir, "c1", {"memset"})
+
+        self.assertTrue(build_identifier_index(self.build_dir, "c1", {"memset"})[1])
+        self.assertIsNone(load_identifier_index(self.build_dir, "c2", {"memset"}))
+        self.assertIsNone(load_identifier_index(self.build_dir, "c1", {"memcpy"}))
+
+    def test_indexes_the_planned_compile_db(self):
+        with open(os.path.join(self.build_dir, "compile_commands.json")) as f:
+            entries = json.load(f)
+        write_compile_db(self.build_dir, entries[:1])
+
+        index, _reused = build_identifier_index(self.build_dir, "c1", {"memset"})
+
+        self.assertEqual(index.files, [os.path.join(self.build_dir, "a.cpp")])
@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+from testers.include_index import (
+    IncludeIndex,
+    build_include_index,
+    dependency_command,
+    load_include_index,
+)
+from testers.rewrite import write_compile_db
+
+
+class TestDependencyCommand(unittest.TestCase):
+    def test_drops_output_flags(self):
+        args = ["cc", "-Iinc", "-MD", "-MT", "a.o", "-MFa.d", "-o", "a.o", "-c", "a.c"]
+        self.assertEqual(dependency_command(args), ["cc", "-Iinc", "a.c", "-MM"])
+
+
+class TestIncludeIndex(unittest.TestCase):
+    def test_including_matches_absolute_paths_and_suffixes(self):
+        index = IncludeIndex(
+            key={},
+            files=["/s/a.cpp", "/s/b.cpp"],
+            headers={"/s/inc/x.h": [0], "/s/inc/sub/x.h": [1], "/s/inc/ax.h": [1]},
+        )
+        self.assertEqual(index.including("/s/inc/x.h"), {"/s/a.cpp"})
+        self.assertEqual(index.including("x.h"), {"/s/a.cpp", "/s/b.cpp"})
+        self.assertEqual(index.including("sub/x.h"), {"/s/b.cpp"})
+
+    def test_headers_by_file_leaves_out_unindexed_files(self):
+        index = IncludeIndex(
+            key={},
+            files=["/s/a.cpp", "/s/b.cpp", "/s/c.cpp"],
+            headers={"/s/x.h": [0, 1], "/s/y.h": [1]},
+            unindexed=["/s/c.cpp"],
+        )
+        self.assertEqual(
+            index.headers_by_file(),
+            {"/s/a.cpp": ["/s/x.h"], "/s/b.cpp": ["/s/x.h", "/s/y.h"]},
+        )
+
+
+class TestBuildIncludeIndex(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.build_dir = os.path.join(tmp.name, "build")
+        os.makedirs(self.build_dir)
+        # A compiler stand-in that lists one header for -MM and fails on
+        # b.cpp.
+        self.compiler = os.path.join(tmp.name, "cc")
+        with open(self.compiler, "w") as f:
+            f.write(
+                f"#!{sys.executable}\n"
+                "import sys\n"
+                "assert sys.argv[-1] == '-MM' and '-o' not in sys.argv\n"
+                "if sys.argv[-2].endswith('b.cpp'):\n"
+                "    sys.exit(1)\n"
+                "print(f'x.o: {sys.argv[-2]} \\\\\\n  ../inc/mm.h')\n"
+            )
+        os.chmod(self.compiler, 0o755)
+        with open(os.path.join(self.build_dir, "a.d"), "w") as f:
+            f.write("a.o: ../a.cpp ../inc/dep.h /usr/include/stdio.h\n")
+        entries = [
+            {
+                "directory": self.build_dir,
+                "file": f"../{name}.cpp",
+                "arguments": [self.compiler, "-MD", "-MF", f"{name}.d", "-o", "x.o"]
+                + [f"../{name}.cpp"],
+            }
+            for name in ("a", "b", "c")
+        ]
+        with open(os.path.join(self.build_dir, "compile_commands.json"), "w") as f:
+            json.dump(entries, f)
+
+    def _path(self, name: str) -> str:
+        return os.path.normpath(os.path.join(self.build_dir, "..", name))
+
+    def test_indexes_depfiles_and_falls_back_to_the_compiler(self):
+        index, reused = build_include_index(self.build_dir, "c1", jobs=2)
+
+        self.assertFalse(reused)
+        self.assertEqual(index.including("inc/dep.h"), {self._path("a.cpp")})
+        self.assertEqual(index.including("/usr/include/stdio.h"), {self._path("a.cpp")})
+        self.assertEqual(index.including("inc/mm.h"), {self._path("c.cpp")})
+        self.assertEqual(index.unindexed, [self._path("b.cpp")])
+
+    def test_reused_for_the_same_commit_only(self):
+        build_include_index(self.build_dir, "c1")
+
+        self.assertTrue(build_include_index(self.build_dir, "c1")[1])
+        self.assertIsNone(load_include_index(self.build_dir, "c2"))
+        self.assertFalse(build_include_index(self.build_dir, "c2")[1])
+
+    def test_indexes_the_planned_compile_db(self):
+        with open(os.path.join(self.build_dir, "compile_commands.json")) as f:
+            entries = json.load(f)
+        write_compile_db(self.build_dir, [entries[0], entries[2]])
+
+        index, _reused = build_include_index(self.build_dir, "c1")
+
+        self.assertEqual(index.files, [self._path("a.cpp"), self._path("c.cpp")])
@@ -0,0 +1,74 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from testers.journal import Journal, run_fingerprint
+
+
+class TestRunFingerprint(unittest.TestCase):
+    def test_depends_on_binary_content_and_settings(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            binary = os.path.join(tmp_dir, "clang-tidy")
+            with open(binary, "w") as f:
+                f.write("v1")
+            first = run_fingerprint(binary, {"check": "a"})
+
+            self.assertEqual(run_fingerprint(binary, {"check": "a"}), first)
+            self.assertNotEqual(run_fingerprint(binary, {"check": "b"}), first)
+            with open(binary, "w") as f:
+                f.write("v2")
+            self.assertNotEqual(run_fingerprint(binary, {"check": "a"}), first)
+
+
+@patch("sys.stdout", new_callable=io.StringIO)
+class TestJournal(unittest.TestCase):
+    def test_resume_keeps_entries(self, _stdout):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "journal.jsonl")
+            journal = Journal.open(path, "fp")
+            journal.record("p", "c", "/src/a.cpp", output="w\n")
+
+            resumed = Journal.open(path, "fp", resume=True)
+
+            self.assertTrue(resumed.resumed)
+            entry = resumed.completed("p", "c", "/src/a.cpp")
+            assert entry is not None
+            self.assertEqual(entry["output"], "w\n")
+            self.assertIsNone(resumed.completed("p", "other", "/src/a.cpp"))
+
+    def test_fresh_run_discards_entries(self, _stdout):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "journal.jsonl")
+            Journal.open(path, "fp").record("p", "c", "/src/a.cpp", output="")
+
+            Journal.open(path, "fp")
+
+            resumed = Journal.open(path, "fp", resume=True)
+            self.assertIsNone(resumed.completed("p", "c", "/src/a.cpp"))
+
+    def test_other_fingerprint_starts_from_scratch(self, _stdout):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "journal.jsonl")
+            Journal.open(path, "old").record("p", "c", "/src/a.cpp", output="")
+
+            resumed = Journal.open(path, "new", resume=True)
+
+            self.assertFalse(resumed.resumed)
+            self.assertIsNone(resumed.completed("p", "c", "/src/a.cpp"))
+
+    def test_torn_last_line_is_skipped(self, _stdout):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "journal.jsonl")
+            Journal.open(path, "fp").record("p", "c", "/src/a.cpp", output="")
+            with open(path, "a") as f:
+                f.write('{"project": "p", "commit": "c", "fi')
+
+            resumed = Journal.open(path, "fp", resume=True)
+
+            self.assertIsNotNone(resumed.completed("p", "c", "/src/a.cpp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
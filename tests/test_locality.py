@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from testers.locality import (
+    include_signature,
+    include_signatures,
+    locality_chains,
+    read_depfile,
+)
+
+
+class TestReadDepfile(unittest.TestCase):
+    def test_continuations_and_escaped_spaces(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "a.o.d")
+            with open(path, "w") as f:
+                f.write("a.o: src/a.cpp \\\n  inc/a.h inc/with\\ space.h\n")
+            self.assertEqual(
+                read_depfile(path), ["src/a.cpp", "inc/a.h", "inc/with space.h"]
+            )
+
+    def test_missing_depfile(self):
+        self.assertEqual(read_depfile("/nonexistent/a.o.d"), [])
+
+
+class TestIncludeSignature(unittest.TestCase):
+    def test_include_dirs_and_depfile_headers(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with open(os.path.join(tmp_dir, "a.o.d"), "w") as f:
+                f.write("a.o: /src/a.cpp /src/a.h\n")
+            entry = {
+                "directory": tmp_dir,
+                "file": "/src/a.cpp",
+                "command": "c++ -Iinc -isystem /usr/include/x -MD -MF a.o.d "
+                "-c /src/a.cpp",
+            }
+            self.assertEqual(
+                include_signature(entry),
+                {
+                    f"dir:{tmp_dir}/inc",
+                    "dir:/usr/include/x",
+                    "/src/a.h",
+                },
+            )
+
+    def test_given_headers_replace_depfile(self):
+        entry = {
+            "directory": "/b",
+            "file": "/s/a.cpp",
+            "command": "c++ -MD -MF missing.d -c /s/a.cpp",
+        }
+        self.assertEqual(include_signature(entry, ["/s/a.cpp", "../s/a.h"]), {"/s/a.h"})
+
+    def test_arguments_and_absolute_keys(self):
+        entries = [
+            {"directory": "/b", "file": "../s/a.cpp", "arguments": ["cc", "-I", "i"]}
+        ]
+        self.assertEqual(include_signatures(entries), {"/s/a.cpp": {"dir:/b/i"}})
+        self.assertEqual(
+            include_signatures(entries, {"/s/a.cpp": ["/s/a.h"]}),
+            {"/s/a.cpp": {"dir:/b/i", "/s/a.h"}},
+        )
+
+
+class TestLocalityChains(unittest.TestCase):
+    def test_walks_directories_by_include_overlap(self):
+        items = [
+            ("/p/a/1.cpp", 5.0, frozenset({"x", "y"})),
+            ("/p/b/1.cpp", 1.0, frozenset({"z"})),
+            ("/p/c/1.cpp", 1.0, frozenset({"x", "y", "w"})),
+            ("/p/a/2.cpp", 1.0, frozenset({"x"})),
+        ]
+        chains = locality_chains(items, target_cost=100.0)
+        self.assertEqual(chains, [[0, 3, 2, 1]])
+
+    def test_cuts_chains_at_target_cost(self):
+        items = [(f"/p/a/{i}.cpp", 1.0, frozenset()) for i in range(5)]
+        self.assertEqual(locality_chains(items, target_cost=2.0), [[0, 1], [2, 3], [4]])
+
+    def test_expensive_tu_forms_its_own_chain(self):
+        items = [
+            ("/p/a/1.cpp", 1.0, frozenset()),
+            ("/p/a/2.cpp", 10.0, frozenset()),
+            ("/p/a/3.cpp", 1.0, frozenset()),
+        ]
+        self.assertEqual(locality_chains(items, target_cost=2.0), [[0], [1], [2]])
+
+    def test_empty(self):
+        self.assertEqual(locality_chains([], target_cost=1.0), [])
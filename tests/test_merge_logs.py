@@ -0,0 +1,136 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from testers.analyze import analyze
+from testers.generate_report import parse_log_file
+from testers.merge_logs import merge_logs
+from testers.shards import Shard
+
+
+def _write_project(work_dir: str, name: str, files: list[str]) -> None:
+    source_dir = os.path.join(work_dir, name)
+    os.makedirs(os.path.join(source_dir, "build"))
+    entries = []
+    for file in files:
+        with open(os.path.join(source_dir, file), "w") as f:
+            f.write("int x;\n" * len(file))
+        entries.append({"directory": source_dir, "file": file, "command": "c++"})
+    with open(os.path.join(source_dir, "build", "compile_commands.json"), "w") as f:
+        json.dump(entries, f)
+
+
+@patch("sys.stdout", new_callable=io.StringIO)
+class TestMergeLogs(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.tmp_dir = self._tmp.name
+        self.work_dir = os.path.join(self.tmp_dir, "work")
+        _write_project(self.work_dir, "a", ["x.cpp", "yy.cpp", "zzz.cpp"])
+        _write_project(self.work_dir, "b", ["b1.cpp", "b22.cpp"])
+        self.config = os.path.join(self.tmp_dir, "projects.json")
+        with open(self.config, "w") as f:
+            json.dump(
+                {
+                    "projects": {
+                        "a": {"url": "u", "commit": "c"},
+                        "b": {"url": "u", "commit": "c"},
+                    }
+                },
+                f,
+            )
+        self.clang_tidy = os.path.join(self.tmp_dir, "clang-tidy")
+        with open(self.clang_tidy, "w") as f:
+            f.write(
+                f"#!{sys.executable}\n"
+                "import sys\n"
+                "print(sys.argv[-1] + ':1:1: warning: w [check]')\n"
+            )
+        os.chmod(self.clang_tidy, 0o755)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _analyze(self, log_dir: str, shard: Shard | None = None) -> None:
+        analyze(
+            check_name="check",
+            work_dir=self.work_dir,
+            clang_tidy_bin=self.clang_tidy,
+            log_dir=os.path.join(self.tmp_dir, log_dir),
+            config_path=self.config,
+            jobs=2,
+            history_file=os.path.join(self.tmp_dir, "history.json"),
+            parse_failures_file=os.path.join(self.tmp_dir, "parse-failures.json"),
+            result_cache_dir=os.path.join(self.tmp_dir, "result-cache"),
+            shard=shard,
+        )
+
+    def _read(self, log_dir: str, name: str) -> str:
+        with open(os.path.join(self.tmp_dir, log_dir, name)) as f:
+            return f.read()
+
+    def test_merged_shards_match_unsharded_run(self, _stdout):
+        self._analyze("full")
+        self._analyze("shard1", Shard(1, 2))
+        self._analyze("shard2", Shard(2, 2))
+
+        merge_logs(
+            [os.path.join(self.tmp_dir, d) for d in ("shard1", "shard2")],
+            os.path.join(self.tmp_dir, "merged"),
+        )
+
+        for name in ("a.log", "b.log"):
+            self.assertEqual(self._read("merged", name), self._read("full", name))
+        shard_lines = self._read("shard1", "a.log") + self._read("shard1", "b.log")
+        self.assertEqual(len(shard_lines.splitlines()), 3)
+        self.assertEqual(
+            len(self._read("merged", "results.jsonl").splitlines()),
+            len(self._read("full", "results.jsonl").splitlines()),
+        )
+
+    def test_keeps_event_lines_of_every_shard(self, _stdout):
+        self._analyze("shard1", Shard(1, 2))
+        self._analyze("shard2", Shard(2, 2))
+        events = {
+            "shard1": "CTIT PARSE-FAILURE: /w/a/x.cpp (skipped): bad\n"
+            "CTIT FLOOD: check emitted 9 diagnostics; 1 of 2 TUs were not analyzed\n"
+            "CTIT PREFILTER: skipped 1 of 3 TUs containing none of the checks' "
+            "trigger identifiers\n",
+            "shard2": "CTIT PARSE-FAILURE: /w/a/w.cpp (analyzed anyway): worse\n"
+            "CTIT PREFILTER: skipped 2 of 4 TUs containing none of the checks' "
+            "trigger identifiers\n",
+        }
+        for shard, lines in events.items():
+            with open(os.path.join(self.tmp_dir, shard, "a.log"), "a") as f:
+                f.write(lines)
+
+        merge_logs(
+            [os.path.join(self.tmp_dir, d) for d in ("shard1", "shard2")],
+            os.path.join(self.tmp_dir, "merged"),
+        )
+
+        result = parse_log_file(os.path.join(self.tmp_dir, "merged", "a.log"))
+        self.assertEqual(result.parse_failures, [("w.cpp", "worse"), ("x.cpp", "bad")])
+        self.assertIn("1 of 2 TUs were not analyzed", result.stopped_early)
+        self.assertEqual((result.prefiltered, result.prefilter_total), (3, 7))
+        self.assertNotIn("CTIT", self._read("merged", "b.log"))
+
+    def test_rejects_directories_without_journal(self, _stdout):
+        os.makedirs(os.path.join(self.tmp_dir, "script"))
+        with (
+            patch("sys.stderr", new_callable=io.StringIO),
+            self.assertRaises(SystemExit) as ctx,
+        ):
+            merge_logs(
+                [os.path.join(self.tmp_dir, "script")],
+                os.path.join(self.tmp_dir, "merged"),
+            )
+        self.assertEqual(ctx.exception.code, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
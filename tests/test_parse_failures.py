@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+import unittest
+
+from testers.parse_failures import (
+    ParseFailures,
+    entry_compiler,
+    parse_error,
+    syntax_only_command,
+)
+
+
+class TestParseFailures(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "sub", "parse-failures.json")
+            cache = ParseFailures(path)
+            cache.record("p", "c1", "clang 18", "a.cpp", "a.cpp:1:1: error: x")
+            cache.save()
+
+            reloaded = ParseFailures.load(path)
+            self.assertEqual(
+                reloaded.failures("p", "c1", "clang 18"),
+                {"a.cpp": "a.cpp:1:1: error: x"},
+            )
+            self.assertEqual(reloaded.failures("p", "c1", "clang 19"), {})
+            self.assertEqual(reloaded.failures("p", "c2", "clang 18"), {})
+
+    def test_keeps_recent_commits(self):
+        cache = ParseFailures("unused")
+        for i in range(5):
+            cache.record("p", f"c{i}", "cc", "a.cpp", "e")
+        self.assertEqual(cache.failures("p", "c0", "cc"), {})
+        self.assertEqual(cache.failures("p", "c4", "cc"), {"a.cpp": "e"})
+
+
+class TestSyntaxOnlyCommand(unittest.TestCase):
+    def test_drops_outputs_and_launcher(self):
+        entry = {
+            "directory": "/b",
+            "file": "/s/a.cpp",
+            "command": "sccache /usr/bin/clang++ -Iinc -MD -MT a.o -MF a.o.d "
+            "-o a.o -c /s/a.cpp",
+        }
+        self.assertEqual(entry_compiler(entry), "/usr/bin/clang++")
+        self.assertEqual(
+            syntax_only_command(entry),
+            ["/usr/bin/clang++", "-Iinc", "/s/a.cpp", "-fsyntax-only"],
+        )
+
+
+class TestParseError(unittest.TestCase):
+    def _entry(self, tmp_dir: str, exit_code: int) -> dict:
+        compiler = os.path.join(tmp_dir, "clang")
+        with open(compiler, "w") as f:
+            f.write(
+                f"#!{sys.executable}\n"
+                "import sys\n"
+                "sys.stderr.write('a.cpp:1:10: fatal error: gen.h not found\\n')\n"
+                f"sys.exit({exit_code})\n"
+            )
+        os.chmod(compiler, 0o755)
+        return {"directory": tmp_dir, "file": "a.cpp", "arguments": [compiler, "a.cpp"]}
+
+    def test_returns_first_error(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.assertEqual(
+                parse_error(self._entry(tmp_dir, 1)),
+                "a.cpp:1:10: fatal error: gen.h not found",
+            )
+
+    def test_successful_parse(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.assertIsNone(parse_error(self._entry(tmp_dir, 0)))
@@ -0,0 +1,105 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from testers.analyze import compile_db_plans
+from testers.config import Project
+from testers.perf_ab import PERF_FILE, compare, load_perf, perf_ab, under_test
+
+
+def _write_fake_clang_tidy(path: str, wall: float) -> None:
+    """A clang-tidy stand-in storing a check profile with the given wall time."""
+    with open(path, "w") as f:
+        f.write(
+            f"#!{sys.executable}\n"
+            "import json, os, sys\n"
+            "[profile_dir] = [a.split('=', 1)[1] for a in sys.argv\n"
+            "                 if a.startswith('-store-check-profile=')]\n"
+            "profile = {}\n"
+            f"for check, wall in (('check-a', {wall}), ('other', 0.5)):\n"
+            "    for timer in ('wall', 'user', 'sys'):\n"
+            "        profile[f'time.clang-tidy.{check}.{timer}'] = wall\n"
+            "path = os.path.join(profile_dir, 'tu.json')\n"
+            "with open(path, 'w') as f:\n"
+            "    json.dump({'file': sys.argv[-1], 'profile': profile}, f)\n"
+        )
+    os.chmod(path, 0o755)
+
+
+class TestCompare(unittest.TestCase):
+    def test_consistent_slowdown_is_significant(self):
+        c = compare("c", [1.0, 1.1, 0.9, 1.0], [1.2, 1.3, 1.1, 1.25])
+        assert c is not None
+        self.assertTrue(c.slower)
+        self.assertFalse(c.faster)
+        self.assertLess(c.low, c.ratio)
+        self.assertLess(c.ratio, c.high)
+
+    def test_noise_is_not_significant(self):
+        c = compare("c", [1.0, 1.2, 0.9, 1.1], [1.1, 1.0, 1.0, 1.2])
+        assert c is not None
+        self.assertFalse(c.slower or c.faster)
+
+    def test_needs_two_pairs(self):
+        self.assertIsNone(compare("c", [1.0, 0.0], [1.0, 1.0]))
+
+
+class TestUnderTest(unittest.TestCase):
+    def test_later_globs_win(self):
+        self.assertTrue(under_test("bugprone-foo", "bugprone-*"))
+        self.assertFalse(under_test("bugprone-foo", "bugprone-*,-bugprone-foo"))
+        self.assertTrue(under_test("bugprone-foo", "-*,bugprone-foo"))
+        self.assertFalse(under_test("misc-foo", "bugprone-*"))
+
+
+class TestPerfAb(unittest.TestCase):
+    @patch("testers.perf_ab.get_analysis_configs", return_value={})
+    @patch("testers.perf_ab.load_projects")
+    def test_profiles_both_binaries_and_compares(self, mock_load, mock_configs):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            mock_load.return_value = [Project(name="p", url="u", commit="c")]
+            build_dir = os.path.join(tmp_dir, "work", "p", "build")
+            os.makedirs(build_dir)
+            entries = [
+                {"directory": build_dir, "file": f"{name}.cpp", "arguments": ["cc"]}
+                for name in ("a", "b", "c")
+            ]
+            with open(os.path.join(build_dir, "compile_commands.json"), "w") as f:
+                json.dump(entries, f)
+            baseline = os.path.join(tmp_dir, "baseline")
+            patched = os.path.join(tmp_dir, "patched")
+            _write_fake_clang_tidy(baseline, 0.1)
+            _write_fake_clang_tidy(patched, 0.2)
+            log_dir = os.path.join(tmp_dir, "logs")
+
+            with (
+                patch("sys.stdout"),
+                patch(
+                    "testers.perf_ab.compile_db_plans", wraps=compile_db_plans
+                ) as mock_plans,
+            ):
+                perf_ab(
+                    "check-a",
+                    baseline,
+                    clang_tidy_bin=patched,
+                    work_dir=os.path.join(tmp_dir, "work"),
+                    log_dir=log_dir,
+                    repetitions=2,
+                    sample=2,
+                    rewrite=False,
+                )
+
+            self.assertFalse(mock_plans.call_args.args[2])
+
+            perf = load_perf(os.path.join(log_dir, PERF_FILE))
+            self.assertEqual((perf.repetitions, perf.tus), (2, 2))
+            [tested] = perf.tested
+            self.assertEqual(tested.name, "check-a")
+            self.assertAlmostEqual(tested.ratio, 2.0)
+            self.assertTrue(tested.slower)
+            [other] = perf.others
+            self.assertAlmostEqual(other.ratio, 1.0)
+            self.assertEqual(len(perf.units), 2)
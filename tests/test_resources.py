@@ -0,0 +1,162 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from testers.resources import (
+    MemoryBudget,
+    ResourceLimits,
+    detect_limits,
+    read_iowait_seconds,
+    read_rss_kb,
+)
+
+
+def _write_tree(root: str, files: dict[str, str]) -> None:
+    for rel, content in files.items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(content + "\n")
+
+
+class TestReadRssKb(unittest.TestCase):
+    def test_own_process(self):
+        rss = read_rss_kb(os.getpid())
+        assert rss is not None
+        self.assertGreater(rss, 0)
+
+    def test_missing_process(self):
+        self.assertIsNone(read_rss_kb(2**22 + 12345))
+
+
+class TestReadIowaitSeconds(unittest.TestCase):
+    def test_aggregate_cpu_line(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "stat")
+            with open(path, "w") as f:
+                f.write("cpu  10 0 20 300 250 0 0 0 0 0\ncpu0 5 0 10 150 125 0\n")
+            ticks = os.sysconf("SC_CLK_TCK")
+            self.assertEqual(read_iowait_seconds(path), 250 / ticks)
+
+    def test_missing_proc_stat(self):
+        self.assertIsNone(read_iowait_seconds("/nonexistent/stat"))
+
+
+class TestMemoryBudget(unittest.TestCase):
+    def test_always_admits_when_idle(self):
+        budget = MemoryBudget(100)
+        self.assertTrue(budget.admits(10_000))
+
+    def test_uses_expected_peak_before_process_grows(self):
+        budget = MemoryBudget(1000)
+        budget.start(1, 600)
+        self.assertFalse(budget.admits(500))
+        self.assertTrue(budget.admits(400))
+
+    @patch("testers.resources.read_rss_kb", return_value=900)
+    def test_uses_sampled_rss_above_expectation(self, mock_rss):
+        budget = MemoryBudget(1000)
+        budget.start(1, 100)
+        budget.set_pid(1, 4242)
+        self.assertEqual(budget.projected_kb(), 900)
+        self.assertFalse(budget.admits(200))
+        mock_rss.assert_called_with(4242)
+
+    def test_finish_releases_memory(self):
+        budget = MemoryBudget(1000)
+        budget.start(1, 900)
+        budget.finish(1)
+        self.assertEqual(budget.projected_kb(), 0)
+
+
+@patch("testers.resources.os.sched_getaffinity", return_value=set(range(64)))
+class TestDetectLimits(unittest.TestCase):
+    def test_cgroup_v2(self, _affinity):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _write_tree(
+                tmp_dir,
+                {
+                    "proc_cgroup": "0::/ctit",
+                    "cg/cgroup.controllers": "cpu cpuset memory",
+                    "cg/cpu.max": "max 100000",
+                    "cg/ctit/cpu.max": "400000 100000",
+                    "cg/ctit/cpuset.cpus.effective": "0-7",
+                    "cg/ctit/memory.max": str(16 << 30),
+                    "cg/ctit/memory.high": "max",
+                },
+            )
+            limits = detect_limits(
+                os.path.join(tmp_dir, "cg"), os.path.join(tmp_dir, "proc_cgroup")
+            )
+            self.assertEqual(limits.cpus, 4)
+            self.assertEqual(limits.cpu_quota, 4.0)
+            self.assertEqual(limits.cpuset_cpus, 8)
+            self.assertEqual(limits.memory_bytes, 16 << 30)
+
+    def test_cgroup_v1_without_namespace(self, _affinity):
+        # The host path from /proc/self/cgroup does not exist in the
+        # container, whose own cgroup is mounted at the controller root.
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _write_tree(
+                tmp_dir,
+                {
+                    "proc_cgroup": "4:memory:/docker/abc\n3:cpuset:/docker/abc\n"
+                    "2:cpu,cpuacct:/docker/abc",
+                    "cg/cpu,cpuacct/cpu.cfs_quota_us": "250000",
+                    "cg/cpu,cpuacct/cpu.cfs_period_us": "100000",
+                    "cg/cpuset/cpuset.cpus": "0-3,8-11",
+                    "cg/memory/memory.limit_in_bytes": str(8 << 30),
+                },
+            )
+            limits = detect_limits(
+                os.path.join(tmp_dir, "cg"), os.path.join(tmp_dir, "proc_cgroup")
+            )
+            self.assertEqual(limits.cpus, 2)
+            self.assertEqual(limits.cpuset_cpus, 8)
+            self.assertEqual(limits.memory_bytes, 8 << 30)
+
+    def test_unlimited(self, _affinity):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            _write_tree(
+                tmp_dir,
+                {
+                    "proc_cgroup": "2:cpu:/\n1:memory:/",
+                    "cg/cpu/cpu.cfs_quota_us": "-1",
+                    "cg/cpu/cpu.cfs_period_us": "100000",
+                    "cg/memory/memory.limit_in_bytes": "9223372036854771712",
+                },
+            )
+            limits = detect_limits(
+                os.path.join(tmp_dir, "cg"), os.path.join(tmp_dir, "proc_cgroup")
+            )
+            self.assertEqual(limits, ResourceLimits(cpus=64))
+
+    def test_missing_cgroupfs(self, _affinity):
+        limits = detect_limits("/nonexistent", "/nonexistent/cgroup")
+        self.assertEqual(limits.cpus, 64)
+        self.assertIsNone(limits.memory_bytes)
+
+
+class TestResourceLimits(unittest.TestCase):
+    def test_memory_budget(self):
+        self.assertIsNone(ResourceLimits(cpus=4).memory_budget_mb())
+        self.assertEqual(
+            ResourceLimits(cpus=4, memory_bytes=10 << 30).memory_budget_mb(), 9216
+        )
+
+    def test_build_jobs_limited_by_memory(self):
+        self.assertEqual(ResourceLimits(cpus=32, memory_bytes=16 << 30).build_jobs(), 8)
+        self.assertEqual(ResourceLimits(cpus=4, memory_bytes=64 << 30).build_jobs(), 4)
+        self.assertEqual(ResourceLimits(cpus=4, memory_bytes=1 << 30).build_jobs(), 1)
+        self.assertEqual(ResourceLimits(cpus=4).build_jobs(), 4)
+
+    def test_describe(self):
+        limits = ResourceLimits(cpus=4, memory_bytes=8 << 30, cpu_quota=4.0)
+        self.assertEqual(
+            limits.describe(), "4 CPUs (CPU quota 4), 8192 MB memory limit"
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from testers.result_cache import ResultCache
+
+
+def _write(path: str, content: str) -> None:
+    with open(path, "w") as f:
+        f.write(content)
+
+
+class TestKey(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = tmp.name
+        _write(os.path.join(self.dir, "a.cpp"), '#include "a.h"\n')
+        _write(os.path.join(self.dir, "a.h"), "int a;\n")
+        _write(os.path.join(self.dir, "a.o.d"), "a.o: a.cpp a.h\n")
+        self.entry = {
+            "directory": self.dir,
+            "file": "a.cpp",
+            "arguments": ["cc", "-MD", "-MF", "a.o.d", "-c", "a.cpp"],
+        }
+
+    def test_changes_with_header_content(self):
+        key = ResultCache(self.dir, "f").key(self.entry)
+        self.assertIsNotNone(key)
+        self.assertEqual(ResultCache(self.dir, "f").key(self.entry), key)
+
+        _write(os.path.join(self.dir, "a.h"), "long a;\n")
+        self.assertNotEqual(ResultCache(self.dir, "f").key(self.entry), key)
+
+    def test_changes_with_fingerprint_and_command(self):
+        key = ResultCache(self.dir, "f").key(self.entry)
+        self.assertNotEqual(ResultCache(self.dir, "g").key(self.entry), key)
+        entry = {**self.entry, "arguments": self.entry["arguments"] + ["-DX"]}
+        self.assertNotEqual(ResultCache(self.dir, "f").key(entry), key)
+
+    def test_asks_the_compiler_without_depfile(self):
+        # A compiler stand-in printing the -M rule of a.cpp, as for entries
+        # of CMake's Ninja compile DBs, which have no -MF.
+        compiler = os.path.join(self.dir, "cc")
+        _write(
+            compiler,
+            f"#!{sys.executable}\n"
+            "import sys\n"
+            "assert sys.argv[-1] == '-M' and '-c' not in sys.argv\n"
+            "print('a.o: a.cpp a.h sys.h')\n",
+        )
+        os.chmod(compiler, 0o755)
+        entry = {**self.entry, "arguments": [compiler, "-o", "a.o", "-c", "a.cpp"]}
+
+        _write(os.path.join(self.dir, "sys.h"), "int s;\n")
+
+        key = ResultCache(self.dir, "f").key(entry)
+        self.assertIsNotNone(key)
+        self.assertEqual(ResultCache(self.dir, "f").key(entry), key)
+        _write(os.path.join(self.dir, "a.h"), "long a;\n")
+        changed = ResultCache(self.dir, "f").key(entry)
+        self.assertNotEqual(changed, key)
+        # A system header, as after a standard library update.
+        _write(os.path.join(self.dir, "sys.h"), "long s;\n")
+        self.assertNotEqual(ResultCache(self.dir, "f").key(entry), changed)
+
+    def test_no_key_without_headers(self):
+        entry = {**self.entry, "arguments": ["/nonexistent/cc", "-c", "a.cpp"]}
+        self.assertIsNone(ResultCache(self.dir).key(entry))
+
+
+class TestStore(unittest.TestCase):
+    def test_get_put_and_counters(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ResultCache(tmp_dir)
+            self.assertIsNone(cache.get("ab" * 32))
+            cache.put("ab" * 32, "out\n", 1.5)
+            self.assertEqual(cache.get("ab" * 32), {"output": "out\n", "elapsed": 1.5})
+            self.assertEqual((cache.hits, cache.misses, cache.stored), (1, 1, 1))
+            self.assertEqual(
+                cache.stats(), (1, len('{"output": "out\\n", "elapsed": 1.5}'))
+            )
+
+    def test_gc_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache = ResultCache(tmp_dir)
+            for index, key in enumerate(("aa" * 32, "bb" * 32, "cc" * 32)):
+                cache.put(key, "x" * 100, 0.0)
+                path = os.path.join(tmp_dir, key[:2], key[2:])
+                past = time.time() - 100 + index
+                os.utime(path, (past, past))
+            cache.get("aa" * 32)
+
+            removed, _freed = cache.gc(max_bytes=200)
+
+            self.assertEqual(removed, 2)
+            self.assertIsNotNone(cache.get("aa" * 32))
+            self.assertIsNone(cache.get("bb" * 32))
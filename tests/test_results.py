@@ -0,0 +1,35 @@
+import json
+import os
+import tempfile
+import unittest
+
+from testers.results import ResultLog, command_hash, read_results
+
+
+class TestCommandHash(unittest.TestCase):
+    def test_stable_and_distinct(self):
+        self.assertEqual(command_hash(["ct", "a.cpp"]), command_hash(["ct", "a.cpp"]))
+        self.assertNotEqual(
+            command_hash(["ct", "a.cpp"]), command_hash(["ct", "b.cpp"])
+        )
+
+
+class TestResultLog(unittest.TestCase):
+    def test_truncates_unless_appending(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "logs", "results.jsonl")
+            ResultLog(path).record(file="a.cpp")
+            ResultLog(path, append=True).record(file="b.cpp")
+            self.assertEqual(
+                [r["file"] for r in read_results(path)], ["a.cpp", "b.cpp"]
+            )
+
+            ResultLog(path).record(file="c.cpp")
+            self.assertEqual([r["file"] for r in read_results(path)], ["c.cpp"])
+
+    def test_skips_torn_last_line(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "results.jsonl")
+            with open(path, "w") as f:
+                f.write(json.dumps({"file": "a.cpp"}) + '\n{"file": "b.')
+            self.assertEqual(read_results(path), [{"file": "a.cpp"}])
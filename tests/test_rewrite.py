@@ -0,0 +1,113 @@
+import json
+import os
+import tempfile
+import unittest
+
+from testers.rewrite import (
+    DEFAULT_DROP_FLAGS,
+    OPTIONAL_DROP_FLAGS,
+    REWRITTEN_DB_DIR,
+    RewriteRules,
+    compile_db_dir,
+    rewrite_arguments,
+    rewrite_entries,
+    write_compile_db,
+)
+
+
+class TestRewriteArguments(unittest.TestCase):
+    def test_drops_default_flags(self):
+        args = [
+            "clang++",
+            "-g",
+            "-O2",
+            "-Wall",
+            "-Werror=format",
+            "-fsanitize=address",
+            "-Wl,--as-needed",
+            "-Xclang",
+            "-include-pch",
+            "-Xclang",
+            "cmake_pch.hxx.pch",
+            "-Xclang",
+            "-include",
+            "-Xclang",
+            "/b/CMakeFiles/t.dir/cmake_pch.hxx",
+            "-I",
+            "inc",
+            "-c",
+            "a.cpp",
+        ]
+
+        kept, dropped = rewrite_arguments(args, RewriteRules(DEFAULT_DROP_FLAGS))
+
+        # Sanitizer and warning flags can change diagnostics and are kept.
+        self.assertEqual(
+            kept,
+            ["clang++", "-O2", "-Wall", "-Werror=format", "-fsanitize=address"]
+            + ["-Wl,--as-needed", "-I", "inc", "-c", "a.cpp"],
+        )
+        self.assertEqual(dropped.total(), 3)
+
+        optional = OPTIONAL_DROP_FLAGS["sanitizers"] + OPTIONAL_DROP_FLAGS["warnings"]
+        kept, dropped = rewrite_arguments(
+            args, RewriteRules(DEFAULT_DROP_FLAGS + optional)
+        )
+        self.assertEqual(
+            kept, ["clang++", "-O2", "-Wl,--as-needed", "-I", "inc", "-c", "a.cpp"]
+        )
+        self.assertEqual(dropped.total(), 6)
+        self.assertEqual(dropped[r"-W(?![lpa],).+"], 2)
+
+    def test_keep_overrides_drop(self):
+        rules = RewriteRules(OPTIONAL_DROP_FLAGS["warnings"], keep=[r"-Wno-.*"])
+        kept, _ = rewrite_arguments(["cc", "-Wall", "-Wno-unused"], rules)
+        self.assertEqual(kept, ["cc", "-Wno-unused"])
+
+    def test_flag_value_matched_with_flag(self):
+        rules = RewriteRules([r"-D NDEBUG"])
+        kept, _ = rewrite_arguments(["cc", "-D", "NDEBUG", "-D", "X"], rules)
+        self.assertEqual(kept, ["cc", "-D", "X"])
+
+    def test_never_drops_compiler(self):
+        kept, _ = rewrite_arguments(["-g"], RewriteRules(DEFAULT_DROP_FLAGS))
+        self.assertEqual(kept, ["-g"])
+
+
+class TestRewriteEntries(unittest.TestCase):
+    def test_keeps_other_keys(self):
+        entry = {
+            "directory": "/b",
+            "file": "a.cpp",
+            "command": "cc -g -Wall -c a.cpp",
+            "output": "a.o",
+        }
+
+        rewritten, dropped = rewrite_entries([entry], RewriteRules(DEFAULT_DROP_FLAGS))
+
+        self.assertEqual(dropped.total(), 1)
+        self.assertEqual(
+            rewritten,
+            [
+                {
+                    "directory": "/b",
+                    "file": "a.cpp",
+                    "output": "a.o",
+                    "arguments": ["cc", "-Wall", "-c", "a.cpp"],
+                }
+            ],
+        )
+
+
+class TestWriteCompileDb(unittest.TestCase):
+    def test_switches_compile_db_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            self.assertEqual(compile_db_dir(tmp_dir), tmp_dir)
+            entries = [{"directory": tmp_dir, "file": "a.cpp", "arguments": ["cc"]}]
+
+            write_compile_db(tmp_dir, entries)
+
+            rewritten = os.path.join(tmp_dir, REWRITTEN_DB_DIR)
+            self.assertEqual(compile_db_dir(tmp_dir), rewritten)
+            with open(os.path.join(rewritten, "compile_commands.json")) as f:
+                self.assertEqual(json.load(f), entries)
@@ -0,0 +1,39 @@
+import unittest
+
+from testers.shards import Shard, assign_shards
+
+
+class TestShard(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(Shard.parse("2/4"), Shard(2, 4))
+        self.assertEqual(str(Shard(2, 4)), "2/4")
+
+    def test_parse_rejects_invalid(self):
+        for spec in ("2", "0/4", "5/4", "a/b", "-1/2"):
+            with self.assertRaises(ValueError):
+                Shard.parse(spec)
+
+
+class TestAssignShards(unittest.TestCase):
+    def test_every_item_once_and_balanced(self):
+        items = [("p", f"{i}.cpp", size) for i, size in enumerate([9, 7, 6, 5, 4, 1])]
+
+        assignment = assign_shards(items, 2)
+
+        self.assertEqual(set(assignment), {("p", f"{i}.cpp") for i in range(6)})
+        sizes = {file: size for _, file, size in items}
+        loads = [0, 0]
+        for (_, file), shard in assignment.items():
+            loads[shard] += sizes[file]
+        self.assertEqual(sorted(loads), [15, 17])
+
+    def test_independent_of_input_order(self):
+        items = [("a", "x.cpp", 3), ("b", "x.cpp", 3), ("a", "y.cpp", 0)]
+
+        self.assertEqual(
+            assign_shards(items, 2), assign_shards(list(reversed(items)), 2)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
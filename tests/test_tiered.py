@@ -0,0 +1,114 @@
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+from unittest.mock import call, patch
+
+from testers.analyze import TranslationUnit
+from testers.config import Project
+from testers.tiered import (
+    SampleCoverage,
+    pick_sample,
+    stratified_sample,
+    tiered_analyze,
+)
+
+
+def _units(names: list[str]) -> list[TranslationUnit]:
+    return [TranslationUnit("p", name, "/b") for name in names]
+
+
+class TestStratifiedSample(unittest.TestCase):
+    def test_every_directory_gets_its_share(self):
+        names = [f"a/{i}.cpp" for i in range(20)] + [f"b/{i}.cpp" for i in range(10)]
+        units = _units(names)
+        sample, coverage = stratified_sample(units, [1.0] * 30, 0.1)
+
+        self.assertEqual(
+            Counter(os.path.dirname(u.key) for u in sample), {"a": 2, "b": 1}
+        )
+        self.assertEqual(coverage, SampleCoverage(3, 30, 3.0, 30.0, 2, 2))
+
+    def test_independent_of_unit_order(self):
+        names = [f"d{i % 4}/{i}.cpp" for i in range(40)]
+        costs = [float(i % 7) for i in range(40)]
+        first, _ = stratified_sample(_units(names), costs, 0.25)
+        second, _ = stratified_sample(_units(names[::-1]), costs[::-1], 0.25)
+
+        self.assertEqual({u.key for u in first}, {u.key for u in second})
+
+    def test_covers_cost_tiers(self):
+        units = _units([f"a/{i}.cpp" for i in range(9)])
+        costs = [1.0, 1.0, 1.0, 5.0, 5.0, 5.0, 60.0, 60.0, 60.0]
+        sample, coverage = stratified_sample(units, costs, 0.33)
+
+        self.assertEqual(
+            sorted(costs[units.index(u)] for u in sample), [1.0, 5.0, 60.0]
+        )
+        self.assertIn("3 of 9 TUs, an estimated 33% of", coverage.describe())
+
+
+class TestPickSample(unittest.TestCase):
+    @patch("testers.tiered.get_analysis_configs", return_value={})
+    @patch("testers.tiered.load_projects")
+    def test_reused_while_history_changes(self, mock_load, mock_configs):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            mock_load.return_value = [Project(name="p", url="u", commit="c")]
+            build_dir = os.path.join(tmp_dir, "work", "p", "build")
+            os.makedirs(build_dir)
+            entries = [
+                {"directory": build_dir, "file": f"{i}.cpp", "arguments": ["cc"]}
+                for i in range(10)
+            ]
+            with open(os.path.join(build_dir, "compile_commands.json"), "w") as f:
+                json.dump(entries, f)
+            history = os.path.join(tmp_dir, "history.json")
+            sample_file = os.path.join(tmp_dir, "sample.json")
+
+            def pick(fraction: float) -> set[tuple[str, str]]:
+                with patch("sys.stdout"):
+                    files, _coverage = pick_sample(
+                        fraction,
+                        os.path.join(tmp_dir, "work"),
+                        history_file=history,
+                        sample_file=sample_file,
+                    )
+                return files
+
+            first = pick(0.3)
+            with open(history, "w") as f:
+                json.dump({"p": {"c": {"build/0.cpp": {"wall": 100.0}}}}, f)
+
+            self.assertEqual(pick(0.3), first)
+            self.assertEqual(len(first), 3)
+            self.assertEqual(len(pick(0.5)), 5)
+
+
+class TestTieredAnalyze(unittest.TestCase):
+    @patch("testers.tiered.generate_report")
+    @patch("testers.tiered.analyze")
+    @patch("testers.tiered.pick_sample")
+    def test_sample_then_rest(self, mock_pick, mock_analyze, mock_report):
+        sample = {("p", "a.cpp")}
+        mock_pick.return_value = (sample, SampleCoverage(1, 10, 2.0, 20.0, 1, 3))
+
+        with patch("sys.stdout"):
+            tiered_analyze(0.1, "out.md", check_name="c", log_dir="logs")
+
+        self.assertEqual(
+            mock_analyze.call_args_list,
+            [
+                call(check_name="c", log_dir="logs", only_files=sample),
+                call(check_name="c", log_dir="logs", resume=True),
+            ],
+        )
+        provisional, final = mock_report.call_args_list
+        self.assertIn("Provisional", provisional.kwargs["preamble"])
+        self.assertIn("an estimated 10% of", provisional.kwargs["preamble"])
+        self.assertEqual(final, call("logs", "out.md"))
+
+    def test_rejects_bad_fractions(self):
+        for fraction in (0.0, 1.0):
+            with self.assertRaises(SystemExit):
+                tiered_analyze(fraction)